@@ -1,8 +1,23 @@
 """Configuration file for reusable methods"""
+import itertools
+import os
 from datetime import datetime, timedelta
 import pytest
 import jwt
-from tools.api import app, db  # Import the Flask app and in-memory database
+from werkzeug.test import Client
+from tools.api import create_app  # Factory for isolated Flask apps
+from tools.asgi import AsgiApp, asgi_to_wsgi
+
+# 'wsgi' (default) tests the Flask app directly, 'asgi' goes through tools.asgi
+SERVER_MODE = os.environ.get('BTF_SERVER_MODE', 'wsgi')
+
+
+class AsgiTestClient(Client):
+    """Werkzeug test client for the ASGI app; reads responses eagerly unless buffered=False is passed"""
+
+    def open(self, *args, **kwargs):
+        kwargs.setdefault('buffered', True)
+        return super().open(*args, **kwargs)
 
 
 # Sample secret and algorithm for testing
@@ -11,16 +26,51 @@ ALGORITHM = "HS256"
 
 
 @pytest.fixture
-def test_client():
-    """Test client fixture"""
-    with app.test_client() as client:
-        yield client  # Provide the test client for tests
+def make_app(tmp_path):
+    """
+    Factory of the apps a test builds: make_app(config, factory=create_app).
+    Every app gets its own SQLite file or durable store directory in the test's
+    directory when the store is file backed (BTF_SQLITE_PATH or BTF_DURABLE_PATH
+    set), instead of sharing the one named there.
+    """
+    paths = itertools.count()
+
+    def _make_app(config=None, factory=create_app):
+        defaults = {'TESTING': True}
+        if os.environ.get('BTF_SQLITE_PATH'):
+            defaults['SQLITE_PATH'] = str(tmp_path / f'containers-{next(paths)}.db')
+        if os.environ.get('BTF_DURABLE_PATH'):
+            defaults['DURABLE_PATH'] = str(tmp_path / f'durable-{next(paths)}')
+        return factory({**defaults, **(config or {})})
+    return _make_app
+
+
+@pytest.fixture
+def app(make_app):
+    """
+    Fresh Flask app per test with its own store, ID sequence and token cache,
+    so tests can run in parallel (pytest -n auto) without sharing state.
+    A file backed store (BTF_SQLITE_PATH or BTF_DURABLE_PATH set) gets a per-test path.
+    """
+    return make_app()
+
+
+@pytest.fixture
+def db(app):
+    """Container store of the test app"""
+    return app.extensions['btf_store']
 
 
-@pytest.fixture(autouse=True)
-def reset_db():
-    """Automatically reset the database before each test"""
-    db.clear()
+@pytest.fixture
+def test_client(app):
+    """Test client fixture (BTF_SERVER_MODE=asgi sends the requests through the ASGI app)"""
+    if SERVER_MODE == 'asgi':
+        asgi_app = AsgiApp(app)
+        yield AsgiTestClient(asgi_to_wsgi(asgi_app))
+        asgi_app.executor.shutdown()
+        return
+    with app.test_client() as client:
+        yield client  # Provide the test client for tests
 
 
 @pytest.fixture
@@ -0,0 +1,93 @@
+"""
+Test Suite for the application factories in `tools/api.py` and `tools/openapi.py`.
+
+`create_app(config)` builds an independent app with its own store; importing either module
+does not build an app, and the plain API never imports `flask_restx`.
+
+Test Cases:
+-------------
+1. **test_apps_are_independent**:
+    - Verifies that two apps from `create_app()` do not share containers, IDs or configuration.
+
+2. **test_import_is_lazy**:
+    - Verifies in a fresh interpreter that importing the modules builds no app and that the plain API
+      (import, `create_app()` and a request) does not import `flask_restx`.
+
+3. **test_default_app_is_built_on_first_use**:
+    - Verifies that `tools.api.app` and `tools.api.db` refer to one lazily built default instance.
+
+4. **test_openapi_app_serves_containers**:
+    - Verifies that the RESTX app from `tools.openapi.create_app()` registers Swagger and serves the container endpoints.
+"""
+import subprocess
+import sys
+from pathlib import Path
+
+import tools.api
+from tools import openapi
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+
+def test_apps_are_independent(make_app, sample_data):
+    """
+    Test that every app gets its own state
+    """
+    first = make_app()
+    second = make_app({'MAX_BATCH_SIZE': 5})
+
+    response = first.test_client().post('/orchestrator/containers', json=sample_data)
+    assert response.status_code == 201
+    assert response.json['id'] == 1
+
+    response = second.test_client().get('/orchestrator/containers')
+    assert response.status_code == 400
+    response = second.test_client().post('/orchestrator/containers', json=sample_data)
+    assert response.json['id'] == 1
+
+    assert first.config['MAX_BATCH_SIZE'] == 10000
+    assert second.config['MAX_BATCH_SIZE'] == 5
+
+
+def test_import_is_lazy():
+    """
+    Test that importing the servers does no app set up and keeps flask_restx out of the plain API
+    """
+    code = '\n'.join([
+        'import sys',
+        'import tools.api, tools.openapi',
+        "assert 'app' not in vars(tools.api) and 'app' not in vars(tools.openapi)",
+        "assert 'flask_restx' not in sys.modules",
+        "client = tools.api.create_app().test_client()",
+        "assert client.post('/orchestrator/containers', json={'Hostname': 'a'}).status_code == 201",
+        "assert 'flask_restx' not in sys.modules",
+    ])
+    result = subprocess.run([sys.executable, '-c', code], cwd=REPO_ROOT, capture_output=True, text=True, check=False)
+    assert result.returncode == 0, result.stderr
+
+
+def test_default_app_is_built_on_first_use():
+    """
+    Test the module level default instance
+    """
+    assert tools.api.app is tools.api.default_app()
+    assert tools.api.db is tools.api.app.extensions['btf_store']
+    assert tools.api.token_cache is tools.api.app.extensions['btf_token_cache']
+
+
+def test_openapi_app_serves_containers(make_app, sample_data):
+    """
+    Test the documentation server built by its factory
+    """
+    client = make_app(None, openapi.create_app).test_client()
+
+    assert client.get('/swagger.json').status_code == 200
+
+    response = client.post('/orchestrator/containers/', json=sample_data)
+    assert response.status_code == 201
+    assert response.json == {'id': 1, **sample_data}
+
+    response = client.put('/orchestrator/containers/1', json={'Hostname': 'renamed'})
+    assert response.json['Hostname'] == 'renamed'
+    assert client.delete('/orchestrator/containers/1').status_code == 200
+    assert client.get('/orchestrator/containers/1').status_code == 404
@@ -0,0 +1,133 @@
+"""
+Test Suite for the ASGI server mode (`tools/asgi.py`).
+
+The whole `tests/api` tree also runs through the ASGI app with `BTF_SERVER_MODE=asgi`;
+these tests cover the bridge itself.
+
+Test Cases:
+-------------
+1. **test_asgi_environ_from_scope**:
+    - Verifies that the WSGI environ carries the method, path, query string, headers and body of the ASGI scope.
+
+2. **test_asgi_lifespan**:
+    - Verifies that startup and shutdown lifespan events are acknowledged.
+
+3. **test_asgi_buffered_and_streamed_responses**:
+    - Verifies that a buffered response is sent as one body message and a streamed listing as several.
+
+4. **test_asgi_over_uvicorn**:
+    - Serves the ASGI app with uvicorn and verifies the login, protected and container endpoints over HTTP.
+"""
+import asyncio
+import json
+from urllib.request import Request, urlopen
+
+import pytest
+
+from tools.asgi import AsgiApp, build_environ
+from tools.loadgen import local_asgi_server
+
+
+def _call(asgi_app, scope, body=b''):
+    """Run one ASGI request and return the messages sent by the app"""
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(asgi_app(scope, receive, send))
+    return messages
+
+
+def _scope(method, path, query_string=b'', headers=()):
+    return {
+        'type': 'http', 'http_version': '1.1', 'method': method, 'scheme': 'http', 'path': path,
+        'query_string': query_string, 'headers': list(headers), 'server': ('testserver', 8080),
+        'client': ('10.0.0.1', 5000), 'root_path': '',
+    }
+
+
+def test_asgi_environ_from_scope():
+    """
+    Test the scope to environ translation
+    """
+    scope = _scope('POST', '/orchestrator/containers', b'a=1', [
+        (b'content-type', b'application/json'), (b'content-length', b'2'), (b'x-probe', b'a'), (b'x-probe', b'b'),
+    ])
+    environ = build_environ(scope, b'{}')
+    assert environ['REQUEST_METHOD'] == 'POST'
+    assert environ['PATH_INFO'] == '/orchestrator/containers'
+    assert environ['QUERY_STRING'] == 'a=1'
+    assert environ['CONTENT_TYPE'] == 'application/json'
+    assert environ['CONTENT_LENGTH'] == '2'
+    assert environ['HTTP_X_PROBE'] == 'a,b'
+    assert (environ['SERVER_NAME'], environ['SERVER_PORT'], environ['REMOTE_ADDR']) == ('testserver', '8080', '10.0.0.1')
+    assert environ['wsgi.input'].read() == b'{}'
+
+
+def test_asgi_lifespan(app):
+    """
+    Test the lifespan protocol
+    """
+    events = iter([{'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}])
+    sent = []
+
+    async def receive():
+        return next(events)
+
+    async def send(message):
+        sent.append(message['type'])
+
+    asyncio.run(AsgiApp(app)({'type': 'lifespan'}, receive, send))
+    assert sent == ['lifespan.startup.complete', 'lifespan.shutdown.complete']
+
+
+def test_asgi_buffered_and_streamed_responses(app, db):
+    """
+    Test how response bodies are handed to the ASGI server
+    """
+    asgi_app = AsgiApp(app)
+    messages = _call(asgi_app, _scope('POST', '/orchestrator/containers', headers=[(b'content-type', b'application/json')]),
+                     json.dumps({'Hostname': 'web'}).encode())
+    assert messages[0]['status'] == 201
+    assert (b'content-type', b'application/json') in messages[0]['headers']
+    assert len(messages) == 2 and not messages[1].get('more_body')
+    assert json.loads(messages[1]['body'])['Hostname'] == 'web'
+
+    for i in range(1000):
+        db.create({'Hostname': f'container-{i}', 'Entrypoint': '', 'Image': 'ubuntu'})
+    messages = _call(asgi_app, _scope('GET', '/orchestrator/containers', b'stream=ndjson'))
+    bodies = [message for message in messages[1:] if message['body']]
+    assert len(bodies) > 2
+    assert not messages[-1]['more_body']
+    lines = b''.join(message['body'] for message in messages[1:]).splitlines()
+    assert len(lines) == 1001
+
+
+def test_asgi_over_uvicorn():
+    """
+    Test the ASGI mode end to end over HTTP
+    """
+    pytest.importorskip('uvicorn')
+    from tools.asgi import create_asgi_app  # pylint: disable=import-outside-toplevel
+
+    with local_asgi_server(create_asgi_app({'STORE_BACKEND': 'locked'})) as base_url:
+        def call(method, path, body=None, token=None):
+            headers = {'Content-Type': 'application/json'}
+            if token:
+                headers['Authorization'] = f'Bearer {token}'
+            data = json.dumps(body).encode() if body is not None else None
+            with urlopen(Request(base_url + path, data=data, headers=headers, method=method), timeout=10) as response:
+                return response.status, json.loads(response.read())
+
+        status, container = call('POST', '/orchestrator/containers', {'Hostname': 'web'})
+        assert status == 201
+        assert call('GET', f'/orchestrator/containers/{container["id"]}') == (200, container)
+
+        status, body = call('POST', '/auth/login', {'username': 'admin', 'password': 'adminpassword'})
+        assert status == 200
+        assert call('GET', '/protected', token=body['token']) == (200, {'message': 'Welcome admin!'})
+        assert call('GET', '/admin/protected', token=body['token'])[0] == 200
@@ -28,10 +28,36 @@ Test Cases:
 7. **test_access_protected_endpoint_with_insufficient_permissions**:
     - Verifies that a valid token with insufficient permissions returns a `403 Forbidden` error.
 
+8. **test_token_cache_hit_on_reuse**:
+    - Verifies that reusing a token is served from the verification cache.
+
+9. **test_token_cache_invalidated_on_key_rotation**:
+    - Verifies that a cached token is rejected with `401` once the signing key changes.
+
+10. **test_token_cache_expired_token_rejected**:
+    - Verifies that a cached token is rejected with `401` as soon as its `exp` has passed.
+
+11. **test_token_cache_stats_endpoint**:
+    - Verifies that admins can read the cache counters and other users get `403 Forbidden`.
+
+12. **test_token_cache_lru_eviction**:
+    - Verifies that the cache is bounded and evicts the least recently used token.
+
 #TODO add some admin role testing, etc.
 """
+import time
+
+import jwt
 import pytest
 
+from tools.token_cache import TokenCache
+
+
+def _login(test_client, username='testuser', password='testpassword'):
+    response = test_client.post('/auth/login', json={"username": username, "password": password})
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json['token']}"}
+
 
 def test_generate_token(test_client):
     """
@@ -107,3 +133,87 @@ def test_access_protected_endpoint_with_insufficient_permissions(test_client, ge
     response = test_client.get('/admin/protected', headers=headers)
     assert response.status_code == 403
     assert response.json == {"error": "Forbidden"}
+
+
+def test_token_cache_hit_on_reuse(test_client, app):
+    """
+    Test that a reused token is verified once and then served from the cache.
+    """
+    token_cache = app.extensions['btf_token_cache']
+    headers = _login(test_client)
+    before = token_cache.stats()
+
+    for _ in range(3):
+        response = test_client.get('/protected', headers=headers)
+        assert response.status_code == 200
+        assert response.json == {"message": "Welcome testuser!"}
+
+    after = token_cache.stats()
+    assert after['misses'] - before['misses'] == 1
+    assert after['hits'] - before['hits'] == 2
+
+
+def test_token_cache_invalidated_on_key_rotation(test_client, monkeypatch, app):
+    """
+    Test that rotating the secret key invalidates cached tokens.
+    """
+    headers = _login(test_client)
+    assert test_client.get('/protected', headers=headers).status_code == 200
+
+    monkeypatch.setitem(app.config, 'SECRET_KEY', 'rotated_secret_key')
+    response = test_client.get('/protected', headers=headers)
+    assert response.status_code == 401
+    assert response.json == {"error": "Invalid or expired token"}
+
+
+def test_token_cache_expired_token_rejected(test_client, app):
+    """
+    Test that a cached token stops working when it expires.
+    """
+    exp = time.time() + 2  # at least a second left for the first request, however the clock is rounded
+    token = jwt.encode(
+        {"user_id": 1, "username": "testuser", "role": "user", "exp": exp},
+        app.config['SECRET_KEY'],
+        algorithm=app.config['JWT_ALGORITHM']
+    )
+    headers = {"Authorization": f"Bearer {token}"}
+    assert test_client.get('/protected', headers=headers).status_code == 200
+
+    time.sleep(max(0.0, exp - time.time()) + 0.1)  # past exp for the cache and for jwt.decode (which truncates it)
+    response = test_client.get('/protected', headers=headers)
+    assert response.status_code == 401
+    assert response.json == {"error": "Invalid or expired token"}
+
+
+def test_token_cache_stats_endpoint(test_client):
+    """
+    Test the admin-only cache counters endpoint.
+    """
+    response = test_client.get('/admin/token-cache', headers=_login(test_client, 'admin', 'adminpassword'))
+    assert response.status_code == 200
+    assert set(response.json) == {'hits', 'misses', 'size', 'maxsize'}
+
+    response = test_client.get('/admin/token-cache', headers=_login(test_client))
+    assert response.status_code == 403
+    assert response.json == {"error": "Forbidden"}
+
+
+def test_token_cache_lru_eviction():
+    """
+    Test that the cache keeps at most maxsize tokens, dropping the least recently used.
+    """
+    cache = TokenCache(maxsize=2)
+    exp = time.time() + 60
+    cache.put('a', {'exp': exp}, 'key')
+    cache.put('b', {'exp': exp}, 'key')
+    assert cache.get('a', 'key') is not None  # 'b' becomes the least recently used
+    cache.put('c', {'exp': exp}, 'key')
+
+    assert cache.get('b', 'key') is None
+    assert cache.get('a', 'key') == {'exp': exp}
+    assert cache.get('c', 'key') == {'exp': exp}
+    assert cache.stats() == {'hits': 3, 'misses': 1, 'size': 2, 'maxsize': 2}
+
+    # A different key invalidates everything
+    assert cache.get('a', 'rotated') is None
+    assert cache.stats()['size'] == 0
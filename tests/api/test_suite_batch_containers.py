@@ -0,0 +1,172 @@
+"""
+Test Suite for the batch endpoints on `/orchestrator/containers:batch`.
+
+`POST` creates, `PUT` updates and `DELETE` deletes many containers in a single request.
+Bodies are JSON arrays (or NDJSON), and every item gets its own status in the response.
+
+Test Cases:
+-------------
+1. **test_batch_create_containers**:
+    - Verifies that a JSON array of containers is created with consecutive IDs and default values.
+
+2. **test_batch_create_ndjson**:
+    - Verifies that the batch can be sent as NDJSON.
+
+3. **test_batch_create_rejects_invalid_items**:
+    - Verifies that one invalid item rejects the whole batch with per-item statuses and creates nothing.
+
+4. **test_batch_create_invalid_body**:
+    - Verifies that non-list bodies, malformed NDJSON and oversized batches return a 400 error.
+
+5. **test_batch_update_containers**:
+    - Verifies that existing containers are updated and unknown IDs are reported with 404 (207 Multi-Status).
+
+6. **test_batch_update_requires_ids**:
+    - Verifies that items without an integer 'id' reject the batch.
+
+7. **test_batch_delete_containers**:
+    - Verifies that listed containers are deleted and unknown IDs are reported per item.
+
+8. **test_batch_with_unique_hostnames**:
+    - With `UNIQUE_HOSTNAMES` enabled, verifies that duplicates reject create and update batches without partial writes.
+"""
+import json
+
+import pytest
+
+
+def test_batch_create_containers(test_client, sample_data):
+    """
+    Test creating several containers in one request
+    """
+    # Existing containers must not clash with the batch IDs
+    response = test_client.post('/orchestrator/containers', json=sample_data)
+    assert response.status_code == 201
+
+    items = [{'Hostname': f'container-{i}', 'Image': 'alpine'} for i in range(3)]
+    response = test_client.post('/orchestrator/containers:batch', json=items)
+    assert response.status_code == 201
+    results = response.json['results']
+    assert [result['status'] for result in results] == [201, 201, 201]
+    assert [result['container']['id'] for result in results] == [2, 3, 4]
+    assert results[0]['container'] == {'id': 2, 'Hostname': 'container-0', 'Entrypoint': '', 'Image': 'alpine'}
+
+    response = test_client.get('/orchestrator/containers')
+    assert len(response.json) == 4
+
+    # Single creates continue after the batch
+    response = test_client.post('/orchestrator/containers', json=sample_data)
+    assert response.json['id'] == 5
+
+
+def test_batch_create_ndjson(test_client):
+    """
+    Test creating containers from an NDJSON body
+    """
+    body = '\n'.join(json.dumps({'Hostname': f'container-{i}'}) for i in range(2)) + '\n'
+    response = test_client.post('/orchestrator/containers:batch', data=body, content_type='application/x-ndjson')
+    assert response.status_code == 201
+    assert [result['container']['Hostname'] for result in response.json['results']] == ['container-0', 'container-1']
+
+
+def test_batch_create_rejects_invalid_items(test_client):
+    """
+    Test that a batch with an invalid item creates nothing
+    """
+    items = [{'Hostname': 'ok-1'}, {'Image': 'nginx'}, 'not an object', {'Hostname': 'ok-2'}]
+    response = test_client.post('/orchestrator/containers:batch', json=items)
+    assert response.status_code == 400
+    assert [result['status'] for result in response.json['results']] == [424, 400, 400, 424]
+    assert response.json['results'][1]['error'] == 'Bad request. "Hostname" is required.'
+
+    response = test_client.get('/orchestrator/containers')
+    assert response.status_code == 400
+    assert response.json == {'error': 'containers are empty'}
+
+
+def test_batch_create_invalid_body(test_client, monkeypatch, app):
+    """
+    Test malformed and oversized batch bodies
+    """
+    response = test_client.post('/orchestrator/containers:batch', json={'Hostname': 'not-a-list'})
+    assert response.status_code == 400
+
+    response = test_client.post('/orchestrator/containers:batch', data='{"Hostname": "a"}\n{oops', content_type='application/x-ndjson')
+    assert response.status_code == 400
+    assert response.json == {'error': 'Bad request. Invalid NDJSON body.'}
+
+    monkeypatch.setitem(app.config, 'MAX_BATCH_SIZE', 2)
+    response = test_client.post('/orchestrator/containers:batch', json=[{'Hostname': 'a'}] * 3)
+    assert response.status_code == 400
+    assert response.json == {'error': 'Bad request. A batch is limited to 2 items.'}
+
+
+def test_batch_update_containers(test_client):
+    """
+    Test updating several containers, one of them unknown
+    """
+    test_client.post('/orchestrator/containers:batch', json=[{'Hostname': 'a'}, {'Hostname': 'b'}])
+
+    items = [{'id': 1, 'Image': 'nginx'}, {'id': 9999, 'Image': 'nginx'}, {'id': 2, 'Hostname': 'b2', 'id2': 'ignored'}]
+    response = test_client.put('/orchestrator/containers:batch', json=items)
+    assert response.status_code == 207
+    results = response.json['results']
+    assert [result['status'] for result in results] == [200, 404, 200]
+    assert results[0]['container'] == {'id': 1, 'Hostname': 'a', 'Entrypoint': '', 'Image': 'nginx'}
+    assert results[1] == {'id': 9999, 'status': 404, 'error': 'container not found'}
+    assert test_client.get('/orchestrator/containers/2').json['Hostname'] == 'b2'
+
+    response = test_client.put('/orchestrator/containers:batch', json=[{'id': 1, 'Entrypoint': '/start.sh'}])
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize("items", [[{'Image': 'nginx'}], [{'id': '1'}], [1, 2], [{'id': True}]])
+def test_batch_update_requires_ids(test_client, sample_data, items):
+    """
+    Test that update items need an integer 'id'
+    """
+    test_client.post('/orchestrator/containers', json=sample_data)
+    response = test_client.put('/orchestrator/containers:batch', json=items)
+    assert response.status_code == 400
+    assert test_client.get('/orchestrator/containers/1').json['Image'] == sample_data['Image']
+
+
+def test_batch_delete_containers(test_client):
+    """
+    Test deleting several containers by ID
+    """
+    test_client.post('/orchestrator/containers:batch', json=[{'Hostname': f'c-{i}'} for i in range(3)])
+
+    response = test_client.delete('/orchestrator/containers:batch', json=[1, 3, 42])
+    assert response.status_code == 207
+    assert response.json['results'] == [
+        {'id': 1, 'status': 200, 'message': 'container 1 deleted'},
+        {'id': 3, 'status': 200, 'message': 'container 3 deleted'},
+        {'id': 42, 'status': 404, 'error': 'container not found'},
+    ]
+    assert [container['id'] for container in test_client.get('/orchestrator/containers').json] == [2]
+
+    response = test_client.delete('/orchestrator/containers:batch', json=[2])
+    assert response.status_code == 200
+
+    response = test_client.delete('/orchestrator/containers:batch', json=['2'])
+    assert response.status_code == 400
+
+
+def test_batch_with_unique_hostnames(test_client, monkeypatch, app):
+    """
+    Test that duplicate Hostnames reject a batch as a whole
+    """
+    monkeypatch.setitem(app.config, 'UNIQUE_HOSTNAMES', True)
+
+    response = test_client.post('/orchestrator/containers:batch', json=[{'Hostname': 'a'}, {'Hostname': 'a'}])
+    assert response.status_code == 400
+    assert response.json == {'error': 'Duplicate container. Hostname must be unique.'}
+
+    response = test_client.post('/orchestrator/containers:batch', json=[{'Hostname': 'a'}, {'Hostname': 'b'}])
+    assert response.status_code == 201
+
+    # The first item would apply, the second clashes with it: nothing changes
+    response = test_client.put('/orchestrator/containers:batch', json=[{'id': 1, 'Hostname': 'c'}, {'id': 2, 'Hostname': 'c'}])
+    assert response.status_code == 400
+    assert [container['Hostname'] for container in test_client.get('/orchestrator/containers').json] == ['a', 'b']
@@ -0,0 +1,179 @@
+"""
+Test Suite for concurrent container writes against a live, multi-threaded server.
+
+The Flask test client runs one request at a time, so these tests start the API on a
+real socket (threaded werkzeug, or uvicorn with `BTF_SERVER_MODE=asgi`) and hammer it
+from many client threads. The store is the thread-safe dict store, or a SQLite file
+with `BTF_STORE=sqlite`.
+
+Test Cases:
+-------------
+1. **test_concurrent_full_updates_never_mix**:
+    - Verifies that concurrent full-record `PUT` requests to the same container leave one writer's record, never a mix of fields, and that every update is counted in the `ETag`.
+
+2. **test_concurrent_updates_to_different_containers**:
+    - Verifies that writers to different containers all succeed and keep the hostname index consistent.
+
+3. **test_concurrent_if_match_has_one_winner**:
+    - Verifies that of several writers sending the same `If-Match`, exactly one succeeds and the others get `412 Precondition Failed`.
+
+4. **test_keyed_lock_is_per_key**:
+    - Verifies that holding the lock of one container does not block another container and that unused locks are dropped.
+"""
+import http.client
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import pytest
+
+from tools.api import create_app
+from tools.locks import KeyedLock
+from tools.loadgen import local_asgi_server, local_server
+
+WRITERS = 16
+UPDATES_PER_WRITER = 25
+
+
+@pytest.fixture(name='base_url')
+def fixture_base_url(tmp_path):
+    """
+    URL of the API served on a free localhost port
+    """
+    config = {'STORE_BACKEND': 'locked'}
+    if os.environ.get('BTF_STORE') == 'sqlite':
+        config = {'STORE_BACKEND': 'sqlite', 'SQLITE_PATH': str(tmp_path / 'containers.db')}
+    if os.environ.get('BTF_SERVER_MODE', 'wsgi') == 'asgi':
+        pytest.importorskip('uvicorn')
+        from tools.asgi import AsgiApp  # pylint: disable=import-outside-toplevel
+        with local_asgi_server(AsgiApp(create_app(config), max_workers=WRITERS)) as url:
+            yield url
+    else:
+        with local_server(create_app(config)) as url:
+            yield url
+
+
+def _request(base_url, method, path, body=None, headers=None):
+    """Send one request on a new connection and return (status, headers, decoded JSON body)"""
+    target = urlsplit(base_url)
+    connection = http.client.HTTPConnection(target.hostname, target.port, timeout=30)
+    try:
+        connection.request(method, path, body=json.dumps(body) if body is not None else None,
+                           headers={'Content-Type': 'application/json', **(headers or {})})
+        response = connection.getresponse()
+        return response.status, response.headers, json.loads(response.read())
+    finally:
+        connection.close()
+
+
+def _run_writers(count, writer):
+    """Run writer(index) in count threads released together, return their results"""
+    barrier = threading.Barrier(count)
+
+    def start(index):
+        barrier.wait()
+        return writer(index)
+
+    with ThreadPoolExecutor(max_workers=count) as executor:
+        return list(executor.map(start, range(count)))
+
+
+def test_concurrent_full_updates_never_mix(base_url):
+    """
+    Test concurrent full-record updates to one container
+    """
+    status, _, container = _request(base_url, 'POST', '/orchestrator/containers', {'Hostname': 'shared'})
+    assert status == 201
+
+    def writer(index):
+        record = {'Hostname': f'host-{index}', 'Entrypoint': f'entry-{index}', 'Image': f'image-{index}'}
+        return [_request(base_url, 'PUT', f'/orchestrator/containers/{container["id"]}', record)[0]
+                for _ in range(UPDATES_PER_WRITER)]
+
+    statuses = sum(_run_writers(WRITERS, writer), [])
+    assert statuses == [200] * WRITERS * UPDATES_PER_WRITER
+
+    status, headers, final = _request(base_url, 'GET', f'/orchestrator/containers/{container["id"]}')
+    assert status == 200
+    index = final['Hostname'].split('-')[1]
+    assert final == {'id': container['id'], 'Hostname': f'host-{index}', 'Entrypoint': f'entry-{index}', 'Image': f'image-{index}'}
+    assert headers['ETag'].endswith(f'-{container["id"]}-{WRITERS * UPDATES_PER_WRITER + 1}"')  # after the store epoch
+
+
+def test_concurrent_updates_to_different_containers(base_url):
+    """
+    Test concurrent writers each owning one container
+    """
+    ids = [_request(base_url, 'POST', '/orchestrator/containers', {'Hostname': f'own-{index}'})[2]['id'] for index in range(WRITERS)]
+
+    def writer(index):
+        statuses = []
+        for update in range(UPDATES_PER_WRITER):
+            record = {'Hostname': f'own-{index}-{update}', 'Image': f'image-{index}-{update}'}
+            statuses.append(_request(base_url, 'PUT', f'/orchestrator/containers/{ids[index]}', record)[0])
+        return statuses
+
+    assert all(statuses == [200] * UPDATES_PER_WRITER for statuses in _run_writers(WRITERS, writer))
+
+    last = UPDATES_PER_WRITER - 1
+    for index, container_id in enumerate(ids):
+        status, headers, container = _request(base_url, 'GET', f'/orchestrator/containers/{container_id}')
+        assert status == 200
+        assert (container['Hostname'], container['Image']) == (f'own-{index}-{last}', f'image-{index}-{last}')
+        assert headers['ETag'].endswith(f'-{container_id}-{UPDATES_PER_WRITER + 1}"')
+        # The hostname index follows the final value only
+        assert _request(base_url, 'GET', f'/orchestrator/containers?Hostname=own-{index}-{last}')[2] == [container]
+        assert _request(base_url, 'GET', f'/orchestrator/containers?Hostname=own-{index}-0')[2] == []
+
+
+def test_concurrent_if_match_has_one_winner(base_url):
+    """
+    Test optimistic concurrency under contention
+    """
+    status, headers, container = _request(base_url, 'POST', '/orchestrator/containers', {'Hostname': 'contended'})
+    assert status == 201
+    path = f'/orchestrator/containers/{container["id"]}'
+
+    etag = headers['ETag']
+    for _ in range(5):
+        results = _run_writers(WRITERS, lambda index, etag=etag: _request(base_url, 'PUT', path, {'Image': f'image-{index}'}, {'If-Match': etag}))
+        statuses = sorted(result[0] for result in results)
+        assert statuses == [200] + [412] * (WRITERS - 1)
+        winner = next(result for result in results if result[0] == 200)
+        assert _request(base_url, 'GET', path)[2] == winner[2]
+        etag = winner[1]['ETag']
+
+
+def test_keyed_lock_is_per_key():
+    """
+    Test that per-container locks are independent
+    """
+    locks = KeyedLock()
+    held = threading.Event()
+    release = threading.Event()
+
+    def hold():
+        with locks(1):
+            held.set()
+            release.wait(5)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    try:
+        assert held.wait(5)
+        done = threading.Event()
+
+        def use_other_key():
+            with locks(2):
+                done.set()
+        other_key = threading.Thread(target=use_other_key)
+        other_key.start()
+        assert done.wait(5)
+        other_key.join()
+        assert len(locks) == 1
+    finally:
+        release.set()
+        holder.join()
+    assert len(locks) == 0
@@ -0,0 +1,138 @@
+"""
+Test Suite for the container service (`tools/containers.py`) shared by `tools/api.py` and `tools/openapi.py`.
+
+Test Cases:
+-------------
+1. **test_service_crud_and_errors**:
+    - Verifies create/get/update/delete and the ContainerError raised (with its HTTP status) for invalid data and unknown IDs.
+
+2. **test_service_unique_hostnames_follows_config**:
+    - Verifies that the uniqueness policy is read from the config on every call.
+
+3. **test_service_page_reports_next_page**:
+    - Verifies that a page is cut to its limit and reports whether more containers follow.
+
+4. **test_service_create_many_is_all_or_nothing**:
+    - Verifies per-item validation errors and that nothing is created when one item is invalid.
+
+5. **test_servers_share_error_messages**:
+    - Verifies that both servers answer missing and unknown containers with the same status and body, and update bodies that are not JSON objects with `400`.
+"""
+import pytest
+
+from tools import openapi
+from tools.containers import (CONTAINER_NOT_FOUND, CONTAINERS_EMPTY, DUPLICATE_HOSTNAME, HOSTNAME_REQUIRED, OBJECT_REQUIRED,
+                              ContainerError, ContainerNotFoundError, ContainerService)
+from tools.storage import create_store
+
+
+@pytest.fixture
+def service():
+    """Service over a fresh in-memory store"""
+    return ContainerService(create_store('dict'), {'UNIQUE_HOSTNAMES': False})
+
+
+def test_service_crud_and_errors(service):
+    """
+    Test the service operations and their errors
+    """
+    assert service.is_empty()
+    container = service.create({'Hostname': 'web'})
+    assert container == {'id': 1, 'Hostname': 'web', 'Entrypoint': '', 'Image': 'ubuntu'}
+    assert service.get(1) == container
+    assert service.update(1, {'Image': 'nginx', 'unknown': 'ignored'})['Image'] == 'nginx'
+
+    for data in (None, {}, {'Image': 'nginx'}, ['Hostname']):
+        with pytest.raises(ContainerError, match='"Hostname" is required') as error:
+            service.create(data)
+        assert error.value.status == 400
+
+    for data in (None, 'nginx', 7, [1, 2]):
+        with pytest.raises(ContainerError, match=OBJECT_REQUIRED) as error:
+            service.update(1, data)
+        assert error.value.status == 400
+    assert service.get(1)['Image'] == 'nginx'
+
+    for operation in (service.get, service.delete, lambda container_id: service.update(container_id, {})):
+        with pytest.raises(ContainerNotFoundError) as error:
+            operation(42)
+        assert error.value.status == 404
+        assert str(error.value) == CONTAINER_NOT_FOUND
+
+    assert service.delete(1)['Hostname'] == 'web'
+    assert service.is_empty()
+
+
+def test_service_unique_hostnames_follows_config(service):
+    """
+    Test that the Hostname uniqueness setting is read at call time
+    """
+    service.create({'Hostname': 'web'})
+    service.create({'Hostname': 'web'})
+
+    service.config['UNIQUE_HOSTNAMES'] = True
+    with pytest.raises(ContainerError, match=DUPLICATE_HOSTNAME):
+        service.create({'Hostname': 'web'})
+    with pytest.raises(ContainerError, match=DUPLICATE_HOSTNAME):
+        service.create_many([{'Hostname': 'a'}, {'Hostname': 'a'}])
+    assert len(service.store) == 2
+
+
+def test_service_page_reports_next_page(service):
+    """
+    Test limit handling and next page detection
+    """
+    for i in range(5):
+        service.create({'Hostname': f'c-{i}', 'Image': 'nginx' if i % 2 else 'alpine'})
+
+    containers, has_next = service.page(limit=2)
+    assert [container['id'] for container in containers] == [1, 2]
+    assert has_next
+
+    containers, has_next = service.page(limit=2, after_id=3)
+    assert [container['id'] for container in containers] == [4, 5]
+    assert not has_next
+
+    containers, has_next = service.page(filters=service.filters({'Image': 'nginx', 'stream': 'json'}))
+    assert [container['id'] for container in containers] == [2, 4]
+    assert not has_next
+
+
+def test_service_create_many_is_all_or_nothing(service):
+    """
+    Test batch validation
+    """
+    containers, errors = service.create_many([{'Hostname': 'a'}, {'Image': 'nginx'}])
+    assert containers is None
+    assert errors == [None, HOSTNAME_REQUIRED]
+    assert service.is_empty()
+
+    containers, errors = service.create_many([{'Hostname': 'a'}, {'Hostname': 'b'}])
+    assert errors is None
+    assert [container['id'] for container in containers] == [1, 2]
+
+
+def test_servers_share_error_messages(make_app, test_client):
+    """
+    Test that the plain API and the RESTX server report errors identically
+    """
+    docs_client = make_app(None, openapi.create_app).test_client()
+
+    for client, base in ((test_client, '/orchestrator/containers'), (docs_client, '/orchestrator/containers/')):
+        response = client.get(base)
+        assert response.status_code == 400
+        assert response.json == {'error': CONTAINERS_EMPTY}
+
+    for client in (test_client, docs_client):
+        for method in (client.get, client.delete):
+            response = method('/orchestrator/containers/7')
+            assert response.status_code == 404
+            assert response.json == {'error': CONTAINER_NOT_FOUND}
+
+    # RESTX validates bodies against its model first, with its own error format
+    assert test_client.post('/orchestrator/containers', json={'Hostname': 'web'}).status_code == 201
+    assert docs_client.post('/orchestrator/containers/', json={'Hostname': 'web'}).status_code == 201
+    for body in ('"nginx"', '7', '[1, 2]'):
+        response = test_client.put('/orchestrator/containers/1', data=body, content_type='application/json')
+        assert (response.status_code, response.json) == (400, {'error': OBJECT_REQUIRED})
+        assert docs_client.put('/orchestrator/containers/1', data=body, content_type='application/json').status_code == 400
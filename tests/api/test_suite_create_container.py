@@ -56,6 +56,15 @@ Test Cases:
 
 17. **test_create_container_case_sensitive_hostname**:
     - Verifies if the 'Hostname' is treated as case-sensitive by the API. Tests creating containers with hostnames differing only in case.
+
+18. **test_create_container_id_not_reused_after_delete**:
+    - Verifies that deleting the newest container does not free its 'id' for the next created container.
+
+19. **test_create_duplicate_container_with_unique_hostnames**:
+    - With `UNIQUE_HOSTNAMES` enabled, verifies that a duplicate 'Hostname' is rejected on create and on update, and is free again once its container is deleted.
+
+20. **test_create_container_any_json_values**:
+    - Verifies that field values which are lists, objects, booleans, floats or integers beyond 64 bits are stored and read back unchanged by every storage backend, and still count as duplicates.
 """
 
 import pytest
@@ -278,3 +287,72 @@ def test_create_container_special_characters_in_image(test_client):
     assert response.status_code == 201  # Assuming no validation on Image
     created_container = response.json
     assert created_container['Image'] == 'invalid#:!@#$%^&*()image!'
+
+
+def test_create_container_id_not_reused_after_delete(test_client, sample_data):
+    """
+    Test that a deleted container's ID is never handed out again
+    """
+    created_1 = test_client.post('/orchestrator/containers', json=sample_data).json
+    created_2 = test_client.post('/orchestrator/containers', json=sample_data).json
+
+    # Delete the newest container, its ID must not be reused
+    response = test_client.delete(f'/orchestrator/containers/{created_2["id"]}')
+    assert response.status_code == 200
+
+    response = test_client.post('/orchestrator/containers', json=sample_data)
+    assert response.status_code == 201
+    created_3 = response.json
+    assert created_3['id'] == created_2['id'] + 1
+    assert created_3['id'] != created_1['id']
+
+
+def test_create_duplicate_container_with_unique_hostnames(test_client, sample_data, monkeypatch, app):
+    """
+    Test the optional Hostname uniqueness enforced through the Hostname index
+    """
+    monkeypatch.setitem(app.config, 'UNIQUE_HOSTNAMES', True)
+    duplicate_error = {'error': 'Duplicate container. Hostname must be unique.'}
+
+    response_1 = test_client.post('/orchestrator/containers', json=sample_data)
+    assert response_1.status_code == 201
+
+    response_2 = test_client.post('/orchestrator/containers', json=sample_data)
+    assert response_2.status_code == 400
+    assert response_2.json == duplicate_error
+
+    # Renaming another container to a taken Hostname is rejected as well
+    other = test_client.post('/orchestrator/containers', json={'Hostname': 'other-host'}).json
+    response = test_client.put(f'/orchestrator/containers/{other["id"]}', json={'Hostname': sample_data['Hostname']})
+    assert response.status_code == 400
+    assert response.json == duplicate_error
+
+    # Keeping its own Hostname is not a duplicate
+    response = test_client.put(f'/orchestrator/containers/{other["id"]}', json={'Hostname': 'other-host'})
+    assert response.status_code == 200
+
+    # Deleting the owner frees the Hostname
+    assert test_client.delete(f'/orchestrator/containers/{response_1.json["id"]}').status_code == 200
+    response = test_client.post('/orchestrator/containers', json=sample_data)
+    assert response.status_code == 201
+
+
+@pytest.mark.parametrize('value', [[1, 'a'], {'port': 80, 'tags': []}, 2 ** 64, -2 ** 63 - 1, True, False, 1.5, 7, None], ids=repr)
+def test_create_container_any_json_values(test_client, monkeypatch, app, value):
+    """
+    Test field values of every JSON type
+    """
+    body = {'Hostname': value, 'Entrypoint': value, 'Image': value}
+    response = test_client.post('/orchestrator/containers', json=body)
+    assert response.status_code == 201
+    container_id = response.json['id']
+    assert test_client.get(f'/orchestrator/containers/{container_id}').json == {'id': container_id, **body}
+    assert test_client.get('/orchestrator/containers').json == [{'id': container_id, **body}]
+
+    response = test_client.put(f'/orchestrator/containers/{container_id}', json={'Entrypoint': [value]})
+    assert response.status_code == 200
+    assert test_client.get(f'/orchestrator/containers/{container_id}').json['Entrypoint'] == [value]
+
+    monkeypatch.setitem(app.config, 'UNIQUE_HOSTNAMES', True)
+    assert test_client.post('/orchestrator/containers', json={'Hostname': value}).status_code == 400
+    assert test_client.post('/orchestrator/containers:batch', json=[{'Hostname': value}]).status_code == 400
@@ -29,14 +29,16 @@ Test Cases:
 6. **test_delete_unauthorized**:
     - Verifies that the API correctly responds with a 403 error when an unauthorized user attempts to delete a container.
 
+7. **test_delete_with_if_match**:
+    - Verifies that a delete with a stale `If-Match` returns `412 Precondition Failed` and keeps the container, and that the current `ETag` deletes it.
+
 Additional TC's (Not Implemented): #TODO
 
-7. **test_delete_with_dependencies**:
+8. **test_delete_with_dependencies**:
     - Tests deleting a container that has active dependencies, ensuring that the API either prevents deletion or handles it properly.
 
-8. **test_bulk_delete_containers**:
-    - Verifies that multiple containers can be deleted in a single bulk deletion request.
-    - Ensures proper handling of both valid and invalid container IDs in the bulk request.
+Bulk deletion (`DELETE /orchestrator/containers:batch`, valid and invalid IDs in one request) is covered by
+**test_batch_delete_containers** in test_suite_batch_containers.py.
 """
 import pytest
 
@@ -122,6 +124,23 @@ def test_delete_invalid_container_id(test_client):
     response = test_client.delete('/orchestrator/containers/invalid_id')
     assert response.status_code == 404  # Flask default behavior for invalid route
 
+
+def test_delete_with_if_match(test_client, sample_data):
+    """
+    Test conditional deletes
+    """
+    stale_etag = test_client.post('/orchestrator/containers', json=sample_data).headers['ETag']
+    current_etag = test_client.put('/orchestrator/containers/1', json={'Image': 'nginx'}).headers['ETag']
+
+    response = test_client.delete('/orchestrator/containers/1', headers={'If-Match': stale_etag})
+    assert response.status_code == 412
+    assert test_client.get('/orchestrator/containers/1').status_code == 200
+
+    response = test_client.delete('/orchestrator/containers/1', headers={'If-Match': current_etag})
+    assert response.status_code == 200
+    assert test_client.get('/orchestrator/containers/1').status_code == 404
+
+
 @pytest.mark.xfail(reason="Known bug: [Authorization isn't implemented]", strict=True)
 def test_delete_unauthorized(test_client, sample_data):
     """
@@ -0,0 +1,289 @@
+"""
+Test Suite for the durable in-memory store (`STORE_BACKEND = 'durable'`, tools/storage.py and tools/wal.py).
+The contract shared with the other backends is covered by test_suite_storage.py; these tests
+reopen the store directory to check what survives.
+
+Test Cases:
+-------------
+1. **test_durable_store_survives_reopen**:
+    - Verifies that every kind of write, single and batched, is replayed from the log with the same records, versions, indexes, collection version, epoch and next ID; a clear changes the epoch.
+
+2. **test_durable_store_snapshot_replaces_log**:
+    - Verifies that a snapshot is written after `snapshot_every` log entries, replaces the older log segments and is loaded together with the newer ones.
+
+3. **test_durable_store_writes_during_snapshot**:
+    - Verifies that writes made while a snapshot is being written land in the new segment and survive a reopen.
+
+4. **test_durable_store_interrupted_snapshot**:
+    - Verifies that a crash while writing a snapshot loses nothing: the previous snapshot and every segment are replayed.
+
+5. **test_durable_store_torn_write**:
+    - Verifies that a last log line cut short by a crash is dropped and truncated away, and that later writes follow it cleanly.
+
+6. **test_durable_store_fsync_modes**:
+    - Verifies that 'always' fsyncs every write, 'interval' fsyncs in the background, 'never' only on close, and that an unknown mode is refused.
+
+7. **test_durable_store_directory_lock**:
+    - Verifies that a second opener of a store directory is refused while the first holds it, and can open it once released.
+
+8. **test_durable_store_long_numbers**:
+    - Verifies that integers beyond 64 bits and non-ASCII text come back unchanged from the snapshot and the log.
+
+9. **test_app_with_durable_store**:
+    - Verifies that containers created through the API are served again by a new app over the same directory.
+"""
+import os
+import threading
+
+import pytest
+
+from tools import wal
+from tools.api import create_app
+from tools.storage import DuplicateError, create_store
+
+
+def _state(store):
+    """Everything a reopened store must reproduce"""
+    return {
+        'records': store.values(),
+        'versions': {record['id']: store.version(record['id']) for record in store.values()},
+        'collection_version': store.collection_version(),
+        'epoch': store.epoch(),
+        'ubuntu': store.page(filters={'Image': 'ubuntu'}),
+    }
+
+
+def _next_id(store):
+    """ID the next container gets (the probe container is deleted again)"""
+    container_id = store.create({'Hostname': 'probe', 'Entrypoint': '', 'Image': 'probe'})['id']
+    store.delete(container_id)
+    return container_id
+
+
+@pytest.fixture(name='open_store')
+def fixture_open_store(tmp_path):
+    """Open durable stores over one directory, closing whatever a test leaves open"""
+    opened = []
+
+    def open_store(**options):
+        options.setdefault('fsync', 'never')
+        store = create_store('durable', path=str(tmp_path / 'durable'), **options)
+        opened.append(store)
+        return store
+
+    yield open_store
+    for store in opened:
+        if not store._lock_file.closed:  # pylint: disable=protected-access
+            store.close()
+
+
+def _reopen(store, open_store, **options):
+    """Close store, open its directory again and compare"""
+    next_id = _next_id(store)
+    expected = _state(store)
+    store.close()
+    reopened = open_store(**options)
+    assert _state(reopened) == expected
+    assert _next_id(reopened) == next_id + 1
+    return reopened
+
+
+def test_durable_store_survives_reopen(open_store, sample_data):
+    """
+    Test replaying every kind of write
+    """
+    store = open_store()
+    store.create(sample_data)
+    store.create({'Hostname': 'web', 'Entrypoint': '', 'Image': 'ubuntu'}, unique_fields=('Hostname',))
+    store.update(1, {'Image': 'ubuntu'})
+    store.update(1, {'Entrypoint': '/bin/sh'})
+    store.create_many([{'Hostname': f'batch-{i}', 'Entrypoint': '', 'Image': 'alpine'} for i in range(5)])
+    store.update_many([(3, {'Image': 'ubuntu'}), (4, {'Hostname': 'renamed'}), (99, {'Image': 'x'})])
+    with pytest.raises(DuplicateError):  # rolled back, but the collection version moved
+        store.update_many([(5, {'Hostname': 'taken'}), (6, {'Hostname': 'web'})], unique_fields=('Hostname',))
+    store.delete(7)
+    store.delete_many([2, 100])
+    assert store.delete(7) is None
+    store = _reopen(store, open_store)
+
+    epoch = store.epoch()
+    store.clear()
+    assert store.epoch() != epoch  # IDs and versions restart
+    store.create(sample_data)
+    store = _reopen(store, open_store)
+    assert store.get(1)['Hostname'] == sample_data['Hostname']
+
+
+def test_durable_store_snapshot_replaces_log(open_store, tmp_path):
+    """
+    Test compaction into snapshots
+    """
+    store = open_store(snapshot_every=10)
+    for i in range(25):
+        store.create({'Hostname': f'host-{i}', 'Entrypoint': '', 'Image': 'ubuntu' if i % 2 else 'alpine'})
+        store.update(i + 1, {'Entrypoint': 'sh'})
+    store.close()  # waits for the running snapshot
+    directory = str(tmp_path / 'durable')
+    header, _ = wal.read_snapshot(directory)
+    assert header is not None
+    assert wal.wal_segments(directory)[0][0] == header['wal_segment']  # the older ones are gone
+
+    store = open_store(snapshot_every=0)
+    store.snapshot()
+    header, rows = wal.read_snapshot(directory)
+    assert [segment for segment, _ in wal.wal_segments(directory)] == [header['wal_segment']]
+    assert len(rows) == header['count'] == 25
+    assert rows[0] == [2, {'id': 1, 'Hostname': 'host-0', 'Entrypoint': 'sh', 'Image': 'alpine'}]
+    store.delete(3)
+    _reopen(store, open_store, snapshot_every=10)
+
+
+def test_durable_store_writes_during_snapshot(open_store, monkeypatch):
+    """
+    Test writing while a snapshot is written
+    """
+    store = open_store(snapshot_every=0)
+    store.create_many([{'Hostname': f'host-{i}', 'Entrypoint': '', 'Image': 'ubuntu'} for i in range(100)])
+    writing, written = threading.Event(), threading.Event()
+    write_snapshot = wal.write_snapshot
+
+    def slow_write_snapshot(*args):
+        writing.set()
+        assert written.wait(10)
+        write_snapshot(*args)
+
+    monkeypatch.setattr('tools.storage.write_snapshot', slow_write_snapshot)
+    thread = threading.Thread(target=store.snapshot)
+    thread.start()
+    assert writing.wait(10)
+    store.update(1, {'Image': 'alpine'})  # not blocked by the snapshot being written
+    store.delete(2)
+    store.create({'Hostname': 'late', 'Entrypoint': '', 'Image': 'ubuntu'})
+    written.set()
+    thread.join()
+    _reopen(store, open_store)
+
+
+def test_durable_store_interrupted_snapshot(open_store, monkeypatch, tmp_path):
+    """
+    Test a crash between log rotation and snapshot
+    """
+    store = open_store(snapshot_every=0)
+    store.create_many([{'Hostname': f'host-{i}', 'Entrypoint': '', 'Image': 'ubuntu'} for i in range(10)])
+    store.snapshot()
+    store.update(1, {'Image': 'alpine'})
+
+    def crash(*args):
+        raise OSError('No space left on device')
+
+    monkeypatch.setattr('tools.storage.write_snapshot', crash)
+    with pytest.raises(OSError):
+        store.snapshot()
+    store.delete(2)
+    assert len(wal.wal_segments(str(tmp_path / 'durable'))) == 2
+    monkeypatch.undo()
+    _reopen(store, open_store)
+
+
+def test_durable_store_torn_write(open_store, sample_data, tmp_path):
+    """
+    Test recovering from a partly written log entry
+    """
+    store = open_store()
+    store.create(sample_data)
+    expected = store.values()
+    store.close()
+    (_, segment_file), = wal.wal_segments(str(tmp_path / 'durable'))
+    valid_length = os.path.getsize(segment_file)
+    with open(segment_file, 'ab') as log_file:
+        log_file.write(b'["put",1,{"id":2,"Hostn')
+
+    store = open_store()
+    assert store.values() == expected
+    assert os.path.getsize(segment_file) == valid_length
+    store.create(sample_data)
+    store = _reopen(store, open_store)
+
+    store.close()
+    with open(segment_file, 'r+b') as log_file:
+        log_file.write(b'not json')
+    with pytest.raises(ValueError):  # damage before the last line is not a torn write
+        open_store()
+
+
+def test_durable_store_fsync_modes(open_store, sample_data, monkeypatch):
+    """
+    Test when the log reaches the disk
+    """
+    fsyncs = []
+    fsync = os.fsync
+    monkeypatch.setattr(os, 'fsync', lambda fd: (fsyncs.append(fd), fsync(fd)))
+
+    store = open_store(fsync='always')
+    for _ in range(5):
+        store.create(sample_data)
+    assert len(fsyncs) >= 5
+    store.close()
+
+    store = open_store(fsync='never')
+    fsyncs.clear()
+    for _ in range(5):
+        store.create(sample_data)
+    assert not fsyncs
+    store.close()
+    assert fsyncs
+
+    fsyncs.clear()
+    store = open_store(fsync='interval', fsync_interval=0.05)
+    synced = threading.Event()
+    monkeypatch.setattr(os, 'fsync', lambda fd: (synced.set(), fsync(fd)))
+    store.create(sample_data)
+    assert synced.wait(5)
+    store.close()
+
+    with pytest.raises(ValueError, match='fsync'):
+        open_store(fsync='sometimes')
+
+
+@pytest.mark.skipif(wal.fcntl is None, reason='the store directory is only locked where fcntl exists')
+def test_durable_store_directory_lock(open_store, tmp_path):
+    """
+    Test refusing a second owner of the directory
+    """
+    store = open_store()
+    with pytest.raises(wal.StoreLockedError):
+        wal.lock_directory(str(tmp_path / 'durable'), timeout=0.1)
+    store.close()
+    wal.lock_directory(str(tmp_path / 'durable'), timeout=0.1).close()
+
+
+def test_durable_store_long_numbers(open_store):
+    """
+    Test values the fast JSON paths cannot hold
+    """
+    store = open_store(snapshot_every=0)
+    store.create({'Hostname': 'größe', 'Entrypoint': 2 ** 70, 'Image': '日本'})
+    store.snapshot()
+    store.create({'Hostname': 'small', 'Entrypoint': -2 ** 64, 'Image': 1.5})
+    store = _reopen(store, open_store)
+    assert store.get(1)['Entrypoint'] == 2 ** 70
+    assert store.get(2)['Entrypoint'] == -2 ** 64
+
+
+def test_app_with_durable_store(tmp_path, sample_data):
+    """
+    Test containers surviving an app restart
+    """
+    config = {'TESTING': True, 'STORE_BACKEND': 'durable', 'DURABLE_PATH': str(tmp_path / 'durable'), 'WAL_FSYNC': 'never'}
+    app = create_app(config)
+    client = app.test_client()
+    assert client.post('/orchestrator/containers', json=sample_data).status_code == 201
+    assert client.put('/orchestrator/containers/1', json={'Image': 'nginx'}).status_code == 200
+    listing = client.get('/orchestrator/containers')
+    app.extensions['btf_store'].close()
+
+    client = create_app(config).test_client()
+    restarted = client.get('/orchestrator/containers')
+    assert restarted.json == listing.json
+    assert restarted.headers['ETag'] == listing.headers['ETag']
+    assert client.post('/orchestrator/containers', json=sample_data).json['id'] == 2
@@ -43,6 +43,9 @@ Test Cases:
 
 10. **test_get_container_response_headers**:
    - Confirms the response headers include proper metadata such as `Content-Type`.
+
+11. **test_get_container_not_modified**:
+   - Verifies that `If-None-Match` with the container's `ETag` returns an empty `304 Not Modified` until the container is updated, and that a deleted container is reported as `404`.
 """
 
 import pytest
@@ -176,3 +179,30 @@ def test_get_container_response_headers(test_client, sample_data):
     assert response.status_code in [200, 400]  # Depends on initial state
     assert 'Content-Type' in response.headers
     assert response.headers['Content-Type'] == 'application/json'
+
+
+def test_get_container_not_modified(test_client, sample_data):
+    """
+    Test conditional GET of a single container
+    """
+    etag = test_client.post('/orchestrator/containers', json=sample_data).headers['ETag']
+    test_client.post('/orchestrator/containers', json=sample_data)
+
+    response = test_client.get('/orchestrator/containers/1', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == etag
+    assert test_client.get('/orchestrator/containers/1', headers={'If-None-Match': '*'}).status_code == 304
+
+    # Writes to other containers do not invalidate it
+    test_client.put('/orchestrator/containers/2', json={'Image': 'nginx'})
+    assert test_client.get('/orchestrator/containers/1', headers={'If-None-Match': etag}).status_code == 304
+
+    test_client.put('/orchestrator/containers/1', json={'Image': 'nginx'})
+    response = test_client.get('/orchestrator/containers/1', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.json['Image'] == 'nginx'
+    assert response.headers['ETag'] != etag
+
+    test_client.delete('/orchestrator/containers/1')
+    assert test_client.get('/orchestrator/containers/1', headers={'If-None-Match': '*'}).status_code == 404
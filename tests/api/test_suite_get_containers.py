@@ -30,8 +30,6 @@ Test Cases:
    - **Expected Outcome**:
      - The response contains exactly one container.
      - The returned container matches one of the containers previously added to the database.
-   - **Notes**:
-     - Marked as `xfail` because query string support is not implemented in the API.
 
 7. **test_concurrent_get_all_containers_concurrent**:
    - Ensures the `GET /orchestrator/containers` endpoint handles multiple concurrent requests gracefully.
@@ -39,7 +37,7 @@ Test Cases:
    - **Expected Outcome**:
      - All responses contain the same consistent data, including all containers added to the database.
    - **Notes**:
-     - Marked as `xfail` because the Flask client does not support true concurrent requests.
+     - Marked as `xfail` because the Flask client does not support true concurrent requests (passes in the ASGI mode).
 8. **test_get_all_containers_response_headers**:
    - Confirms the response headers include proper metadata such as `Content-Type`.
 
@@ -47,6 +45,30 @@ Additional. playing with  query string #TODO
 9. **test_get_all_containers_with_pagination**:
    - Validates that the endpoint handles pagination parameters (`limit`, `offset`) correctly, returning the appropriate subset of containers.
 
+10. **test_get_all_containers_with_offset**:
+   - Validates that `offset` skips containers and that a short last page carries no next-page headers.
+
+11. **test_get_all_containers_with_cursor**:
+   - Walks the whole list through the `Link`/`X-Next-Cursor` headers and verifies every container is returned exactly once.
+
+12. **test_get_all_containers_invalid_pagination**:
+   - Verifies that malformed `limit`, `offset` and `cursor` values return a 400 error.
+
+13. **test_get_all_containers_huge_pagination**:
+   - Verifies that `limit` and `offset` values past 64 bits return a page (everything, or nothing) instead of a server error.
+
+14. **test_get_all_containers_filter_by_image**:
+   - Verifies that `?Image=<value>` returns only matching containers and follows updates and deletions.
+
+15. **test_get_all_containers_filter_by_hostname_and_image**:
+   - Verifies that `Hostname` and `Image` filters combine, paginate, and return an empty list when nothing matches.
+
+16. **test_get_all_containers_not_modified**:
+   - Verifies that listings carry the collection `ETag`, that `If-None-Match` with it returns an empty `304 Not Modified`, and that any create, update or delete changes it.
+
+17. **test_get_all_containers_tags_survive_restarts**:
+   - Verifies that a new store with the same number of writes gets new listing and container ETags, so tags cached before a restart do not match, and that listings vary on `Accept`.
+
 ---
 Objective:
 - Validate the `GET /orchestrator/containers` endpoint's functionality, structure, and error handling across different scenarios.
@@ -55,6 +77,7 @@ Usage:
 - Run this test suite with pytest to ensure the `GET /orchestrator/containers` endpoint behaves as expected.
 """
 import concurrent.futures
+import os
 import pytest
 
 
@@ -154,7 +177,6 @@ def test_get_all_containers_varied_data(test_client):
     assert created_2 in containers
 
 
-@pytest.mark.xfail(reason="Known bug: [Query strings aren't implemented]", strict=True)
 def test_get_all_containers_multiple_entries_with_query(test_client, sample_data):
     """
     Test getting filtered containers list. One container should return
@@ -176,7 +198,8 @@ def test_get_all_containers_multiple_entries_with_query(test_client, sample_data
     assert len(containers) == 1
     assert container_1 in containers
 
-@pytest.mark.xfail(reason="Known bug: [Flask client doesn't support concurrent requests]", strict=True)
+# The ASGI mode (BTF_SERVER_MODE=asgi) uses a werkzeug client that handles concurrent requests
+@pytest.mark.xfail(os.environ.get('BTF_SERVER_MODE', 'wsgi') != 'asgi', reason="Known bug: [Flask client doesn't support concurrent requests]", strict=True)
 def test_concurrent_get_all_containers_concurrent(test_client, fetch_containers, sample_data):
     """
     Test the GET /orchestrator/containers endpoint under concurrent requests
@@ -218,7 +241,6 @@ def test_get_all_containers_response_headers(test_client):
     assert response.headers['Content-Type'] == 'application/json'
 
 
-@pytest.mark.xfail(reason="Known bug: [Query strings aren't implemented]", strict=True)
 def test_get_all_containers_with_pagination(test_client, sample_data):
     """
     Test getting containers with pagination parameters
@@ -240,8 +262,93 @@ def test_get_all_containers_with_pagination(test_client, sample_data):
     for i in range(5):
         assert containers[i]['Hostname'] == f'container-{i}'
 
+    # Verify the next page is announced
+    assert 'X-Next-Cursor' in response.headers
+    assert 'rel="next"' in response.headers['Link']
+
+
+def test_get_all_containers_with_offset(test_client, sample_data):
+    """
+    Test skipping containers with the offset parameter
+    """
+    for i in range(10):
+        container_data = sample_data.copy()
+        container_data['Hostname'] = f'container-{i}'
+        response = test_client.post('/orchestrator/containers', json=container_data)
+        assert response.status_code == 201
+
+    response = test_client.get('/orchestrator/containers?limit=5&offset=7')
+    assert response.status_code == 200
+    assert [container['Hostname'] for container in response.json] == ['container-7', 'container-8', 'container-9']
+
+    # The last page has no next page
+    assert 'X-Next-Cursor' not in response.headers
+    assert 'Link' not in response.headers
+
+
+def test_get_all_containers_with_cursor(test_client, sample_data):
+    """
+    Test walking all containers page by page with the opaque cursor
+    """
+    for i in range(7):
+        container_data = sample_data.copy()
+        container_data['Hostname'] = f'container-{i}'
+        response = test_client.post('/orchestrator/containers', json=container_data)
+        assert response.status_code == 201
+
+    # Deleted containers must not break the cursor
+    response = test_client.delete('/orchestrator/containers/4')
+    assert response.status_code == 200
+
+    hostnames = []
+    url = '/orchestrator/containers?limit=2'
+    while url:
+        response = test_client.get(url)
+        assert response.status_code == 200
+        hostnames.extend(container['Hostname'] for container in response.json)
+        link = response.headers.get('Link')
+        url = link[link.index('/orchestrator'):link.index('>')] if link else None
+        if link:
+            assert response.headers['X-Next-Cursor'] in link
+
+    assert hostnames == [f'container-{i}' for i in range(7) if i != 3]
+
+
+@pytest.mark.parametrize("query", ['limit=-1', 'limit=abc', 'offset=-5', 'count=x', 'cursor=not-a-cursor'])
+def test_get_all_containers_invalid_pagination(test_client, sample_data, query):
+    """
+    Test that malformed pagination parameters are rejected
+    """
+    response = test_client.post('/orchestrator/containers', json=sample_data)
+    assert response.status_code == 201
+
+    response = test_client.get(f'/orchestrator/containers?{query}')
+    assert response.status_code == 400
+    assert 'error' in response.json
+
+
+@pytest.mark.parametrize("query, expected", [
+    ('limit=9223372036854775807', 3),
+    ('limit=99999999999999999999999', 3),
+    ('offset=9223372036854775807', 0),
+    ('offset=99999999999999999999999', 0),
+    ('limit=99999999999999999999999&offset=99999999999999999999999', 0),
+])
+def test_get_all_containers_huge_pagination(test_client, sample_data, query, expected):
+    """
+    Test that valid but huge pagination parameters do not crash the listing
+    """
+    for _ in range(3):
+        response = test_client.post('/orchestrator/containers', json=sample_data)
+        assert response.status_code == 201
 
-@pytest.mark.xfail(reason="Known bug: [Query strings aren't implemented]", strict=True)
+    response = test_client.get(f'/orchestrator/containers?{query}')
+    assert response.status_code == 200
+    assert len(response.json) == expected
+    assert 'X-Next-Cursor' not in response.headers
+
+
+@pytest.mark.xfail(reason="Known bug: [An empty store answers 400, and ?name= is not a filter (only Hostname and Image are)]", strict=True)
 def test_get_all_containers_empty_with_query(test_client):
     """
     Test fetching containers with query parameters that result in no matches
@@ -253,3 +360,112 @@ def test_get_all_containers_empty_with_query(test_client):
 
     # Verify the response is an empty list
     assert containers == []
+
+
+def test_get_all_containers_filter_by_image(test_client):
+    """
+    Test filtering containers by Image while containers change
+    """
+    for hostname, image in [('web-1', 'nginx'), ('db-1', 'postgres'), ('web-2', 'nginx'), ('app-1', 'ubuntu')]:
+        response = test_client.post('/orchestrator/containers', json={'Hostname': hostname, 'Image': image})
+        assert response.status_code == 201
+
+    response = test_client.get('/orchestrator/containers?Image=nginx')
+    assert response.status_code == 200
+    assert [container['Hostname'] for container in response.json] == ['web-1', 'web-2']
+
+    # Moving a container to another image and deleting one must update the index
+    assert test_client.put('/orchestrator/containers/4', json={'Image': 'nginx'}).status_code == 200
+    assert test_client.delete('/orchestrator/containers/1').status_code == 200
+
+    response = test_client.get('/orchestrator/containers?Image=nginx')
+    assert response.status_code == 200
+    assert [container['Hostname'] for container in response.json] == ['web-2', 'app-1']
+
+    response = test_client.get('/orchestrator/containers?Image=ubuntu')
+    assert response.status_code == 200
+    assert response.json == []
+
+
+def test_get_all_containers_filter_by_hostname_and_image(test_client):
+    """
+    Test combining Hostname and Image filters with pagination
+    """
+    for image in ['nginx', 'nginx', 'alpine']:
+        response = test_client.post('/orchestrator/containers', json={'Hostname': 'shared-host', 'Image': image})
+        assert response.status_code == 201
+
+    response = test_client.get('/orchestrator/containers?Hostname=shared-host&Image=nginx&limit=1')
+    assert response.status_code == 200
+    assert [container['id'] for container in response.json] == [1]
+    assert 'X-Next-Cursor' in response.headers
+
+    cursor = response.headers['X-Next-Cursor']
+    response = test_client.get(f'/orchestrator/containers?Hostname=shared-host&Image=nginx&limit=1&cursor={cursor}')
+    assert response.status_code == 200
+    assert [container['id'] for container in response.json] == [2]
+    assert 'X-Next-Cursor' not in response.headers
+
+    response = test_client.get('/orchestrator/containers?Hostname=other-host&Image=nginx')
+    assert response.status_code == 200
+    assert response.json == []
+
+
+def test_get_all_containers_not_modified(test_client, sample_data):
+    """
+    Test conditional GET of the container list
+    """
+    test_client.post('/orchestrator/containers', json=sample_data)
+    test_client.post('/orchestrator/containers', json=sample_data)
+
+    response = test_client.get('/orchestrator/containers')
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    # Pages, filters and streams of the same collection share the ETag
+    assert test_client.get('/orchestrator/containers?limit=1').headers['ETag'] == etag
+    assert test_client.get('/orchestrator/containers?stream=ndjson').headers['ETag'] == etag
+
+    response = test_client.get('/orchestrator/containers', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == etag
+    assert test_client.get('/orchestrator/containers?Image=ubuntu', headers={'If-None-Match': f'W/{etag}'}).status_code == 304
+    assert test_client.get('/orchestrator/containers', headers={'If-None-Match': '"containers-0"'}).status_code == 200
+    # Invalid arguments are still reported
+    assert test_client.get('/orchestrator/containers?limit=-1', headers={'If-None-Match': etag}).status_code == 400
+
+    seen = {etag}
+    for method, path, body in [
+        ('post', '/orchestrator/containers', sample_data),
+        ('put', '/orchestrator/containers/1', {'Image': 'nginx'}),
+        ('delete', '/orchestrator/containers/3', None),
+    ]:
+        assert getattr(test_client, method)(path, json=body).status_code in (200, 201)
+        response = test_client.get('/orchestrator/containers', headers={'If-None-Match': ', '.join(seen)})
+        assert response.status_code == 200
+        assert response.headers['ETag'] not in seen
+        seen.add(response.headers['ETag'])
+
+
+def test_get_all_containers_tags_survive_restarts(make_app, sample_data):
+    """
+    Test conditional GETs sent to a restarted in-memory server
+    """
+    before = make_app().test_client()
+    before.post('/orchestrator/containers', json=sample_data)
+    listing_tag = before.get('/orchestrator/containers').headers['ETag']
+    container_tag = before.get('/orchestrator/containers/1').headers['ETag']
+
+    # Same writes, so the same collection version and container version, different content
+    after = make_app().test_client()
+    after.post('/orchestrator/containers', json=dict(sample_data, Hostname='other'))
+    response = after.get('/orchestrator/containers', headers={'If-None-Match': listing_tag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != listing_tag
+    assert after.get('/orchestrator/containers/1', headers={'If-None-Match': container_tag}).status_code == 200
+
+    # JSON and NDJSON listings share the ETag
+    assert 'Accept' in response.headers['Vary']
+    response = after.get('/orchestrator/containers', headers={'If-None-Match': response.headers['ETag']})
+    assert response.status_code == 304
+    assert 'Accept' in response.headers['Vary']
@@ -0,0 +1,88 @@
+"""
+Test Suite for the liveness and readiness probes `GET /healthz` and `GET /readyz`.
+
+Test Cases:
+-------------
+1. **test_healthz**:
+    - Verifies that `/healthz` answers `200` with an empty store and without a token, is not cacheable and never touches the store.
+
+2. **test_readyz**:
+    - Verifies that `/readyz` answers `200` for every storage backend, without a token and whether or not the store holds containers.
+
+3. **test_readyz_store_unreachable**:
+    - Verifies that `/readyz` answers `503` while the store raises, keeps `/healthz` at `200` and recovers once the store is back.
+
+4. **test_probes_do_constant_work**:
+    - Verifies that neither probe lists or counts containers nor goes through `jsonify`.
+"""
+import sqlite3
+
+import pytest
+
+from tools.api import create_app
+
+
+def test_healthz(test_client, db, monkeypatch):
+    """
+    Test the liveness probe
+    """
+    assert test_client.get('/orchestrator/containers').status_code == 400  # what probes had to poll before
+    response = test_client.get('/healthz')
+    assert response.status_code == 200
+    assert response.json == {'status': 'ok'}
+    assert response.headers['Content-Type'] == 'application/json'
+    assert response.headers['Cache-Control'] == 'no-store'
+
+    monkeypatch.setattr(db, 'collection_version', lambda: 1 / 0)
+    assert test_client.get('/healthz').status_code == 200
+    assert test_client.head('/healthz').status_code == 200
+
+
+@pytest.mark.parametrize('backend', ['dict', 'locked', 'sqlite'])
+def test_readyz(tmp_path, sample_data, backend):
+    """
+    Test the readiness probe on every backend
+    """
+    config = {'TESTING': True, 'STORE_BACKEND': backend}
+    if backend == 'sqlite':
+        config['SQLITE_PATH'] = str(tmp_path / 'containers.db')
+    client = create_app(config).test_client()
+    for _ in range(2):
+        response = client.get('/readyz')
+        assert response.status_code == 200
+        assert response.json == {'status': 'ready', 'store': 'reachable'}
+        assert response.headers['Cache-Control'] == 'no-store'
+        assert client.post('/orchestrator/containers', json=sample_data).status_code == 201
+
+
+def test_readyz_store_unreachable(test_client, db, monkeypatch):
+    """
+    Test the readiness probe while the store fails
+    """
+    def unreachable():
+        raise sqlite3.OperationalError('unable to open database file')
+
+    monkeypatch.setattr(db, 'collection_version', unreachable)
+    response = test_client.get('/readyz')
+    assert response.status_code == 503
+    assert response.json == {'status': 'unavailable', 'store': 'unreachable'}
+    assert test_client.get('/healthz').status_code == 200
+
+    monkeypatch.undo()
+    assert test_client.get('/readyz').status_code == 200
+
+
+def test_probes_do_constant_work(app, db, test_client, monkeypatch):
+    """
+    Test that the probes stay O(1) with a populated store
+    """
+    db.create_many([{'Hostname': f'host-{i}', 'Entrypoint': '', 'Image': 'ubuntu'} for i in range(1000)])
+
+    def forbidden(*args, **kwargs):
+        raise AssertionError('a probe did O(n) or serialization work')
+
+    for name in ['values', 'page', 'stream', '__len__']:
+        monkeypatch.setattr(type(db), name, forbidden)
+    monkeypatch.setattr(app.json, 'response', forbidden)  # jsonify
+    for path in ['/healthz', '/readyz']:
+        assert test_client.get(path).status_code == 200
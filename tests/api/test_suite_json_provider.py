@@ -0,0 +1,94 @@
+"""
+Test Suite for the optional orjson JSON provider (`tools/json_provider.py`), chosen with `JSON_PROVIDER`.
+
+Test Cases:
+-------------
+1. **test_orjson_provider_matches_stdlib_output**:
+    - Verifies that `jsonify` writes the same bytes with both providers (`ensure_ascii` off), compact and pretty-printed,
+      for records, dates, decimals, non-string keys and integers beyond 64 bits.
+
+2. **test_orjson_provider_loads_like_stdlib**:
+    - Verifies that decoded documents, including long integers and `NaN`, equal the stdlib's and that invalid JSON raises the same `ValueError`.
+
+3. **test_json_provider_from_config**:
+    - Verifies that `JSON_PROVIDER` selects the provider, that unknown names are rejected and that `orjson` falls back to the stdlib when it is not installed.
+
+4. **test_api_with_orjson_provider**:
+    - Verifies create, read, listing and error responses of an app using the orjson provider.
+"""
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+from flask import jsonify
+from flask.json.provider import DefaultJSONProvider
+
+from tools import json_provider
+
+pytest.importorskip('orjson')
+
+DOCUMENTS = [
+    [{'id': 1, 'Hostname': 'web', 'Entrypoint': '', 'Image': 'ubuntu'}, {'id': 2, 'Hostname': 'é', 'Entrypoint': None, 'Image': ['a', 1.5]}],
+    {'when': datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc), 'price': Decimal('1.10'), 'ids': {1: True, 2: False}},
+    {'big': 2 ** 70, 'nested': {'b': [], 'a': {}}},
+]
+
+
+@pytest.mark.parametrize('debug', [False, True], ids=['compact', 'pretty'])
+def test_orjson_provider_matches_stdlib_output(make_app, debug):
+    """
+    Test jsonify output of both providers
+    """
+    stdlib_app = make_app({'DEBUG': debug, 'JSON_PROVIDER': 'stdlib'})
+    stdlib_app.json.ensure_ascii = False
+    orjson_app = make_app({'DEBUG': debug, 'JSON_PROVIDER': 'orjson'})
+    for document in DOCUMENTS:
+        with stdlib_app.app_context():
+            expected = jsonify(document).data
+        with orjson_app.app_context():
+            assert jsonify(document).data == expected
+
+
+def test_orjson_provider_loads_like_stdlib(make_app):
+    """
+    Test decoding with orjson
+    """
+    provider = make_app({'JSON_PROVIDER': 'orjson'}).json
+    stdlib = DefaultJSONProvider(make_app())
+    for text in ['{"a": [1, 2.5, "\\u00e9", null, true]}', '[123456789012345678901234567890, 1e400]', '{"x": NaN}', '"é"']:
+        assert repr(provider.loads(text)) == repr(stdlib.loads(text))
+        assert repr(provider.loads(text.encode())) == repr(stdlib.loads(text.encode()))
+    for text in ['{"a": ', '', '[1,]']:
+        with pytest.raises(ValueError):
+            provider.loads(text)
+
+
+def test_json_provider_from_config(make_app, monkeypatch):
+    """
+    Test choosing the provider through the app config
+    """
+    assert type(make_app({'JSON_PROVIDER': 'stdlib'}).json) is DefaultJSONProvider  # pylint: disable=unidiomatic-typecheck
+    assert isinstance(make_app({'JSON_PROVIDER': 'orjson'}).json, json_provider.OrjsonProvider)
+    with pytest.raises(ValueError):
+        make_app({'JSON_PROVIDER': 'simplejson'})
+
+    monkeypatch.setattr(json_provider, 'orjson', None)
+    assert type(make_app({'JSON_PROVIDER': 'orjson'}).json) is DefaultJSONProvider  # pylint: disable=unidiomatic-typecheck
+
+
+def test_api_with_orjson_provider(make_app, sample_data):
+    """
+    Test the API end to end with orjson
+    """
+    client = make_app({'JSON_PROVIDER': 'orjson'}).test_client()
+    response = client.post('/orchestrator/containers', json=sample_data)
+    assert response.status_code == 201
+    assert client.get('/orchestrator/containers/1').json == {'id': 1, **sample_data}
+    assert client.get('/orchestrator/containers').json == [{'id': 1, **sample_data}]
+    assert client.get('/orchestrator/containers?stream=ndjson').data.decode().splitlines() == [response.data.decode().strip()]
+
+    response = client.post('/orchestrator/containers', data='{"Hostname": ', content_type='application/json')
+    assert response.status_code == 400
+    response = client.put('/orchestrator/containers:batch', json=[{'id': 2 ** 70, 'Image': 'nginx'}])
+    assert response.status_code == 207
+    assert response.json['results'][0] == {'id': 2 ** 70, 'status': 404, 'error': 'container not found'}
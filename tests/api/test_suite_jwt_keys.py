@@ -0,0 +1,176 @@
+"""
+Test Suite for asymmetric JWT signing (`JWT_ALGORITHM` 'RS256', 'EdDSA', ..., tools/jwt_keys.py) and `GET /.well-known/jwks.json`.
+
+Test Cases:
+-------------
+1. **test_tokens_verify_offline**:
+    - Verifies that login tokens carry a `kid` header and verify with nothing but the published JWKS, for RS256, EdDSA and ES256.
+
+2. **test_jwks_not_served_for_shared_secret**:
+    - Verifies that `/.well-known/jwks.json` answers `404` with HS256, whose secret must never be published.
+
+3. **test_key_rotation**:
+    - Verifies that after a rotation new tokens use the new key while older ones still verify, until their key is retired.
+
+4. **test_configured_keys**:
+    - Verifies that keys from `JWT_KEYS` and `JWT_KEYS_DIR` are shared by every app, that the newest private key signs and that public keys only verify.
+
+5. **test_foreign_tokens_rejected**:
+    - Verifies that tokens without a `kid`, with an unknown `kid`, signed by another key or with HS256 get `401`.
+
+6. **test_keys_parsed_once**:
+    - Verifies that no PEM key is parsed while handling logins and protected requests.
+"""
+import json
+
+import jwt
+import pytest
+from jwt.algorithms import get_default_algorithms
+
+from tools.jwt_keys import KeySet, generate_private_key
+
+pytest.importorskip('cryptography')
+
+from cryptography.hazmat.primitives import serialization  # pylint: disable=wrong-import-position,wrong-import-order
+
+
+def _pem(private_key, public=False):
+    if public:
+        return private_key.public_key().public_bytes(serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo).decode()
+    return private_key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()).decode()
+
+
+def _login(client):
+    response = client.post('/auth/login', json={'username': 'admin', 'password': 'adminpassword'})
+    assert response.status_code == 200
+    return response.json['token']
+
+
+def _get(client, token, path='/admin/protected'):
+    return client.get(path, headers={'Authorization': f'Bearer {token}'})
+
+
+@pytest.mark.parametrize('algorithm', ['RS256', 'EdDSA', 'ES256'])
+def test_tokens_verify_offline(make_app, algorithm):
+    """
+    Test verifying tokens with the published public keys only
+    """
+    client = make_app({'JWT_ALGORITHM': algorithm}).test_client()
+    token = _login(client)
+    header = jwt.get_unverified_header(token)
+    assert header['alg'] == algorithm
+    assert _get(client, token).status_code == 200
+
+    response = client.get('/.well-known/jwks.json')
+    assert response.status_code == 200
+    assert response.headers['Content-Type'] == 'application/jwk-set+json'
+    assert 'max-age' in response.headers['Cache-Control']
+    jwks = jwt.PyJWKSet.from_dict(json.loads(response.data))
+    assert [key.key_id for key in jwks.keys] == [header['kid']]
+    assert 'd' not in response.json['keys'][0]  # no private part
+    payload = jwt.decode(token, jwks[header['kid']].key, algorithms=[algorithm])
+    assert (payload['username'], payload['role']) == ('admin', 'admin')
+
+
+def test_jwks_not_served_for_shared_secret(test_client):
+    """
+    Test that HS256 publishes nothing
+    """
+    response = test_client.get('/.well-known/jwks.json')
+    assert response.status_code == 404
+    assert 'kid' not in jwt.get_unverified_header(_login(test_client))
+
+
+def test_key_rotation(make_app):
+    """
+    Test rotating and retiring signing keys
+    """
+    app = make_app({'JWT_ALGORITHM': 'EdDSA'})
+    client = app.test_client()
+    keys = app.extensions['btf_jwt_keys']
+    old_token = _login(client)
+    old_kid = keys.signing_kid
+    assert _get(client, old_token).status_code == 200
+
+    new_kid = keys.rotate()
+    new_token = _login(client)
+    assert jwt.get_unverified_header(new_token)['kid'] == new_kid != old_kid
+    assert _get(client, old_token).status_code == 200
+    assert _get(client, new_token).status_code == 200
+    assert [key['kid'] for key in client.get('/.well-known/jwks.json').json['keys']] == [old_kid, new_kid]
+
+    with pytest.raises(ValueError):
+        keys.retire(new_kid)
+    keys.retire(old_kid)
+    assert _get(client, old_token).status_code == 401  # even though it was cached
+    assert _get(client, new_token).status_code == 200
+    assert [key['kid'] for key in client.get('/.well-known/jwks.json').json['keys']] == [new_kid]
+
+
+def test_configured_keys(make_app, tmp_path):
+    """
+    Test keys shared by several apps (worker processes)
+    """
+    older, newer, external = (generate_private_key('RS256') for _ in range(3))
+    (tmp_path / '2026-01.pem').write_text(_pem(older))
+    (tmp_path / '2026-07.pem').write_text(_pem(newer))
+    config = {
+        'JWT_ALGORITHM': 'RS256', 'JWT_KEYS_DIR': str(tmp_path),
+        'JWT_KEYS': [{'kid': 'edge-issuer', 'public_key': _pem(external, public=True)}],
+    }
+    first, second = make_app(config).test_client(), make_app(config).test_client()
+    token = _login(first)
+    assert jwt.get_unverified_header(token)['kid'] == '2026-07'
+    assert _get(second, token).status_code == 200
+    assert first.get('/.well-known/jwks.json').data == second.get('/.well-known/jwks.json').data
+
+    # Signed by another issuer whose public key is configured
+    issued_elsewhere = jwt.encode(
+        {'username': 'probe', 'role': 'admin'}, external, algorithm='RS256', headers={'kid': 'edge-issuer'}
+    )
+    assert _get(first, issued_elsewhere).status_code == 200
+
+    with pytest.raises(ValueError):
+        KeySet('RS256', [{'kid': 'mixed-up', 'public_key': _pem(older)}])
+    with pytest.raises(ValueError):
+        KeySet('HS256')
+
+
+def test_foreign_tokens_rejected(make_app, app):
+    """
+    Test tokens the key set cannot vouch for
+    """
+    client = make_app({'JWT_ALGORITHM': 'EdDSA'}).test_client()
+    kid = jwt.get_unverified_header(_login(client))['kid']
+    impostor = generate_private_key('EdDSA')
+    payload = {'username': 'admin', 'role': 'admin'}
+    for token in [
+        jwt.encode(payload, impostor, algorithm='EdDSA'),
+        jwt.encode(payload, impostor, algorithm='EdDSA', headers={'kid': 'unknown'}),
+        jwt.encode(payload, impostor, algorithm='EdDSA', headers={'kid': kid}),
+        jwt.encode(payload, app.config['SECRET_KEY'], algorithm='HS256', headers={'kid': kid}),
+        'not.a.token',
+    ]:
+        response = _get(client, token)
+        assert response.status_code == 401
+        assert response.json == {'error': 'Invalid or expired token'}
+
+
+def test_keys_parsed_once(make_app, monkeypatch):
+    """
+    Test that requests use the parsed key objects
+    """
+    client = make_app({'JWT_ALGORITHM': 'RS256', 'JWT_CACHE_SIZE': 0}).test_client()
+    parsed = []
+    algorithm = type(get_default_algorithms()['RS256'])
+    prepare_key = algorithm.prepare_key
+
+    def counting_prepare_key(self, key):
+        if isinstance(key, (str, bytes)):
+            parsed.append(key)
+        return prepare_key(self, key)
+
+    monkeypatch.setattr(algorithm, 'prepare_key', counting_prepare_key)
+    for _ in range(3):
+        assert _get(client, _login(client)).status_code == 200
+    assert not parsed
@@ -0,0 +1,112 @@
+"""
+Test Suite for the listing cache (`tools/listing_cache.py`) behind `GET /orchestrator/containers`.
+
+Test Cases:
+-------------
+1. **test_cached_listing_matches_jsonify**:
+    - Verifies that cached listings and pages are byte-for-byte what `jsonify` writes without the cache.
+
+2. **test_cached_listing_follows_writes**:
+    - Verifies that single and batch creates, updates and deletes are visible in the next listing and that unchanged containers are not encoded again.
+
+3. **test_cached_listing_follows_direct_store_writes**:
+    - Verifies that writes made on the store itself, bypassing the service, are never hidden by a cached entry.
+
+4. **test_listing_cache_limits**:
+    - Verifies that the fragment count is capped and that `LISTING_CACHE_SIZE=0` or a pretty-printing app disables the cache.
+"""
+import pytest
+
+
+@pytest.fixture(name='uncached_client')
+def fixture_uncached_client(make_app):
+    """Test client of an app without the listing cache"""
+    return make_app({'LISTING_CACHE_SIZE': 0}).test_client()
+
+
+def _seed(client):
+    for i in range(20):
+        response = client.post('/orchestrator/containers', json={'Hostname': f'host-{i}', 'Entrypoint': f'/run {i}', 'Image': 'é' if i % 2 else 'ubuntu'})
+        assert response.status_code == 201
+
+
+def test_cached_listing_matches_jsonify(test_client, uncached_client):
+    """
+    Test that the cache does not change the encoded output
+    """
+    _seed(test_client)
+    _seed(uncached_client)
+    for path in ['/orchestrator/containers', '/orchestrator/containers?limit=5&offset=3', '/orchestrator/containers?Image=ubuntu']:
+        for _ in range(2):  # cold, then from the cache
+            cached = test_client.get(path)
+            uncached = uncached_client.get(path)
+            assert cached.status_code == uncached.status_code == 200
+            assert cached.data == uncached.data
+            assert cached.headers['Content-Type'] == uncached.headers['Content-Type']
+            # Two stores: the same collection version, different epochs
+            assert cached.headers['ETag'].rsplit('-', 1)[1] == uncached.headers['ETag'].rsplit('-', 1)[1]
+
+
+def test_cached_listing_follows_writes(app, test_client, sample_data):
+    """
+    Test invalidation on every write endpoint
+    """
+    cache = app.extensions['btf_containers'].listing_cache
+    _seed(test_client)
+    first = test_client.get('/orchestrator/containers').json
+    assert cache.stats()['fragments'] == 20
+
+    test_client.put('/orchestrator/containers/1', json={'Image': 'nginx'})
+    misses = cache.misses
+    listing = test_client.get('/orchestrator/containers').json
+    assert listing[0]['Image'] == 'nginx'
+    assert listing[1:] == first[1:]
+    assert cache.misses == misses + 1  # only the updated container was encoded
+
+    test_client.post('/orchestrator/containers', json=sample_data)
+    test_client.delete('/orchestrator/containers/2')
+    assert [container['id'] for container in test_client.get('/orchestrator/containers').json] == [1] + list(range(3, 22))
+
+    test_client.post('/orchestrator/containers:batch', json=[sample_data])
+    test_client.put('/orchestrator/containers:batch', json=[{'id': 3, 'Hostname': 'batched'}])
+    test_client.delete('/orchestrator/containers:batch', json=[4])
+    listing = test_client.get('/orchestrator/containers').json
+    assert [container['id'] for container in listing] == [1, 3] + list(range(5, 23))
+    assert listing[1]['Hostname'] == 'batched'
+    assert test_client.get('/orchestrator/containers?limit=2').json == listing[:2]
+
+
+def test_cached_listing_follows_direct_store_writes(test_client, db, sample_data):
+    """
+    Test writes that do not go through the service
+    """
+    _seed(test_client)
+    test_client.get('/orchestrator/containers')
+    test_client.get('/orchestrator/containers?limit=5')
+
+    db.update(1, {'Hostname': 'direct'})
+    db.delete(2)
+    db.create(sample_data)
+    listing = test_client.get('/orchestrator/containers').json
+    assert listing[0]['Hostname'] == 'direct'
+    assert [container['id'] for container in listing] == [1] + list(range(3, 22))
+    assert test_client.get('/orchestrator/containers?limit=5').json == listing[:5]
+
+
+def test_listing_cache_limits(make_app, sample_data):
+    """
+    Test the cache size setting and the pretty-printing bypass
+    """
+    app = make_app({'LISTING_CACHE_SIZE': 5})
+    cache = app.extensions['btf_containers'].listing_cache
+    with app.test_client() as client:
+        _seed(client)
+        assert len(client.get('/orchestrator/containers').json) == 20
+        assert cache.stats()['fragments'] == 5
+
+    for config in [{'LISTING_CACHE_SIZE': 0}, {'DEBUG': True}]:
+        app = make_app({**config})
+        with app.test_client() as client:
+            client.post('/orchestrator/containers', json=sample_data)
+            assert client.get('/orchestrator/containers').json[0]['Hostname'] == sample_data['Hostname']
+        assert app.extensions['btf_containers'].listing_cache.stats()['fragments'] == 0
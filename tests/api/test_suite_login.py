@@ -0,0 +1,182 @@
+"""
+Test Suite for `POST /auth/login` and its accounts (tools/users.py, IssuedTokenCache in tools/token_cache.py).
+
+Test Cases:
+-------------
+1. **test_password_hashing**:
+    - Verifies that hashes are salted PBKDF2 strings carrying their iteration count, and that only the right password verifies.
+
+2. **test_login_with_configured_users**:
+    - Verifies that accounts from `USERS`, given a plain password or a hash, log in with their role and that wrong credentials get `401`.
+
+3. **test_login_with_custom_user_store**:
+    - Verifies that a `UserStore` set as `USER_STORE` replaces `USERS`.
+
+4. **test_user_lookup_takes_no_lock**:
+    - Verifies that logins go on while an account change holds the store's lock, and see the change once it is done.
+
+5. **test_unknown_user_costs_a_hash**:
+    - Verifies that an unknown username is checked against a dummy hash as costly as the stored ones.
+
+6. **test_login_token_reuse**:
+    - Verifies that with `LOGIN_TOKEN_REUSE` a repeated login gets the same token without hashing, and a new one after a wrong password, a password change, a key change or the window.
+
+7. **test_login_token_reuse_disabled_by_default**:
+    - Verifies that every login verifies the password when `LOGIN_TOKEN_REUSE` is 0.
+"""
+import threading
+import time
+
+import jwt
+import pytest
+
+from tools import users as users_module
+from tools.users import MemoryUserStore, UserStore, hash_iterations, hash_password, verify_password
+
+
+def _login(client, username, password):
+    return client.post('/auth/login', json={'username': username, 'password': password})
+
+
+@pytest.fixture(name='count_hashes')
+def fixture_count_hashes(monkeypatch):
+    """Count the password hashes computed"""
+    calls = []
+    derive = users_module._derive  # pylint: disable=protected-access
+
+    def counting_derive(password, salt, iterations):
+        calls.append(iterations)
+        return derive(password, salt, iterations)
+
+    monkeypatch.setattr(users_module, '_derive', counting_derive)
+    return calls
+
+
+def test_password_hashing():
+    """
+    Test the password hash format and verification
+    """
+    encoded = hash_password('s3cret', iterations=2000)
+    algorithm, iterations, _, _ = encoded.split('$')
+    assert (algorithm, iterations) == ('pbkdf2_sha256', '2000')
+    assert hash_iterations(encoded) == 2000
+    assert hash_password('s3cret', iterations=2000) != encoded  # salted
+    assert verify_password('s3cret', encoded)
+    for password in ['S3cret', '', None, 7]:
+        assert not verify_password(password, encoded)
+    for malformed in ['', 'pbkdf2_sha256$2000', 'md5$1$c2FsdA==$aGFzaA==', None]:
+        assert not verify_password('s3cret', malformed)
+
+
+def test_login_with_configured_users(make_app, app, test_client):
+    """
+    Test logging in against the USERS setting
+    """
+    client = make_app({'PASSWORD_HASH_ITERATIONS': 1000, 'USERS': [
+        {'username': 'ops', 'role': 'admin', 'password': 'plain'},
+        {'username': 'probe', 'role': 'user', 'user_id': 40, 'password_hash': hash_password('hashed', 1500)},
+    ]}).test_client()
+    for username, password, role, user_id in [('ops', 'plain', 'admin', 1), ('probe', 'hashed', 'user', 40)]:
+        response = _login(client, username, password)
+        assert response.status_code == 200
+        payload = jwt.decode(response.json['token'], 'your_secret_key', algorithms=['HS256'])
+        assert (payload['username'], payload['role'], payload['user_id']) == (username, role, user_id)
+        assert payload['exp'] - time.time() == pytest.approx(30 * 60, abs=5)
+    assert _login(client, 'ops', 'hashed').status_code == 401
+    assert _login(client, 'testuser', 'testpassword').status_code == 401  # the mock accounts are replaced
+    assert _login(client, None, None).json == {'error': 'Invalid credentials'}
+
+    # The mock accounts by default
+    assert _login(test_client, 'admin', 'adminpassword').status_code == 200
+    assert app.extensions['btf_users'].get('admin')['role'] == 'admin'
+
+
+def test_login_with_custom_user_store(make_app):
+    """
+    Test plugging in another account backend
+    """
+    class DirectoryUsers(UserStore):
+        """Accounts of an external directory"""
+        dummy_iterations = 1000
+
+        def get(self, username):
+            if username == 'ldap-user':
+                return {'user_id': 9, 'username': username, 'role': 'user', 'password_hash': hash_password('from-ldap', 1000)}
+            return None
+
+    client = make_app({'USER_STORE': DirectoryUsers()}).test_client()
+    assert _login(client, 'ldap-user', 'from-ldap').status_code == 200
+    assert _login(client, 'ldap-user', 'wrong').status_code == 401
+    assert _login(client, 'testuser', 'testpassword').status_code == 401
+
+
+def test_user_lookup_takes_no_lock(app):
+    """
+    Test logins while an account is being changed
+    """
+    store = app.extensions['btf_users']
+    test_client = app.test_client()
+    with store._lock:  # pylint: disable=protected-access
+        result = []
+        thread = threading.Thread(target=lambda: result.append(_login(test_client, 'testuser', 'testpassword').status_code))
+        thread.start()
+        thread.join(10)
+        assert result == [200]
+    store.add('testuser', password_hash=hash_password('changed', 1000))
+    assert _login(test_client, 'testuser', 'testpassword').status_code == 401
+    assert _login(test_client, 'testuser', 'changed').status_code == 200
+    store.remove('testuser')
+    assert _login(test_client, 'testuser', 'changed').status_code == 401
+
+
+def test_unknown_user_costs_a_hash(count_hashes):
+    """
+    Test that unknown usernames are not answered faster
+    """
+    store = MemoryUserStore([{'username': 'ops', 'password': 'pw'}], iterations=1200)
+    count_hashes.clear()
+    assert store.authenticate('nobody', 'pw') is None
+    assert store.authenticate('ops', 'wrong') is None
+    assert count_hashes[-1] == count_hashes[-2] == 1200
+
+
+def test_login_token_reuse(make_app, count_hashes, monkeypatch):
+    """
+    Test handing out a recent token again
+    """
+    app = make_app({'LOGIN_TOKEN_REUSE': 60})
+    client = app.test_client()
+    token = _login(client, 'testuser', 'testpassword').json['token']
+    count_hashes.clear()
+    assert _login(client, 'testuser', 'testpassword').json['token'] == token
+    assert not count_hashes  # neither hashed nor signed again
+    assert client.get('/protected', headers={'Authorization': f'Bearer {token}'}).status_code == 200
+
+    assert _login(client, 'testuser', 'wrong').status_code == 401
+    assert _login(client, 'admin', 'testpassword').status_code == 401
+    assert _login(client, 'admin', 'adminpassword').json['token'] != token
+
+    now = time.time()
+    monkeypatch.setattr(time, 'time', lambda: now + 61)
+    renewed = _login(client, 'testuser', 'testpassword').json['token']
+    assert renewed != token
+    assert _login(client, 'testuser', 'testpassword').json['token'] == renewed
+
+    app.config['SECRET_KEY'] = 'rotated'
+    rotated = _login(client, 'testuser', 'testpassword').json['token']
+    assert jwt.decode(rotated, 'rotated', algorithms=['HS256'])['username'] == 'testuser'
+
+    app.extensions['btf_users'].add('testuser', password_hash=hash_password('changed', 1000), user_id=1)
+    assert _login(client, 'testuser', 'testpassword').status_code == 401
+    count_hashes.clear()
+    assert _login(client, 'testuser', 'changed').status_code == 200
+    assert count_hashes  # checked against the new hash, not reused
+
+
+def test_login_token_reuse_disabled_by_default(test_client, count_hashes):
+    """
+    Test that every login checks the password by default
+    """
+    for _ in range(3):
+        assert _login(test_client, 'testuser', 'testpassword').status_code == 200
+    assert len(count_hashes) == 3
@@ -0,0 +1,159 @@
+"""
+Test Suite for the Prometheus endpoint `GET /metrics` (`tools/metrics.py`).
+
+Test Cases:
+-------------
+1. **test_request_counters_by_route_and_status**:
+    - Verifies that requests are counted per method, URL rule (not raw path) and status, including unmatched paths and `413`/`405` answered by error handlers.
+
+2. **test_latency_histogram**:
+    - Verifies that the histogram buckets are cumulative and end with `+Inf`, and that `_count` matches the request counter and `_sum` is positive.
+
+3. **test_gauges**:
+    - Verifies the in-flight gauge (the scrape itself) and that the container gauge follows creates and deletes.
+
+4. **test_auth_failures**:
+    - Verifies that bad credentials, missing, invalid and expired tokens and forbidden roles are counted by reason.
+
+5. **test_metrics_disabled**:
+    - Verifies that `METRICS_ENABLED=False` answers `/metrics` with `404` and registers no hooks.
+
+6. **test_failing_route_leaves_flight**:
+    - Verifies that a route raising an unhandled exception is no longer counted in flight, whether the exception propagates (testing) or becomes a `500`.
+"""
+import re
+from datetime import datetime, timedelta
+
+import jwt
+import pytest
+
+
+CONTAINER_RULE = '/orchestrator/containers/<int:container_id>'
+
+
+def _scrape(client):
+    """Parse /metrics into {'name{labels}': value}"""
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.headers['Content-Type'] == 'text/plain; version=0.0.4; charset=utf-8'
+    samples = {}
+    for line in response.get_data(as_text=True).splitlines():
+        if line and not line.startswith('#'):
+            name, value = line.rsplit(' ', 1)
+            samples[name] = float(value)
+    return samples
+
+
+def test_request_counters_by_route_and_status(app, sample_data):
+    """
+    Test the request counter labels
+    """
+    client = app.test_client()  # no `with`: every request is torn down (and recorded) right away
+    client.post('/orchestrator/containers', json=sample_data)
+    for container_id in [1, 1, 2]:
+        client.get(f'/orchestrator/containers/{container_id}')
+    client.get('/no/such/path')
+    client.patch('/orchestrator/containers/1', json={})
+    client.post('/orchestrator/containers', data='x' * (9 * 1024 * 1024), content_type='application/json')
+
+    samples = _scrape(client)
+    assert samples['btf_http_requests_total{method="POST",route="/orchestrator/containers",status="201"}'] == 1
+    assert samples['btf_http_requests_total{method="POST",route="/orchestrator/containers",status="413"}'] == 1
+    assert samples[f'btf_http_requests_total{{method="GET",route="{CONTAINER_RULE}",status="200"}}'] == 2
+    assert samples[f'btf_http_requests_total{{method="GET",route="{CONTAINER_RULE}",status="404"}}'] == 1
+    assert samples['btf_http_requests_total{method="GET",route="<unmatched>",status="404"}'] == 1
+    assert samples['btf_http_requests_total{method="PATCH",route="<unmatched>",status="405"}'] == 1
+    assert not any('/orchestrator/containers/1' in name for name in samples)
+
+
+def test_latency_histogram(app, sample_data):
+    """
+    Test histogram consistency
+    """
+    client = app.test_client()
+    for _ in range(5):
+        client.post('/orchestrator/containers', json=sample_data)
+    client.get('/orchestrator/containers')
+
+    samples = _scrape(client)
+    labels = 'method="POST",route="/orchestrator/containers"'
+    buckets = [(name, value) for name, value in samples.items() if name.startswith(f'btf_http_request_duration_seconds_bucket{{{labels},')]
+    counts = [value for _, value in buckets]
+    assert counts == sorted(counts)
+    assert buckets[-1][0].endswith('le="+Inf"}')
+    assert counts[-1] == samples[f'btf_http_request_duration_seconds_count{{{labels}}}'] == 5
+    assert samples[f'btf_http_request_duration_seconds_sum{{{labels}}}'] > 0
+    assert samples['btf_http_request_duration_seconds_count{method="GET",route="/orchestrator/containers"}'] == 1
+
+
+def test_gauges(app, sample_data):
+    """
+    Test the in-flight and container gauges
+    """
+    client = app.test_client()
+    samples = _scrape(client)
+    assert samples['btf_http_requests_in_flight'] == 1
+    assert samples['btf_containers'] == 0
+
+    for _ in range(3):
+        client.post('/orchestrator/containers', json=sample_data)
+    client.delete('/orchestrator/containers/2')
+    samples = _scrape(client)
+    assert samples['btf_http_requests_in_flight'] == 1
+    assert samples['btf_containers'] == 2
+
+
+def test_auth_failures(app):
+    """
+    Test the auth failure counter
+    """
+    client = app.test_client()
+    client.post('/auth/login', json={'username': 'testuser', 'password': 'wrong'})
+    client.post('/auth/login', json={'username': 'nobody', 'password': 'testpassword'})
+    client.get('/protected')
+    client.get('/protected', headers={'Authorization': 'Bearer not-a-token'})
+    expired = jwt.encode({'username': 'testuser', 'exp': datetime.utcnow() - timedelta(minutes=1)}, app.config['SECRET_KEY'], algorithm=app.config['JWT_ALGORITHM'])
+    client.get('/protected', headers={'Authorization': f'Bearer {expired}'})
+    token = client.post('/auth/login', json={'username': 'testuser', 'password': 'testpassword'}).json['token']
+    assert client.get('/admin/protected', headers={'Authorization': f'Bearer {token}'}).status_code == 403
+    assert client.get('/protected', headers={'Authorization': f'Bearer {token}'}).status_code == 200
+
+    samples = _scrape(client)
+    failures = {re.search(r'reason="(\w+)"', name).group(1): value for name, value in samples.items() if name.startswith('btf_auth_failures_total')}
+    assert failures == {'invalid_credentials': 2, 'missing_token': 1, 'invalid_token': 1, 'expired_token': 1, 'forbidden': 1}
+
+
+def test_metrics_disabled(make_app, sample_data):
+    """
+    Test turning the metrics off
+    """
+    app = make_app({'METRICS_ENABLED': False})
+    client = app.test_client()
+    assert client.post('/orchestrator/containers', json=sample_data).status_code == 201
+    response = client.get('/metrics')
+    assert response.status_code == 404
+    assert response.json == {'error': 'metrics are disabled'}
+    assert 'btf_metrics' not in app.extensions
+
+
+@pytest.mark.parametrize('propagate', [True, False])
+def test_failing_route_leaves_flight(make_app, propagate):
+    """
+    Test the in-flight gauge after an unhandled exception
+    """
+    app = make_app({'PROPAGATE_EXCEPTIONS': propagate})
+
+    @app.route('/boom')
+    def boom():
+        raise RuntimeError('boom')
+
+    client = app.test_client()
+    for _ in range(3):
+        if propagate:
+            with pytest.raises(RuntimeError):
+                client.get('/boom')
+        else:
+            assert client.get('/boom').status_code == 500
+    samples = _scrape(client)
+    assert samples['btf_http_requests_in_flight'] == 1
+    assert samples.get('btf_http_requests_total{method="GET",route="/boom",status="500"}') == (None if propagate else 3)
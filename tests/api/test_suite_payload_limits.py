@@ -0,0 +1,150 @@
+"""
+Test Suite for request body and field size limits (`MAX_CONTENT_LENGTH`, `MAX_FIELD_LENGTHS`).
+
+Test Cases:
+-------------
+1. **test_oversized_body_rejected_from_headers**:
+    - Verifies that a body announced bigger than `MAX_CONTENT_LENGTH` gets a JSON `413` without a single byte of it being read.
+
+2. **test_oversized_body_without_content_length**:
+    - Verifies that a chunked body (no `Content-Length`) is cut off with `413` once it passes the limit.
+
+3. **test_field_length_limits**:
+    - Verifies that create, update and batch requests with a field over its limit get `413` and change nothing, that values at the limit are accepted and that the limits can be turned off.
+
+4. **test_peak_memory_with_and_without_limit**:
+    - Measures the peak memory of handling a 16 MiB body with and without the limit and verifies that the limit keeps it flat.
+
+5. **test_asgi_does_not_buffer_oversized_body**:
+    - Verifies that the ASGI mode answers `413` from the headers alone and stops reading a chunked body once it passes the limit.
+"""
+import asyncio
+import io
+import json
+import tracemalloc
+
+import pytest
+from werkzeug.test import EnvironBuilder
+
+from tools.asgi import AsgiApp
+
+
+class UnreadableInput(io.RawIOBase):
+    """wsgi.input that fails the test if the app reads from it"""
+
+    def readinto(self, _):
+        raise AssertionError('the request body was read')
+
+
+def _call(app, environ):
+    """Run a WSGI request and return (status code, decoded JSON body)"""
+    status = []
+    body = b''.join(app(environ, lambda s, headers, exc_info=None: status.append(int(s.split()[0]))))
+    return status[0], json.loads(body)
+
+
+def test_oversized_body_rejected_from_headers(make_app):
+    """
+    Test rejection before the body is read
+    """
+    app = make_app({'MAX_CONTENT_LENGTH': 1024})
+    for method, path in [('POST', '/orchestrator/containers'), ('PUT', '/orchestrator/containers/1'), ('POST', '/orchestrator/containers:batch')]:
+        environ = EnvironBuilder(path=path, method=method, content_type='application/json').get_environ()
+        environ.update({'CONTENT_LENGTH': str(1025), 'wsgi.input': UnreadableInput()})
+        assert _call(app, environ) == (413, {'error': 'Payload too large. The request body is limited to 1024 bytes.'})
+
+    client = app.test_client()
+    assert client.post('/orchestrator/containers', json={'Hostname': 'a' * 1000}).status_code == 413
+    assert client.post('/orchestrator/containers', json={'Hostname': 'a' * 500}).status_code == 201
+
+
+def test_oversized_body_without_content_length(make_app):
+    """
+    Test a streamed body that passes the limit
+    """
+    app = make_app({'MAX_CONTENT_LENGTH': 1024})
+    for size, status in [(2048, 413), (100, 201)]:
+        environ = EnvironBuilder(path='/orchestrator/containers', method='POST', content_type='application/json').get_environ()
+        body = json.dumps({'Hostname': 'web', 'Entrypoint': 'x' * size}).encode()
+        environ.pop('CONTENT_LENGTH', None)
+        environ.update({'wsgi.input': io.BytesIO(body), 'wsgi.input_terminated': True})
+        assert _call(app, environ)[0] == status
+
+
+def test_field_length_limits(make_app, test_client, sample_data):
+    """
+    Test the per-field limits
+    """
+    response = test_client.post('/orchestrator/containers', json={'Hostname': 'a' * 513})
+    assert response.status_code == 413
+    assert response.json == {'error': 'Payload too large. "Hostname" is limited to 512 characters.'}
+    assert test_client.post('/orchestrator/containers', json={'Hostname': 'a' * 512, 'Entrypoint': 'b' * 4096, 'Image': 'c' * 512}).status_code == 201
+
+    for field, limit in [('Entrypoint', 4096), ('Image', 512)]:
+        response = test_client.put('/orchestrator/containers/1', json={field: 'x' * (limit + 1)})
+        assert response.status_code == 413
+        assert response.json == {'error': f'Payload too large. "{field}" is limited to {limit} characters.'}
+    # Non-string values count with their JSON length
+    assert test_client.put('/orchestrator/containers/1', json={'Image': ['x' * 600]}).status_code == 413
+    assert test_client.get('/orchestrator/containers/1').json['Image'] == 'c' * 512
+
+    assert test_client.post('/orchestrator/containers:batch', json=[sample_data, {'Hostname': 'a' * 513}]).status_code == 413
+    assert test_client.put('/orchestrator/containers:batch', json=[{'id': 1, 'Image': 'x' * 513}]).status_code == 413
+    assert len(test_client.get('/orchestrator/containers').json) == 1
+
+    client = make_app({'MAX_FIELD_LENGTHS': None}).test_client()
+    assert client.post('/orchestrator/containers', json={'Hostname': 'a' * 10000}).status_code == 201
+
+
+@pytest.mark.parametrize('limit', [None, 1024 * 1024], ids=['unlimited', 'limited'])
+def test_peak_memory_with_and_without_limit(make_app, record_property, limit):
+    """
+    Test how much memory a 16 MiB body costs
+    """
+    app = make_app({'MAX_CONTENT_LENGTH': limit, 'MAX_FIELD_LENGTHS': None})
+    body = json.dumps({'Hostname': 'web', 'Entrypoint': 'x' * (16 * 1024 * 1024)}).encode()
+    environ = EnvironBuilder(path='/orchestrator/containers', method='POST', content_type='application/json', data=body).get_environ()
+
+    tracemalloc.start()
+    try:
+        status, _ = _call(app, environ)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    record_property('peak_memory_bytes', peak)
+    if limit is None:
+        assert status == 201
+        assert peak > len(body)
+    else:
+        assert status == 413
+        assert peak < 1024 * 1024
+
+
+def test_asgi_does_not_buffer_oversized_body(make_app):
+    """
+    Test the ASGI mode with oversized bodies
+    """
+    asgi_app = AsgiApp(make_app({'MAX_CONTENT_LENGTH': 1024}))
+    scope = {
+        'type': 'http', 'http_version': '1.1', 'method': 'POST', 'scheme': 'http', 'path': '/orchestrator/containers',
+        'query_string': b'', 'server': ('testserver', 80), 'client': ('127.0.0.1', 5000), 'root_path': '',
+    }
+
+    def run(headers, chunks):
+        received = []
+        sent = []
+
+        async def receive():
+            received.append(chunks[len(received)])
+            return {'type': 'http.request', 'body': received[-1], 'more_body': len(received) < len(chunks)}
+
+        async def send(message):
+            sent.append(message)
+
+        asyncio.run(asgi_app({**scope, 'headers': [(b'content-type', b'application/json'), *headers]}, receive, send))
+        return sent[0]['status'], len(received)
+
+    assert run([(b'content-length', b'1048576')], [b'x' * 1024] * 1024) == (413, 0)
+    assert run([], [b'x' * 512] * 1024) == (413, 3)
+    assert run([], [b'{"Hostname": ', b'"web"}']) == (201, 2)
+    asgi_app.executor.shutdown()
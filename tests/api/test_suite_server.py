@@ -0,0 +1,198 @@
+"""
+Test Suite for the preforking server (`python3 -m tools.server`, `tools/server.py`).
+
+Test Cases:
+-------------
+1. **test_workers_share_the_store**:
+    - Verifies that several worker processes over one SQLite file allocate unique IDs and all serve the same containers.
+
+2. **test_openapi_app**:
+    - Verifies that the OpenAPI app is served by the same entry point.
+
+3. **test_graceful_reload**:
+    - Verifies that `SIGHUP` replaces every worker while a client keeps sending requests, without a single failed request.
+
+4. **test_worker_replaced_after_crash**:
+    - Verifies that a killed worker is replaced and the server keeps answering.
+
+5. **test_graceful_stop**:
+    - Verifies that `SIGTERM` stops the master and every worker with exit status 0.
+
+6. **test_command_line_validation**:
+    - Verifies that more than one worker without a SQLite file is refused, since the workers could not share containers.
+"""
+import json
+import os
+import re
+import signal
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+
+pytestmark = pytest.mark.skipif(not hasattr(os, 'fork'), reason='the preforking server needs os.fork()')
+
+
+class RunningServer:
+    """`python3 -m tools.server` in a subprocess, with its log collected in the background"""
+
+    def __init__(self, *args):
+        self.process = subprocess.Popen(  # pylint: disable=consider-using-with
+            [sys.executable, '-m', 'tools.server', *args, '--host', '127.0.0.1', '--port', '0'],
+            cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+        )
+        match = re.search(r'http://[\d.]+:\d+', self.process.stdout.readline())
+        assert match, self.process.stderr.read()
+        self.base_url = match.group(0)
+        self.log = []
+        threading.Thread(target=lambda: self.log.extend(self.process.stderr), daemon=True).start()
+
+    def workers(self, generation=None):
+        """PIDs of the workers started so far"""
+        return [
+            int(pid) for pid, started in re.findall(r'Worker (\d+) started \(generation (\d+)\)', ''.join(self.log))
+            if generation is None or int(started) == generation
+        ]
+
+    def wait_for_workers(self, count, generation=None, timeout=10):
+        """Wait until count workers (of generation) have started; return their PIDs"""
+        deadline = time.monotonic() + timeout
+        while len(self.workers(generation)) < count:
+            assert time.monotonic() < deadline, ''.join(self.log)
+            time.sleep(0.05)
+        return self.workers(generation)
+
+    def request(self, method, path, body=None):
+        """Send a request on a new connection; return (status, decoded JSON body)"""
+        data = None if body is None else json.dumps(body).encode()
+        request = urllib.request.Request(self.base_url + path, data=data, method=method, headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request, timeout=10) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as error:
+            return error.code, json.loads(error.read())
+
+    def stop(self):
+        """SIGTERM the master and return its exit status"""
+        if self.process.poll() is None:
+            self.process.send_signal(signal.SIGTERM)
+        return self.process.wait(timeout=30)
+
+
+@pytest.fixture(name='server')
+def fixture_server(tmp_path):
+    """Two workers of tools.api over a SQLite file"""
+    server = RunningServer('api', '--workers', '2', '--threads', '4', '--store', 'sqlite', '--sqlite-path', str(tmp_path / 'containers.db'))
+    server.wait_for_workers(2)
+    yield server
+    server.stop()
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+def test_workers_share_the_store(server, sample_data):
+    """
+    Test state shared between worker processes
+    """
+    assert server.request('GET', '/readyz') == (200, {'status': 'ready', 'store': 'reachable'})
+    ids = [server.request('POST', '/orchestrator/containers', sample_data)[1]['id'] for _ in range(20)]
+    assert sorted(ids) == list(range(1, 21))
+    for _ in range(5):  # each on a new connection, so on whichever worker accepts it
+        status, containers = server.request('GET', '/orchestrator/containers')
+        assert status == 200
+        assert [container['id'] for container in containers] == ids
+    assert server.request('PUT', '/orchestrator/containers/3', {'Image': 'nginx'})[0] == 200
+    assert all(server.request('GET', '/orchestrator/containers/3')[1]['Image'] == 'nginx' for _ in range(5))
+
+
+def test_openapi_app(tmp_path, sample_data):
+    """
+    Test serving tools.openapi
+    """
+    server = RunningServer('openapi', '--workers', '1', '--sqlite-path', str(tmp_path / 'containers.db'), '--durable-path', str(tmp_path / 'durable'))
+    try:
+        assert server.request('POST', '/orchestrator/containers/', sample_data)[0] == 201
+        assert server.request('GET', '/orchestrator/containers/1')[1]['Hostname'] == sample_data['Hostname']
+    finally:
+        assert server.stop() == 0
+
+
+def test_graceful_reload(server, sample_data):
+    """
+    Test replacing every worker under load
+    """
+    old_workers = server.workers()
+    failures = []
+    statuses = []
+    done = threading.Event()
+
+    def client():
+        while not done.is_set():
+            try:
+                statuses.append(server.request('POST', '/orchestrator/containers', sample_data)[0])
+            except OSError as error:
+                failures.append(error)
+
+    thread = threading.Thread(target=client)
+    thread.start()
+    try:
+        time.sleep(0.3)
+        server.process.send_signal(signal.SIGHUP)
+        server.wait_for_workers(2, generation=1)
+        deadline = time.monotonic() + 10
+        while any(_alive(pid) for pid in old_workers) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        time.sleep(0.3)
+    finally:
+        done.set()
+        thread.join()
+    assert not failures
+    assert not any(_alive(pid) for pid in old_workers)
+    assert set(statuses) == {201}
+    assert len(server.request('GET', '/orchestrator/containers')[1]) == len(statuses)
+
+
+def test_worker_replaced_after_crash(server):
+    """
+    Test replacing a worker that died
+    """
+    os.kill(server.workers()[0], signal.SIGKILL)
+    server.wait_for_workers(3)
+    assert 'exited unexpectedly' in ''.join(server.log)
+    assert all(server.request('GET', '/healthz')[0] == 200 for _ in range(5))
+
+
+def test_graceful_stop(server):
+    """
+    Test stopping the server
+    """
+    workers = server.workers()
+    assert server.stop() == 0
+    assert not any(_alive(pid) for pid in workers)
+    with pytest.raises(OSError):
+        server.request('GET', '/healthz')
+
+
+def test_command_line_validation():
+    """
+    Test refusing workers that could not share their state
+    """
+    result = subprocess.run(
+        [sys.executable, '-m', 'tools.server', 'api', '--workers', '2', '--store', 'locked'],
+        cwd=ROOT, capture_output=True, text=True, timeout=30, check=False,
+    )
+    assert result.returncode == 2
+    assert 'only share containers through a SQLite file' in result.stderr
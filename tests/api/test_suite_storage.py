@@ -0,0 +1,442 @@
+"""
+Test Suite for the pluggable container storage backends (tools/storage.py).
+Every backend is exercised through the same contract so they stay interchangeable
+behind the CRUD handlers.
+
+Test Cases:
+-------------
+1. **test_store_create_and_get**:
+    - Verifies that a created container gets an 'id' and can be read back unchanged.
+
+2. **test_store_update**:
+    - Verifies that updates apply only the given fields and unknown IDs return None.
+
+3. **test_store_delete**:
+    - Verifies that deleting returns the removed record once and None afterwards.
+
+4. **test_store_values_ordered_by_id**:
+    - Verifies that all records are returned in ascending 'id' order.
+
+5. **test_store_ids_not_reused**:
+    - Verifies that IDs keep growing after the newest container is deleted.
+
+6. **test_store_clear_restarts_ids**:
+    - Verifies that clearing the store empties it and restarts the ID sequence.
+
+7. **test_store_indexes_follow_writes**:
+    - Verifies that Hostname/Image lookups and filtered pages stay correct through create, update and delete.
+
+8. **test_store_unique_fields**:
+    - Verifies that unique fields raise DuplicateError on create and update without changing the store.
+
+9. **test_store_unknown_backend**:
+    - Verifies that an unknown backend name raises a ValueError.
+
+10. **test_sqlite_store_persists_between_instances**:
+    - Verifies that a file-backed SQLite store keeps its data across instances and runs in WAL mode.
+
+11. **test_store_versions_and_conditional_writes**:
+    - Verifies that versions start at 1, grow with every update and that writes with a stale expected version raise VersionConflictError.
+
+12. **test_store_collection_version**:
+    - Verifies that the collection version changes with every write, single or batched, and stays put on reads.
+
+13. **test_sqlite_store_adds_version_column**:
+    - Verifies that a database file created before versions existed gets the column on open.
+
+14. **test_compact_store_matches_dict_records**:
+    - Verifies that the compact store returns the same dicts, and so the same JSON, as the locked store through every kind of write, while keeping slots records with interned images.
+
+15. **test_compact_store_memory**:
+    - Verifies that the compact store takes at least a quarter less memory per container than the locked store.
+
+16. **test_compact_store_rejects_unknown_fields**:
+    - Verifies that fields outside CONTAINER_FIELDS raise a ValueError and leave the container unchanged.
+
+17. **test_store_cursor_pages_after_deletes**:
+    - Verifies that cursor pages, filtered or not, return every remaining container once through deletes that compact the in-memory ID list.
+
+18. **test_store_cursor_page_seeks_by_id**:
+    - Verifies that an in-memory cursor page reads only the records it returns, not the ones before its cursor.
+
+19. **test_store_page_huge_arguments**:
+    - Verifies that limits and offsets past sys.maxsize page as if they were sys.maxsize.
+
+20. **test_store_epoch**:
+    - Verifies that the epoch stays through writes, changes on clear and differs between in-memory stores, while SQLite instances over one file share it.
+"""
+import gc
+import json
+import sqlite3
+import sys
+import tracemalloc
+
+import pytest
+
+from tools.records import ContainerRecord
+from tools.storage import STORE_BACKENDS, DuplicateError, VersionConflictError, create_store
+
+
+@pytest.fixture(params=sorted(STORE_BACKENDS))
+def store(request, tmp_path):
+    """Fresh store for every backend (the durable one in a temporary directory)"""
+    if request.param == 'durable':
+        durable = create_store('durable', path=str(tmp_path / 'durable'))
+        yield durable
+        durable.close()
+        return
+    yield create_store(request.param)
+
+
+def test_store_create_and_get(store, sample_data):
+    """
+    Test creating a container and reading it back
+    """
+    created = store.create(sample_data)
+    assert created == dict(sample_data, id=1)
+    assert store.get(1) == created
+    assert store.get(2) is None
+    assert len(store) == 1
+
+
+def test_store_update(store, sample_data):
+    """
+    Test partial updates and updates of unknown containers
+    """
+    store.create(sample_data)
+    updated = store.update(1, {'Image': 'alpine'})
+    assert updated == dict(sample_data, id=1, Image='alpine')
+    assert store.get(1) == updated
+    assert store.update(42, {'Image': 'alpine'}) is None
+
+
+def test_store_delete(store, sample_data):
+    """
+    Test deleting a container twice
+    """
+    created = store.create(sample_data)
+    assert store.delete(1) == created
+    assert store.delete(1) is None
+    assert len(store) == 0
+
+
+def test_store_values_ordered_by_id(store, sample_data):
+    """
+    Test listing every container in ID order
+    """
+    for i in range(5):
+        store.create(dict(sample_data, Hostname=f'container-{i}'))
+    store.delete(3)
+    containers = list(store.values())
+    assert [container['id'] for container in containers] == [1, 2, 4, 5]
+    assert containers[0]['Hostname'] == 'container-0'
+
+
+def test_store_ids_not_reused(store, sample_data):
+    """
+    Test that IDs of deleted containers are never handed out again
+    """
+    store.create(sample_data)
+    store.create(sample_data)
+    store.delete(2)
+    assert store.create(sample_data)['id'] == 3
+
+
+def test_store_clear_restarts_ids(store, sample_data):
+    """
+    Test that clear() empties the store and restarts IDs at 1
+    """
+    store.create(sample_data)
+    store.create(sample_data)
+    store.clear()
+    assert len(store) == 0
+    assert not list(store.values())
+    assert store.create(sample_data)['id'] == 1
+
+
+def test_store_indexes_follow_writes(store):
+    """
+    Test that secondary indexes are maintained by every write
+    """
+    store.create({'Hostname': 'a', 'Entrypoint': '', 'Image': 'nginx'})
+    store.create({'Hostname': 'b', 'Entrypoint': '', 'Image': 'nginx'})
+    store.create({'Hostname': 'a', 'Entrypoint': '', 'Image': 'alpine'})
+    assert store.lookup('Hostname', 'a') == {1, 3}
+    assert store.lookup('Image', 'nginx') == {1, 2}
+
+    store.update(1, {'Image': 'alpine'})
+    store.delete(3)
+    assert store.lookup('Hostname', 'a') == {1}
+    assert store.lookup('Image', 'nginx') == {2}
+    assert store.lookup('Image', 'alpine') == {1}
+    assert [record['id'] for record in store.page(filters={'Image': 'alpine', 'Hostname': 'a'})] == [1]
+    assert not store.page(filters={'Image': 'ubuntu'})
+
+    store.clear()
+    assert not store.lookup('Image', 'alpine')
+
+
+def test_store_unique_fields(store, sample_data):
+    """
+    Test uniqueness enforcement through the Hostname index
+    """
+    store.create(sample_data, ('Hostname',))
+    with pytest.raises(DuplicateError):
+        store.create(sample_data, ('Hostname',))
+    other = store.create(dict(sample_data, Hostname='other'), ('Hostname',))
+    with pytest.raises(DuplicateError):
+        store.update(other['id'], {'Hostname': sample_data['Hostname']}, ('Hostname',))
+    assert store.get(other['id'])['Hostname'] == 'other'
+    assert len(store) == 2
+
+
+def test_store_unknown_backend():
+    """
+    Test that an unknown backend name is rejected
+    """
+    with pytest.raises(ValueError):
+        create_store('redis')
+
+
+def test_sqlite_store_persists_between_instances(tmp_path, sample_data):
+    """
+    Test that a file-backed SQLite store survives a restart
+    """
+    path = tmp_path / 'containers.db'
+    first = create_store('sqlite', path=str(path))
+    created = first.create(sample_data)
+
+    with first._session() as conn:  # pylint: disable=protected-access
+        assert conn.execute('PRAGMA journal_mode').fetchone() == {'journal_mode': 'wal'}
+
+    second = create_store('sqlite', path=str(path))
+    assert second.get(created['id']) == created
+    assert second.create(sample_data)['id'] == created['id'] + 1
+
+
+def test_store_versions_and_conditional_writes(store, sample_data):
+    """
+    Test container versions and compare-and-set writes
+    """
+    store.create(sample_data)
+    store.create_many([sample_data, sample_data])
+    assert [store.version(container_id) for container_id in (1, 2, 3, 4)] == [1, 1, 1, None]
+
+    store.update(1, {'Image': 'nginx'})
+    assert store.update(1, {'Image': 'alpine'}, expected_version=2)['Image'] == 'alpine'
+    assert store.version(1) == 3
+
+    with pytest.raises(VersionConflictError) as error:
+        store.update(1, {'Image': 'stale'}, expected_version=2)
+    assert (error.value.expected, error.value.current) == (2, 3)
+    assert store.get(1)['Image'] == 'alpine'
+
+    store.update_many([(2, {'Image': 'nginx'})])
+    assert store.version(2) == 2
+
+    with pytest.raises(VersionConflictError):
+        store.delete(2, expected_version=1)
+    assert store.delete(2, expected_version=2) is not None
+    assert store.version(2) is None
+    assert store.update(2, {'Image': 'nginx'}, expected_version=2) is None
+
+
+def test_store_collection_version(store, sample_data):
+    """
+    Test the version of the whole collection
+    """
+    seen = [store.collection_version()]
+
+    def changed():
+        version = store.collection_version()
+        assert version not in seen
+        seen.append(version)
+
+    store.create(sample_data)
+    changed()
+    store.create_many([sample_data, sample_data])
+    changed()
+    store.get(1)
+    store.page(10)
+    list(store.stream())
+    assert store.collection_version() == seen[-1]
+    store.update(1, {'Image': 'nginx'})
+    changed()
+    store.update_many([(2, {'Image': 'nginx'})])
+    changed()
+    store.delete(3)
+    changed()
+    store.delete_many([1])
+    changed()
+    store.clear()
+    assert store.collection_version() != seen[-1]
+
+
+def test_sqlite_store_adds_version_column(tmp_path, sample_data):
+    """
+    Test opening a database file from before container versions
+    """
+    path = tmp_path / 'old.db'
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        'CREATE TABLE containers (id INTEGER PRIMARY KEY AUTOINCREMENT, Hostname, Entrypoint, Image);'
+        "INSERT INTO containers (Hostname, Entrypoint, Image) VALUES ('old', '', 'ubuntu');"
+    )
+    conn.close()
+
+    store = create_store('sqlite', path=str(path))
+    assert store.get(1) == {'id': 1, 'Hostname': 'old', 'Entrypoint': '', 'Image': 'ubuntu'}
+    assert store.version(1) == 1
+    assert store.lookup('Image', 'ubuntu') == {1}
+    store.update(1, sample_data)
+    assert store.version(1) == 2
+
+
+def _exercise(store):
+    """The same writes on any store; returns what they answered"""
+    images = ['ubuntu', 'nginx', 'redis']
+    answers = [store.create({'Hostname': f'host-{i}', 'Entrypoint': '', 'Image': images[i % 3]}) for i in range(6)]
+    answers.append(store.create({'Hostname': 'bare'}))
+    answers += store.create_many([{'Hostname': 'a', 'Entrypoint': ['sh', '-c'], 'Image': 'nginx'}, {'Hostname': 'b', 'Image': 7}])
+    answers.append(store.update(7, {'Image': 'redis'}))
+    answers += store.update_many([(1, {'Hostname': 'renamed'}), (2, {'Entrypoint': '/bin/sh'}), (99, {'Image': 'x'})])
+    answers += [store.delete(3), store.delete(3)] + store.delete_many([4, 100])
+    answers += [store.get(1), store.get(3), store.page(2, 1), store.page(filters={'Image': 'redis'}), list(store.stream())]
+    return answers, list(store.values())
+
+
+def test_compact_store_matches_dict_records():
+    """
+    Test that compact records are invisible to callers
+    """
+    compact = create_store('compact')
+    answers, records = _exercise(compact)
+    assert (answers, records) == _exercise(create_store('locked'))
+    assert json.dumps(records) == json.dumps(_exercise(create_store('dict'))[1])  # its answers are live records
+    assert all(type(record) is dict for record in records)  # pylint: disable=unidiomatic-typecheck
+
+    stored = compact._data  # pylint: disable=protected-access
+    assert all(isinstance(record, ContainerRecord) for record in stored.values())
+    assert stored[5].Image is stored[8].Image
+    assert stored[7].as_dict() == {'id': 7, 'Hostname': 'bare', 'Image': 'redis'}
+
+
+def _bytes_per_container(backend, count=5000):
+    """Memory a store allocates per container created from parsed request bodies"""
+    bodies = [json.dumps({'Hostname': f'host-{i}.example', 'Entrypoint': '', 'Image': 'ubuntu'}) for i in range(count)]
+    store = create_store(backend)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        for body in bodies:
+            store.create(json.loads(body))
+        gc.collect()
+        allocated = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return allocated / count
+
+
+def test_compact_store_memory():
+    """
+    Test the memory saved per container
+    """
+    assert _bytes_per_container('compact') < 0.75 * _bytes_per_container('locked')
+
+
+def test_compact_store_rejects_unknown_fields(sample_data):
+    """
+    Test storing a field the records have no slot for
+    """
+    store = create_store('compact')
+    store.create(sample_data)
+    with pytest.raises(ValueError):
+        store.create({'Hostname': 'x', 'Labels': {}})
+    with pytest.raises(ValueError):
+        store.update(1, {'Image': 'nginx', 'Labels': {}})
+    assert store.values() == [{'id': 1, **sample_data}]
+    assert store.version(1) == 1
+    assert store.lookup('Image', 'ubuntu') == {1}
+
+
+def _walk(store, page_size, filters=None):
+    """IDs of every page of a cursor walk"""
+    ids, after_id = [], None
+    while True:
+        page = store.page(page_size, 0, after_id, filters)
+        ids.extend(record['id'] for record in page)
+        if len(page) < page_size:
+            return ids
+        after_id = page[-1]['id']
+
+
+def test_store_cursor_pages_after_deletes(store):
+    """
+    Test walking the pages while containers come and go
+    """
+    store.create_many([{'Hostname': f'host-{i}', 'Entrypoint': '', 'Image': 'nginx' if i % 2 else 'redis'} for i in range(1, 301)])
+    deleted = {container_id for container_id in range(1, 301) if container_id % 3 == 0 or 100 <= container_id < 250}
+    store.delete_many(sorted(deleted))
+    remaining = [container_id for container_id in range(1, 301) if container_id not in deleted]
+    assert _walk(store, 7) == remaining
+    assert _walk(store, 7, {'Image': 'nginx'}) == [container_id for container_id in remaining if container_id % 2]
+    assert [record['id'] for record in store.page(3, 1, 99)] == [251, 253, 254]
+    assert store.page(3, 0, 300) == []
+
+    store.create({'Hostname': 'new', 'Entrypoint': '', 'Image': 'redis'})
+    assert _walk(store, 7) == remaining + [301]
+
+
+@pytest.mark.parametrize('backend', ['dict', 'locked', 'compact'])
+def test_store_cursor_page_seeks_by_id(backend):
+    """
+    Test that a deep cursor page does not walk the records before it
+    """
+    class CountingDict(dict):
+        """Records counting every read"""
+        reads = 0
+
+        def get(self, key, default=None):
+            CountingDict.reads += 1
+            return super().get(key, default)
+
+        def values(self):
+            raise AssertionError('a cursor page walked every record')
+
+    store = create_store(backend)
+    store.create_many([{'Hostname': f'host-{i}'} for i in range(10000)])
+    store._data = CountingDict(store._data)  # pylint: disable=protected-access
+    assert [record['id'] for record in store.page(5, 0, 9990)] == [9991, 9992, 9993, 9994, 9995]
+    assert CountingDict.reads == 5
+
+
+def test_store_page_huge_arguments(store, sample_data):
+    """
+    Test limits and offsets islice() cannot take as they are
+    """
+    store.create_many([dict(sample_data, Hostname=f'host-{i}') for i in range(3)])
+    for huge in [sys.maxsize, sys.maxsize + 1, 10 ** 30]:
+        assert len(store.page(huge)) == 3
+        assert len(store.page(huge, 1, 1)) == 1
+        assert store.page(2, huge) == []
+        assert store.page(huge, huge) == []
+
+
+def test_store_epoch(store, sample_data, tmp_path):
+    """
+    Test the token telling apart stores whose IDs and versions restarted
+    """
+    epoch = store.epoch()
+    store.create(sample_data)
+    store.update(1, {'Image': 'nginx'})
+    assert store.epoch() == epoch
+    store.clear()
+    assert store.epoch() != epoch
+
+    if store.name in ('dict', 'locked', 'compact'):
+        assert create_store(store.name).epoch() != create_store(store.name).epoch()
+    path = str(tmp_path / 'shared.db')
+    first, second = create_store('sqlite', path=path), create_store('sqlite', path=path)
+    assert first.epoch() == second.epoch()
+    first.clear()
+    assert second.epoch() == first.epoch() != epoch
@@ -0,0 +1,119 @@
+"""
+Test Suite for the streaming modes of the `GET /orchestrator/containers` endpoint.
+
+The listing can be streamed as NDJSON (`Accept: application/x-ndjson` or `?stream=ndjson`)
+or as a chunked JSON array (`?stream=json`), encoding containers as they are read
+from the store instead of building the whole body in memory.
+
+Test Cases:
+-------------
+1. **test_stream_ndjson_accept_header**:
+    - Verifies that `Accept: application/x-ndjson` returns one container per line, matching the regular listing.
+
+2. **test_stream_json_array_matches_listing**:
+    - Verifies that `?stream=json` produces exactly the same bytes as the buffered listing.
+
+3. **test_stream_with_filters_and_pagination**:
+    - Verifies that streaming honours the Hostname/Image filters, `limit` and the next-page headers.
+
+4. **test_stream_invalid_mode**:
+    - Verifies that an unknown `stream` value returns a 400 error.
+
+5. **test_stream_peak_memory_is_flat**:
+    - Measures peak memory (tracemalloc) while consuming the stream for a small and a 20x larger store
+      and verifies it stays flat (at most a few bytes per container for the ID snapshot of the 'locked'
+      store), while the buffered listing grows by hundreds of bytes per container.
+"""
+import json
+import tracemalloc
+
+import pytest
+
+
+def _create_containers(db, count, image='ubuntu'):
+    for i in range(count):
+        db.create({'Hostname': f'container-{i}', 'Entrypoint': '', 'Image': image})
+
+
+def _peak_memory(test_client, url, buffered):
+    """Peak traced memory while fetching url and consuming the whole body"""
+    tracemalloc.start()
+    try:
+        response = test_client.get(url, buffered=buffered)
+        for _ in response.response:
+            pass
+        response.close()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_stream_ndjson_accept_header(test_client, db):
+    """
+    Test NDJSON streaming selected through the Accept header
+    """
+    _create_containers(db, 5)
+    expected = test_client.get('/orchestrator/containers').json
+
+    response = test_client.get('/orchestrator/containers', headers={'Accept': 'application/x-ndjson'})
+    assert response.status_code == 200
+    assert response.headers['Content-Type'] == 'application/x-ndjson'
+    assert [json.loads(line) for line in response.data.decode().splitlines()] == expected
+
+
+def test_stream_json_array_matches_listing(test_client, db):
+    """
+    Test that the streamed JSON array is byte-identical to the buffered one
+    """
+    _create_containers(db, 600)
+    expected = test_client.get('/orchestrator/containers')
+
+    response = test_client.get('/orchestrator/containers?stream=json')
+    assert response.status_code == 200
+    assert response.headers['Content-Type'] == 'application/json'
+    assert response.data == expected.data
+
+
+def test_stream_with_filters_and_pagination(test_client, db):
+    """
+    Test streaming a filtered page
+    """
+    _create_containers(db, 3, image='nginx')
+    _create_containers(db, 3, image='alpine')
+
+    response = test_client.get('/orchestrator/containers?stream=ndjson&Image=alpine&limit=2')
+    assert response.status_code == 200
+    assert [json.loads(line)['id'] for line in response.data.decode().splitlines()] == [4, 5]
+    assert 'X-Next-Cursor' in response.headers
+
+    response = test_client.get('/orchestrator/containers?stream=ndjson&Image=nginx')
+    assert response.status_code == 200
+    assert [json.loads(line)['id'] for line in response.data.decode().splitlines()] == [1, 2, 3]
+
+
+def test_stream_invalid_mode(test_client, db):
+    """
+    Test that an unknown streaming mode is rejected
+    """
+    _create_containers(db, 1)
+    response = test_client.get('/orchestrator/containers?stream=xml')
+    assert response.status_code == 400
+    assert 'error' in response.json
+
+
+@pytest.mark.parametrize("url", ['/orchestrator/containers?stream=ndjson', '/orchestrator/containers?stream=json'])
+def test_stream_peak_memory_is_flat(test_client, db, url):
+    """
+    Test that peak memory of a streamed listing does not grow with the container count
+    """
+    _create_containers(db, 2000)
+    _peak_memory(test_client, url, buffered=False)  # warm up lazy imports and caches
+    small_peak = _peak_memory(test_client, url, buffered=False)
+
+    _create_containers(db, 38000)
+    large_peak = _peak_memory(test_client, url, buffered=False)
+    buffered_peak = _peak_memory(test_client, '/orchestrator/containers', buffered=True)
+
+    # Bytes of peak memory added per extra container
+    assert (large_peak - small_peak) / 38000 < 16
+    assert (buffered_peak - small_peak) / 38000 > 100
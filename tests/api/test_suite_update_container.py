@@ -43,9 +43,19 @@ Test Cases:
 
 13. **test_update_read_only_fields**:
     - Ensures the API does not allow updates to read-only fields like `id`.
+
+14. **test_update_returns_new_etag**:
+    - Verifies that create, read and update responses carry the container's `ETag` and that every update changes it.
+
+15. **test_update_with_if_match**:
+    - Verifies that `If-Match` with the current `ETag` (or `*`) applies the update, while a stale one returns `412 Precondition Failed` and changes nothing.
+
+16. **test_update_body_not_an_object**:
+    - Verifies that a JSON string, number, list or null as the body returns `400 Bad Request` and leaves the container unchanged.
 """
 
 import concurrent.futures
+import os
 import pytest
 
 
@@ -246,7 +256,8 @@ def test_update_with_large_input(test_client, sample_data):
     assert response.status_code in (200, 413)  # API may enforce size limits
 
 
-@pytest.mark.xfail(reason="Known bug: [Flask client doesn't support concurrent requests]", strict=True)
+# The ASGI mode (BTF_SERVER_MODE=asgi) uses a werkzeug client that handles concurrent requests
+@pytest.mark.xfail(os.environ.get('BTF_SERVER_MODE', 'wsgi') != 'asgi', reason="Known bug: [Flask client doesn't support concurrent requests]", strict=True)
 def test_concurrent_updates(test_client, sample_data):
     """
     Test concurrent updates to the same container
@@ -297,3 +308,58 @@ def test_update_read_only_fields(test_client, sample_data):
     # Verify read-only fields are not updated
     assert updated_container['id'] == created_container['id']  # ID should remain unchanged
     assert updated_container['Hostname'] == updated_data['Hostname']
+
+
+def test_update_returns_new_etag(app, test_client, sample_data):
+    """
+    Test the ETag of single-container responses
+    """
+    epoch = app.extensions['btf_store'].epoch()
+    created = test_client.post('/orchestrator/containers', json=sample_data)
+    etag = created.headers['ETag']
+    assert etag == f'"{epoch}-1-1"'
+    assert test_client.get('/orchestrator/containers/1').headers['ETag'] == etag
+
+    updated = test_client.put('/orchestrator/containers/1', json={'Image': 'nginx'})
+    assert updated.headers['ETag'] == f'"{epoch}-1-2"'
+    assert test_client.get('/orchestrator/containers/1').headers['ETag'] == f'"{epoch}-1-2"'
+
+
+def test_update_with_if_match(test_client, sample_data):
+    """
+    Test optimistic concurrency through If-Match
+    """
+    etag = test_client.post('/orchestrator/containers', json=sample_data).headers['ETag']
+
+    response = test_client.put('/orchestrator/containers/1', json={'Image': 'nginx'}, headers={'If-Match': etag})
+    assert response.status_code == 200
+    new_etag = response.headers['ETag']
+
+    # A second writer still holding the old ETag loses
+    response = test_client.put('/orchestrator/containers/1', json={'Image': 'alpine'}, headers={'If-Match': etag})
+    assert response.status_code == 412
+    assert response.json == {'error': 'Precondition failed. The container was modified.'}
+    assert test_client.get('/orchestrator/containers/1').json['Image'] == 'nginx'
+
+    response = test_client.put('/orchestrator/containers/1', json={'Image': 'alpine'}, headers={'If-Match': f'"0-0", {new_etag}'})
+    assert response.status_code == 200
+    response = test_client.put('/orchestrator/containers/1', json={'Image': 'debian'}, headers={'If-Match': '*'})
+    assert response.status_code == 200
+
+    response = test_client.put('/orchestrator/containers/99', json={'Image': 'nginx'}, headers={'If-Match': '*'})
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize("body", ['"new.hostname"', '42', '[1, 2]', '["Hostname", "Image"]', 'null'])
+def test_update_body_not_an_object(test_client, sample_data, body):
+    """
+    Test updating a container with a JSON body that is not an object
+    """
+    response = test_client.post('/orchestrator/containers', json=sample_data)
+    assert response.status_code == 201
+    created_container = response.json
+
+    response = test_client.put(f'/orchestrator/containers/{created_container["id"]}', data=body, content_type='application/json')
+    assert response.status_code == 400
+    assert response.json == {'error': 'Bad request. The body must be a JSON object.'}
+    assert test_client.get(f'/orchestrator/containers/{created_container["id"]}').json == created_container
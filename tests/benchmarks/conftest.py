@@ -0,0 +1,53 @@
+"""Fixtures for the handler micro-benchmarks (run with: pytest tests/benchmarks)"""
+import pytest
+
+from tools.api import create_app
+
+
+DEFAULT_SIZES = '0,1000,100000'
+
+
+def pytest_addoption(parser):
+    """Benchmark specific command line options"""
+    parser.addoption(
+        '--bench-sizes', default=DEFAULT_SIZES,
+        help=f'Comma separated database sizes to benchmark at (default: {DEFAULT_SIZES})'
+    )
+
+
+def pytest_generate_tests(metafunc):
+    """Parametrize every benchmark using 'db_size' with the requested sizes"""
+    if 'db_size' in metafunc.fixturenames:
+        sizes = [int(size) for size in metafunc.config.getoption('--bench-sizes').split(',') if size.strip()]
+        metafunc.parametrize('db_size', sizes, ids=[f'{size}-containers' for size in sizes])
+
+
+@pytest.fixture
+def app():
+    """Fresh app (and store) per benchmark"""
+    return create_app({'TESTING': True})
+
+
+@pytest.fixture
+def test_client(app):
+    """Test client fixture"""
+    with app.test_client() as client:
+        yield client
+
+
+@pytest.fixture
+def seeded_db(app, db_size):
+    """Database holding db_size containers for the duration of one benchmark"""
+    db = app.extensions['btf_store']
+    db.create_many([
+        {'Hostname': f'container-{i}', 'Entrypoint': '', 'Image': 'ubuntu'} for i in range(db_size)
+    ])
+    return db
+
+
+@pytest.fixture
+def auth_headers(test_client):
+    """Authorization header for the regular test user"""
+    response = test_client.post('/auth/login', json={'username': 'testuser', 'password': 'testpassword'})
+    assert response.status_code == 200
+    return {'Authorization': f'Bearer {response.json["token"]}'}
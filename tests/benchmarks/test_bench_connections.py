@@ -0,0 +1,54 @@
+"""
+Scaling of the two server modes with open connections: 400 GET requests over 8 active
+keep-alive connections while N other connections sit idle. The threaded WSGI server keeps
+a thread per connection, the ASGI mode (uvicorn + tools.asgi) a fixed pool.
+"""
+import http.client
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import pytest
+
+from tools.loadgen import idle_connections, local_app_server
+
+ACTIVE_CONNECTIONS = 8
+REQUESTS_PER_CONNECTION = 50
+
+
+def _burst(base_url):
+    """Send the requests of every active connection, return the count of non-200 answers"""
+    target = urlsplit(base_url)
+
+    def client(_):
+        connection = http.client.HTTPConnection(target.hostname, target.port, timeout=30)
+        failures = 0
+        for _ in range(REQUESTS_PER_CONNECTION):
+            connection.request('GET', '/orchestrator/containers/1')
+            response = connection.getresponse()
+            response.read()
+            failures += response.status != 200
+        connection.close()
+        return failures
+
+    with ThreadPoolExecutor(max_workers=ACTIVE_CONNECTIONS) as executor:
+        return sum(executor.map(client, range(ACTIVE_CONNECTIONS)))
+
+
+@pytest.mark.parametrize('idle', [0, 100, 1000], ids=lambda idle: f'{idle}-idle')
+@pytest.mark.parametrize('mode', ['wsgi', 'asgi'])
+def test_bench_open_connections(benchmark, mode, idle):
+    """
+    Request burst with idle keep-alive connections held open
+    """
+    if mode == 'asgi':
+        pytest.importorskip('uvicorn')
+    with local_app_server(mode) as base_url, idle_connections(base_url, idle):
+        connection = http.client.HTTPConnection(urlsplit(base_url).hostname, urlsplit(base_url).port)
+        connection.request('POST', '/orchestrator/containers', body='{"Hostname": "bench"}', headers={'Content-Type': 'application/json'})
+        assert connection.getresponse().status == 201
+        connection.close()
+
+        failures = benchmark.pedantic(_burst, args=(base_url,), rounds=3, iterations=1)
+        benchmark.extra_info['server_threads'] = threading.active_count()
+    assert failures == 0
@@ -0,0 +1,78 @@
+"""
+Cost of durability for the in-memory store: write throughput with the write-ahead log,
+and the time to open a directory holding many containers.
+
+Writes are single creates and updates, as the handlers issue them. Recovery reads a
+snapshot of recovery_size containers (memory-mapped, parsed with orjson when installed)
+plus a log tail of 10000 updates; 1,000,000 containers take a few seconds on a slow core.
+
+Benchmarks:
+-------------
+1. **test_bench_store_writes**: 1000 creates + 1000 updates on 'locked' and on 'durable' with each fsync mode
+2. **test_bench_durable_recovery**: opening the directory with 100000 and 1000000 containers
+"""
+import pytest
+
+from tools.storage import create_store
+
+WRITES = 1000
+LOG_TAIL = 10000
+
+
+def _writes(store):
+    for i in range(WRITES):
+        store.create({'Hostname': f'host-{i}', 'Entrypoint': '/bin/sh', 'Image': 'ubuntu'})
+    for container_id in range(1, WRITES + 1):
+        store.update(container_id, {'Image': 'alpine'})
+
+
+@pytest.mark.parametrize('backend, fsync', [
+    ('locked', None), ('durable', 'never'), ('durable', 'interval'), ('durable', 'always'),
+], ids=['locked', 'durable-never', 'durable-interval', 'durable-always'])
+def test_bench_store_writes(benchmark, tmp_path, backend, fsync):
+    """
+    Writes per second with and without the log
+    """
+    stores = []
+
+    def setup():
+        if backend == 'durable':
+            store = create_store(backend, path=str(tmp_path / f'durable-{len(stores)}'), fsync=fsync)
+        else:
+            store = create_store(backend)
+        stores.append(store)
+        return (store,), {}
+
+    benchmark.pedantic(_writes, setup=setup, rounds=3, iterations=1)
+    if benchmark.stats:  # None under --benchmark-disable
+        benchmark.extra_info['writes_per_second'] = round(2 * WRITES / benchmark.stats.stats.mean)
+    for store in stores:
+        if backend == 'durable':
+            store.close()
+
+
+@pytest.mark.parametrize('recovery_size', [100000, 1000000], ids=lambda size: f'{size}-containers')
+def test_bench_durable_recovery(benchmark, tmp_path, recovery_size):
+    """
+    Opening a store directory: snapshot load, index build and log replay
+    """
+    path = str(tmp_path / 'durable')
+    store = create_store('durable', path=path, fsync='never', snapshot_every=0)
+    store.create_many([
+        {'Hostname': f'host-{i}', 'Entrypoint': '/bin/sh', 'Image': f'image-{i % 100}'} for i in range(recovery_size)
+    ])
+    store.snapshot()
+    for container_id in range(1, LOG_TAIL + 1):
+        store.update(container_id, {'Image': 'alpine'})
+    store.close()
+
+    def recover():
+        recovered = create_store('durable', path=path, fsync='never', snapshot_every=0)
+        recovered.close()
+        return recovered
+
+    recovered = benchmark.pedantic(recover, rounds=3, iterations=1)
+    assert len(recovered) == recovery_size
+    assert recovered.get(1)['Image'] == 'alpine'
+    if benchmark.stats:  # None under --benchmark-disable
+        benchmark.extra_info['containers_per_second'] = round(recovery_size / benchmark.stats.stats.mean)
@@ -0,0 +1,144 @@
+"""
+Micro-benchmarks for every handler in tools/api.py.
+
+Each CRUD handler is timed through the Flask test client at several database sizes
+(--bench-sizes, default 0, 1k and 100k containers), so O(n) paths show up as numbers.
+These benchmarks are not part of the regression run; see README.md for how to save
+a baseline and fail on regressions.
+
+Benchmarks:
+-------------
+1. **test_bench_create_container**: POST /orchestrator/containers
+2. **test_bench_list_containers**: GET /orchestrator/containers (whole list)
+3. **test_bench_list_containers_page**: GET /orchestrator/containers?limit=100
+4. **test_bench_list_containers_not_modified**: GET /orchestrator/containers with a current If-None-Match (304)
+5. **test_bench_get_container**: GET /orchestrator/containers/<id>
+6. **test_bench_update_container**: PUT /orchestrator/containers/<id>
+7. **test_bench_delete_container**: DELETE /orchestrator/containers/<id>
+8. **test_bench_login**: POST /auth/login
+9. **test_bench_protected**: GET /protected with a valid token
+10. **test_bench_read_heavy_listing**: 1 PUT + 9 whole-list GETs, with and without the listing cache
+11. **test_bench_healthz**: GET /healthz
+12. **test_bench_readyz**: GET /readyz
+"""
+import pytest
+
+from tools.api import create_app
+
+
+@pytest.mark.usefixtures('seeded_db')
+def test_bench_create_container(benchmark, test_client):
+    """
+    Time creating a container
+    """
+    def create():
+        return test_client.post('/orchestrator/containers', json={'Hostname': 'bench', 'Image': 'ubuntu'})
+
+    assert benchmark(create).status_code == 201
+
+
+def test_bench_list_containers(benchmark, test_client, seeded_db):
+    """
+    Time listing every container
+    """
+    response = benchmark(test_client.get, '/orchestrator/containers')
+    assert response.status_code == (200 if len(seeded_db) else 400)
+
+
+def test_bench_list_containers_page(benchmark, test_client, seeded_db):
+    """
+    Time listing the first page of containers
+    """
+    response = benchmark(test_client.get, '/orchestrator/containers?limit=100')
+    assert response.status_code == (200 if len(seeded_db) else 400)
+
+
+def test_bench_list_containers_not_modified(benchmark, test_client, seeded_db):
+    """
+    Time a dashboard poll whose cached listing is still current
+    """
+    seeded_db.create({'Hostname': 'bench', 'Entrypoint': '', 'Image': 'ubuntu'})
+    headers = {'If-None-Match': test_client.get('/orchestrator/containers?limit=1').headers['ETag']}
+    response = benchmark(test_client.get, '/orchestrator/containers', headers=headers)
+    assert response.status_code == 304
+
+
+def test_bench_get_container(benchmark, test_client, seeded_db):
+    """
+    Time reading one container by ID
+    """
+    container_id = seeded_db.create({'Hostname': 'bench', 'Entrypoint': '', 'Image': 'ubuntu'})['id']
+    response = benchmark(test_client.get, f'/orchestrator/containers/{container_id}')
+    assert response.status_code == 200
+
+
+def test_bench_update_container(benchmark, test_client, seeded_db):
+    """
+    Time updating one container
+    """
+    container_id = seeded_db.create({'Hostname': 'bench', 'Entrypoint': '', 'Image': 'ubuntu'})['id']
+    response = benchmark(test_client.put, f'/orchestrator/containers/{container_id}', json={'Entrypoint': '/run.sh'})
+    assert response.status_code == 200
+
+
+def test_bench_delete_container(benchmark, test_client, seeded_db):
+    """
+    Time deleting a container (a fresh one is created before every round)
+    """
+    def setup():
+        container_id = seeded_db.create({'Hostname': 'bench', 'Entrypoint': '', 'Image': 'ubuntu'})['id']
+        return (f'/orchestrator/containers/{container_id}',), {}
+
+    response = benchmark.pedantic(test_client.delete, setup=setup, rounds=200)
+    assert response.status_code == 200
+
+
+def test_bench_login(benchmark, test_client):
+    """
+    Time issuing a token
+    """
+    credentials = {'username': 'testuser', 'password': 'testpassword'}
+    response = benchmark(test_client.post, '/auth/login', json=credentials)
+    assert response.status_code == 200
+
+
+def test_bench_protected(benchmark, test_client, auth_headers):
+    """
+    Time a protected request with a valid token
+    """
+    response = benchmark(test_client.get, '/protected', headers=auth_headers)
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize('cache_size', [0, 10 ** 6], ids=['uncached', 'cached'])
+def test_bench_read_heavy_listing(benchmark, db_size, cache_size):
+    """
+    Time a dashboard-like mix: one update, then nine pollers reading the whole list
+    """
+    app = create_app({'TESTING': True, 'LISTING_CACHE_SIZE': cache_size})
+    app.extensions['btf_store'].create_many([
+        {'Hostname': f'container-{i}', 'Entrypoint': '', 'Image': 'ubuntu'} for i in range(db_size + 1)
+    ])
+    client = app.test_client()
+
+    def mix():
+        client.put('/orchestrator/containers/1', json={'Entrypoint': '/run.sh'})
+        return [client.get('/orchestrator/containers').status_code for _ in range(9)]
+
+    assert benchmark(mix) == [200] * 9
+
+
+@pytest.mark.usefixtures('seeded_db')
+def test_bench_healthz(benchmark, test_client):
+    """
+    Time the liveness probe (flat across database sizes)
+    """
+    assert benchmark(test_client.get, '/healthz').status_code == 200
+
+
+@pytest.mark.usefixtures('seeded_db')
+def test_bench_readyz(benchmark, test_client):
+    """
+    Time the readiness probe (flat across database sizes)
+    """
+    assert benchmark(test_client.get, '/readyz').status_code == 200
@@ -0,0 +1,70 @@
+"""
+Encode/decode cost of the JSON providers (JSON_PROVIDER 'stdlib' vs 'orjson').
+
+Benchmarks:
+-------------
+1. **test_bench_json_encode_listing**: jsonify of a container listing (10k and 100k containers)
+2. **test_bench_json_decode_listing**: loads of the same listing
+3. **test_bench_json_large_payload**: decode + encode of a payload with Hostname and Entrypoint at their length limits (FIELD_LENGTH_LIMITS)
+4. **test_bench_json_create_large_payload**: POST /orchestrator/containers with that payload (201)
+"""
+import pytest
+from flask import jsonify
+
+from tools.api import create_app
+
+LARGE_PAYLOAD = {'Hostname': 'a' * 512, 'Entrypoint': 'b' * 4096, 'Image': 'ubuntu'}
+
+
+@pytest.fixture(name='json_app', params=['stdlib', 'orjson'])
+def fixture_json_app(request):
+    """App using the JSON provider under test"""
+    if request.param == 'orjson':
+        pytest.importorskip('orjson')
+    return create_app({'TESTING': True, 'JSON_PROVIDER': request.param, 'LISTING_CACHE_SIZE': 0})
+
+
+def _listing(size):
+    return [{'id': i, 'Hostname': f'container-{i}', 'Entrypoint': '', 'Image': 'ubuntu'} for i in range(1, size + 1)]
+
+
+@pytest.mark.parametrize('size', [10000, 100000], ids=['10k-containers', '100k-containers'])
+def test_bench_json_encode_listing(benchmark, json_app, size):
+    """
+    Time encoding a listing response
+    """
+    containers = _listing(size)
+    with json_app.app_context():
+        response = benchmark(jsonify, containers)
+    assert response.data.startswith(b'[{"Entrypoint":""')
+
+
+@pytest.mark.parametrize('size', [10000, 100000], ids=['10k-containers', '100k-containers'])
+def test_bench_json_decode_listing(benchmark, json_app, size):
+    """
+    Time decoding a listing, as a client or a :batch request would
+    """
+    with json_app.app_context():
+        body = jsonify(_listing(size)).data
+    assert len(benchmark(json_app.json.loads, body)) == size
+
+
+def test_bench_json_large_payload(benchmark, json_app):
+    """
+    Time decoding and re-encoding the large create payload
+    """
+    body = create_app({'JSON_PROVIDER': 'stdlib'}).json.dumps(LARGE_PAYLOAD)
+
+    def round_trip():
+        return json_app.json.dumps(json_app.json.loads(body), separators=(',', ':'))
+
+    assert len(benchmark(round_trip)) > 3072
+
+
+def test_bench_json_create_large_payload(benchmark, json_app):
+    """
+    Time creating a container from the large payload through the handler
+    """
+    client = json_app.test_client()
+    response = benchmark(client.post, '/orchestrator/containers', json=LARGE_PAYLOAD)
+    assert response.status_code == 201
@@ -0,0 +1,62 @@
+"""
+Cost of asymmetric tokens: parsing keys per request against parsed key objects, and HS256 against RS256 and EdDSA.
+
+The per-request work of an authenticated call is one signature check; parsing a PEM
+key on top of it (what jwt.decode does when given the PEM text) is avoided by
+KeySet, which parses every key once. JWT_CACHE_SIZE is 0 so each request verifies.
+
+Benchmarks:
+-------------
+1. **test_bench_decode_key**: token verifications per second with a PEM key against a parsed key object
+2. **test_bench_protected_rps**: logins and protected requests per second for each algorithm
+"""
+import jwt
+import pytest
+
+from tools.api import create_app
+from tools.jwt_keys import KeySet
+
+pytest.importorskip('cryptography')
+
+from cryptography.hazmat.primitives import serialization  # pylint: disable=wrong-import-position,wrong-import-order
+
+
+def _decodes(token, key, algorithm, count):
+    for _ in range(count):
+        jwt.decode(token, key, algorithms=[algorithm])
+
+
+@pytest.mark.parametrize('key_form', ['pem', 'parsed'])
+@pytest.mark.parametrize('algorithm', ['RS256', 'EdDSA'])
+def test_bench_decode_key(benchmark, algorithm, key_form):
+    """
+    Verifications per second
+    """
+    keys = KeySet(algorithm)
+    token = keys.sign({'username': 'probe', 'role': 'user'})
+    key = keys.verification_key(token)
+    if key_form == 'pem':
+        key = key.public_bytes(serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo)
+    count = 500
+    benchmark.pedantic(_decodes, args=(token, key, algorithm, count), rounds=3, iterations=1)
+    if benchmark.stats:  # None under --benchmark-disable
+        benchmark.extra_info['decodes_per_second'] = round(count / benchmark.stats.stats.mean)
+
+
+def _requests(client, count):
+    for _ in range(count):
+        token = client.post('/auth/login', json={'username': 'testuser', 'password': 'testpassword'}).json['token']
+        response = client.get('/protected', headers={'Authorization': f'Bearer {token}'})
+        assert response.status_code == 200
+
+
+@pytest.mark.parametrize('algorithm', ['HS256', 'RS256', 'EdDSA'])
+def test_bench_protected_rps(benchmark, algorithm):
+    """
+    Login and protected request pairs per second
+    """
+    client = create_app({'TESTING': True, 'JWT_ALGORITHM': algorithm, 'JWT_CACHE_SIZE': 0}).test_client()
+    count = 200
+    benchmark.pedantic(_requests, args=(client, count), rounds=3, iterations=1)
+    if benchmark.stats:  # None under --benchmark-disable
+        benchmark.extra_info['pairs_per_second'] = round(count / benchmark.stats.stats.mean)
@@ -0,0 +1,39 @@
+"""
+Login throughput of POST /auth/login: password hash cost against token reuse.
+
+A probe logs in again and again as one account whose password was hashed with
+1000 (the mock accounts) or 600000 PBKDF2 iterations (the default for new hashes).
+With LOGIN_TOKEN_REUSE set, repeated logins skip both the hash and the signature.
+
+Benchmarks:
+-------------
+1. **test_bench_login_rps**: logins per second for each hash cost, with and without LOGIN_TOKEN_REUSE
+"""
+import pytest
+
+from tools.api import create_app
+from tools.users import hash_password
+
+
+def _logins(client, count):
+    for _ in range(count):
+        response = client.post('/auth/login', json={'username': 'probe', 'password': 'probe-password'})
+        assert response.status_code == 200
+
+
+@pytest.mark.parametrize('reuse', [0, 60], ids=['sign-every-login', 'reuse-60s'])
+@pytest.mark.parametrize('iterations', [1000, 600000], ids=lambda iterations: f'{iterations}-iterations')
+def test_bench_login_rps(benchmark, iterations, reuse):
+    """
+    Logins per second
+    """
+    client = create_app({
+        'TESTING': True,
+        'LOGIN_TOKEN_REUSE': reuse,
+        'USERS': [{'username': 'probe', 'role': 'user', 'password_hash': hash_password('probe-password', iterations)}],
+    }).test_client()
+    count = 10 if iterations > 100000 and not reuse else 500
+    _logins(client, 1)  # the token to reuse
+    benchmark.pedantic(_logins, args=(client, count), rounds=3, iterations=1)
+    if benchmark.stats:  # None under --benchmark-disable
+        benchmark.extra_info['logins_per_second'] = round(count / benchmark.stats.stats.mean)
@@ -0,0 +1,67 @@
+"""
+Cost of the request metrics (METRICS_ENABLED) on the request path.
+
+Benchmarks:
+-------------
+1. **test_bench_metrics_get_container**: GET /orchestrator/containers/<id> with the metrics on and off
+2. **test_bench_metrics_scrape**: GET /metrics after traffic on every route
+3. **test_metrics_overhead**: interleaved on/off rounds of the same requests; records the overhead without asserting on it
+"""
+import gc
+import time
+
+import pytest
+
+from tools.api import create_app
+
+ROUNDS = 60
+REQUESTS_PER_ROUND = 100
+
+
+def _client(metrics_enabled):
+    """Client of an app with one container; no `with`, so each request is recorded as it ends"""
+    app = create_app({'TESTING': True, 'METRICS_ENABLED': metrics_enabled})
+    app.extensions['btf_store'].create({'Hostname': 'bench', 'Entrypoint': '', 'Image': 'ubuntu'})
+    return app.test_client()
+
+
+@pytest.mark.parametrize('metrics_enabled', [False, True], ids=['metrics-off', 'metrics-on'])
+def test_bench_metrics_get_container(benchmark, metrics_enabled):
+    """
+    Time reading a container with and without the metrics hooks
+    """
+    client = _client(metrics_enabled)
+    assert benchmark(client.get, '/orchestrator/containers/1').status_code == 200
+
+
+def test_bench_metrics_scrape(benchmark):
+    """
+    Time rendering the metrics
+    """
+    client = _client(True)
+    for path in ['/orchestrator/containers', '/orchestrator/containers/1', '/orchestrator/containers/2', '/protected', '/missing']:
+        for _ in range(10):
+            client.get(path)
+    response = benchmark(client.get, '/metrics')
+    assert b'btf_http_request_duration_seconds_bucket' in response.data
+
+
+def test_metrics_overhead(record_property):
+    """
+    Compare the fastest of interleaved on/off rounds, so machine noise hits both sides alike
+    """
+    clients = [(enabled, _client(enabled)) for enabled in (False, True)]
+    best = {False: float('inf'), True: float('inf')}
+    gc.disable()
+    try:
+        for round_number in range(ROUNDS):
+            for enabled, client in clients[::-1] if round_number % 2 else clients:
+                start = time.perf_counter()
+                for _ in range(REQUESTS_PER_ROUND):
+                    client.get('/orchestrator/containers/1')
+                best[enabled] = min(best[enabled], time.perf_counter() - start)
+    finally:
+        gc.enable()
+    overhead = best[True] / best[False] - 1
+    record_property('overhead', round(overhead, 4))
+    record_property('us_per_request', [round(best[enabled] / REQUESTS_PER_ROUND * 1e6, 1) for enabled in (False, True)])
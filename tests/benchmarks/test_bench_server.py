@@ -0,0 +1,55 @@
+"""
+Throughput of the preforking server (tools/server.py) as worker processes are added.
+
+Each run drives a read-mostly mix (get=8,list=1,update=1 over 1000+ containers) with
+tools.loadgen against `python3 -m tools.server api --workers N` over one SQLite file.
+Requests per second go up with the workers until they outnumber the free cores
+(the load generator needs one too); on a single core they stay flat.
+
+Benchmarks:
+-------------
+1. **test_bench_prefork_throughput**: load run with 1, 2 and 4 workers, RPS in extra_info
+2. **test_prefork_scales_with_cores**: 2 workers vs 1 on a machine with 4+ cores; fails under 1.4x
+"""
+import os
+
+import pytest
+
+from tools.loadgen import local_prefork_server, run_load
+
+MIX = 'get=8,list=1,update=1'
+SEED_COUNT = 1000
+CONCURRENCY = 16
+DURATION = 5.0
+
+
+def _throughput(workers):
+    """Overall RPS of one load run against workers processes"""
+    with local_prefork_server(workers=workers, threads=4) as base_url:
+        # Warm up every worker (imports, SQLite connections, listing cache) before measuring
+        run_load(base_url, concurrency=CONCURRENCY, duration=1.0, mix=MIX, seed_count=SEED_COUNT)
+        results = run_load(base_url, concurrency=CONCURRENCY, duration=DURATION, mix=MIX, seed_count=SEED_COUNT)
+    assert results['overall']['errors'] == 0
+    assert set(results['overall']['status_codes']) == {'200'}
+    return results['overall']['rps']
+
+
+@pytest.mark.parametrize('workers', [1, 2, 4], ids=lambda workers: f'{workers}-workers')
+def test_bench_prefork_throughput(benchmark, workers):
+    """
+    Requests per second with workers processes
+    """
+    rps = benchmark.pedantic(_throughput, args=(workers,), rounds=1, iterations=1)
+    benchmark.extra_info['rps'] = rps
+    benchmark.extra_info['cpu_count'] = os.cpu_count()
+
+
+@pytest.mark.skipif((os.cpu_count() or 1) < 4, reason='needs 4+ cores: 2 workers, the load generator and headroom')
+def test_prefork_scales_with_cores(record_property):
+    """
+    Two workers must serve clearly more than one
+    """
+    single, double = _throughput(1), _throughput(2)
+    record_property('rps_1_worker', single)
+    record_property('rps_2_workers', double)
+    assert double > 1.4 * single
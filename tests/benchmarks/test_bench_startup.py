@@ -0,0 +1,53 @@
+"""
+Start-up cost of the two servers: a fresh interpreter imports the module and calls create_app().
+Wall time is the benchmark figure; import time, create_app() time and peak RSS are in extra_info.
+"""
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+# ru_maxrss of a child can carry over the parent's peak from before exec(), so
+# Linux reads the high-water mark of the new image from /proc instead
+PROBE = '''
+import json, resource, sys, time
+def max_rss_kb():
+    try:
+        with open('/proc/self/status', encoding='ascii') as status:
+            return next(int(line.split()[1]) for line in status if line.startswith('VmHWM:'))
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+import {module} as server
+imported = time.perf_counter()
+server.create_app()
+built = time.perf_counter()
+print(json.dumps({{
+    'import_ms': (imported - start) * 1000,
+    'create_app_ms': (built - imported) * 1000,
+    'max_rss_kb': max_rss_kb(),
+    'flask_restx': 'flask_restx' in sys.modules,
+}}))
+'''
+
+
+def _start(module):
+    result = subprocess.run(
+        [sys.executable, '-c', PROBE.format(module=module)],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout)
+
+
+@pytest.mark.parametrize('module', ['tools.api', 'tools.openapi'])
+def test_bench_startup(benchmark, module):
+    """
+    Interpreter start, import and create_app() of one server
+    """
+    probe = benchmark.pedantic(_start, args=(module,), rounds=5, iterations=1)
+    benchmark.extra_info.update(probe)
+    assert probe['flask_restx'] == (module == 'tools.openapi')
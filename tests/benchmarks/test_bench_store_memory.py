@@ -0,0 +1,61 @@
+"""
+Memory per container of the in-memory stores, and what the compact records cost on reads.
+
+Containers are created from parsed JSON bodies, as the handlers do, with unique
+hostnames and one of five images. Bytes per container (tracemalloc, store plus
+indexes) are in extra_info; the benchmark figure is the time to create them.
+
+Benchmarks:
+-------------
+1. **test_bench_store_memory**: 100000 creates on 'dict', 'locked' and 'compact', bytes_per_container in extra_info
+2. **test_bench_store_listing**: values() of 100000 containers, copied out as dicts
+"""
+import gc
+import json
+import tracemalloc
+
+import pytest
+
+from tools.storage import create_store
+
+COUNT = 100000
+IMAGES = ['ubuntu', 'nginx', 'redis', 'postgres', 'alpine']
+BODIES = [
+    json.dumps({'Hostname': f'host-{i:07d}.btf.example', 'Entrypoint': '/bin/sh', 'Image': IMAGES[i % len(IMAGES)]})
+    for i in range(COUNT)
+]
+
+
+def _fill(store):
+    for body in BODIES:
+        store.create(json.loads(body))
+    return store
+
+
+@pytest.mark.parametrize('backend', ['dict', 'locked', 'compact'])
+def test_bench_store_memory(benchmark, backend):
+    """
+    Creating COUNT containers, and the memory they take
+    """
+    benchmark.pedantic(_fill, setup=lambda: ((create_store(backend),), {}), rounds=3, iterations=1)
+
+    store = create_store(backend)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        _fill(store)
+        gc.collect()
+        allocated = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    benchmark.extra_info['bytes_per_container'] = round(allocated / COUNT)
+
+
+@pytest.mark.parametrize('backend', ['locked', 'compact'])
+def test_bench_store_listing(benchmark, backend):
+    """
+    Copying every container out of a thread-safe store
+    """
+    store = _fill(create_store(backend))
+    records = benchmark(store.values)
+    assert len(records) == COUNT
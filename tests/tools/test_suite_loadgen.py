@@ -0,0 +1,78 @@
+"""
+Test Suite for the load generator (tools/loadgen.py).
+
+Test Cases:
+-------------
+1. **test_parse_mix**:
+    - Verifies that request mixes are parsed into weights and invalid mixes are rejected.
+
+2. **test_percentile**:
+    - Verifies the nearest-rank percentile used for latency and TTFB figures.
+
+3. **test_run_load_against_local_server**:
+    - Runs a short load against a locally started API server and verifies the report structure and status codes.
+
+4. **test_compare_with_baseline**:
+    - Verifies the relative change computed against a baseline run.
+"""
+import json
+
+import pytest
+
+from tools.api import create_app
+from tools.loadgen import compare, local_server, parse_mix, percentile, run_load
+
+
+def test_parse_mix():
+    """
+    Test parsing request mixes
+    """
+    assert parse_mix('create=2, get=4,list') == {'create': 2, 'get': 4, 'list': 1}
+    for mix in ('create=1,patch=1', 'get=0', 'get=-1', ''):
+        with pytest.raises(ValueError):
+            parse_mix(mix)
+
+
+def test_percentile():
+    """
+    Test nearest-rank percentiles
+    """
+    samples = list(range(1, 101))
+    assert percentile(samples, 50) == 50
+    assert percentile(samples, 95) == 95
+    assert percentile(samples, 99) == 99
+    assert percentile([7], 99) == 7
+    assert percentile([], 50) == 0.0
+
+
+def test_run_load_against_local_server(tmp_path):
+    """
+    Test a short offline load run
+    """
+    with local_server(create_app({'TESTING': True})) as base_url:
+        results = run_load(base_url, concurrency=1, duration=0.5, seed_count=20)
+
+    overall = results['overall']
+    assert overall['requests'] > 0
+    assert overall['errors'] == 0
+    assert set(overall['status_codes']) <= {'200', '201'}
+    assert set(results['operations']) == {'create', 'get', 'list', 'update', 'delete'}
+    for key in ('rps', 'latency_p50_ms', 'latency_p95_ms', 'latency_p99_ms', 'ttfb_p50_ms', 'ttfb_p95_ms', 'ttfb_p99_ms'):
+        assert key in overall
+    assert overall['ttfb_p50_ms'] <= overall['latency_p50_ms']
+
+    # Results are plain JSON so runs can be compared between commits
+    path = tmp_path / 'results.json'
+    path.write_text(json.dumps(results), encoding='utf-8')
+    assert json.loads(path.read_text(encoding='utf-8'))['meta']['seed_count'] == 20
+
+
+def test_compare_with_baseline():
+    """
+    Test relative changes against a baseline
+    """
+    row = {'rps': 100.0, 'latency_p50_ms': 2.0, 'latency_p95_ms': 4.0, 'latency_p99_ms': 8.0, 'ttfb_p95_ms': 3.0}
+    faster = dict(row, rps=150.0, latency_p95_ms=2.0)
+    comparison = compare({'overall': faster, 'operations': {'get': row}}, {'overall': row, 'operations': {}})
+    assert comparison == {'overall': {'rps': 50.0, 'latency_p50_ms': 0.0, 'latency_p95_ms': -50.0,
+                                      'latency_p99_ms': 0.0, 'ttfb_p95_ms': 0.0}}
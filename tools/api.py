@@ -1,26 +1,290 @@
 """Basic Flask API for testing"""
-from datetime import datetime, timedelta
-from functools import wraps
-from flask import Flask, jsonify, request
+import os
+import sys
+import time
+from io import BytesIO
+from functools import lru_cache, partial, wraps
+from flask import Blueprint, Flask, Response, current_app, jsonify, make_response, request
+from werkzeug.exceptions import RequestEntityTooLarge
 
 import jwt
 
+from tools.pagination import encode_cursor, next_page_url, parse_page_args
+from tools.json_provider import create_json_provider
+from tools.metrics import PROMETHEUS_MIMETYPE, init_app as init_metrics
+from tools.containers import CONTAINERS_EMPTY, CONTAINER_NOT_FOUND, FIELD_LENGTH_LIMITS, ContainerError, ContainerService, etag_matches
+from tools.streaming import JSON_MIMETYPE, NDJSON_MIMETYPE, iter_json_array, iter_ndjson
+from tools.jwt_keys import ASYMMETRIC_ALGORITHMS, KeySet, load_key_directory
+from tools.token_cache import IssuedTokenCache, TokenCache
+from tools.users import DEFAULT_ITERATIONS, MOCK_USERS, MemoryUserStore
+
+bp = Blueprint('orchestrator', __name__)
+
+# Probe bodies are encoded once, so answering a probe does no serialization
+HEALTHY_BODY = b'{"status":"ok"}\n'
+READY_BODY = b'{"status":"ready","store":"reachable"}\n'
+NOT_READY_BODY = b'{"status":"unavailable","store":"unreachable"}\n'
+
+DEFAULT_CONFIG = {
+    'SECRET_KEY': 'your_secret_key',
+    # 'HS256' signs with SECRET_KEY; an asymmetric algorithm such as 'RS256' or 'EdDSA'
+    # signs with JWT_KEYS and publishes the public keys on /.well-known/jwks.json
+    'JWT_ALGORITHM': os.environ.get('BTF_JWT_ALGORITHM', 'HS256'),
+    # Asymmetric keys, oldest first (see tools/jwt_keys.py): dicts with a PEM 'private_key' or
+    # 'public_key' and optionally a 'kid', plus the '<kid>.pem' files of JWT_KEYS_DIR
+    'JWT_KEYS': [],
+    'JWT_KEYS_DIR': os.environ.get('BTF_JWT_KEYS_DIR'),
+    # Verified tokens kept by token_required (0 disables the cache)
+    'JWT_CACHE_SIZE': 1024,
+    # Lifetime in seconds of the tokens signed by /auth/login
+    'JWT_LIFETIME': 30 * 60,
+    # Accounts allowed to log in (see tools/users.py): dicts with 'username', 'role', 'user_id'
+    # and a 'password_hash', or a plain 'password' hashed with PASSWORD_HASH_ITERATIONS
+    'USERS': MOCK_USERS,
+    'PASSWORD_HASH_ITERATIONS': DEFAULT_ITERATIONS,
+    # A tools.users.UserStore to log users in against instead of USERS
+    'USER_STORE': None,
+    # Seconds during which a repeated login of a user gets the same token back (0 signs a new one every time)
+    'LOGIN_TOKEN_REUSE': 0,
+    # Storage backend: 'dict' (default), 'locked', 'compact', 'durable' or 'sqlite'
+    'STORE_BACKEND': os.environ.get('BTF_STORE', 'dict'),
+    'SQLITE_PATH': os.environ.get('BTF_SQLITE_PATH'),
+    # 'durable' store: directory of its log and snapshot, when the log is fsynced
+    # ('always', 'interval' or 'never', see tools/wal.py) and log entries between snapshots
+    'DURABLE_PATH': os.environ.get('BTF_DURABLE_PATH'),
+    'WAL_FSYNC': 'interval',
+    'WAL_FSYNC_INTERVAL': 1.0,
+    'SNAPSHOT_EVERY': 100000,
+    # Reject containers whose Hostname is already taken (checked through the Hostname index)
+    'UNIQUE_HOSTNAMES': False,
+    # Largest number of items accepted by the :batch endpoints
+    'MAX_BATCH_SIZE': 10000,
+    # Largest request body in bytes: bigger ones get 413 as soon as their headers arrive
+    'MAX_CONTENT_LENGTH': 8 * 1024 * 1024,
+    # Largest container field values (413 beyond), None or {} for no limit
+    'MAX_FIELD_LENGTHS': FIELD_LENGTH_LIMITS,
+    # Encoded containers kept for listings (0 disables the listing cache)
+    'LISTING_CACHE_SIZE': 100000,
+    # JSON encoder/decoder: 'stdlib' (default) or 'orjson' (stdlib when orjson is not installed)
+    'JSON_PROVIDER': os.environ.get('BTF_JSON', 'stdlib'),
+    # Request metrics served on /metrics for Prometheus
+    'METRICS_ENABLED': True,
+}
+
+
+def create_app(config=None):
+    """
+    Build an independent API instance with its own container store and token cache.
+
+    Args:
+        config (dict): Overrides for DEFAULT_CONFIG.
+
+    Returns:
+        Flask: The configured application.
+    """
+    flask_app = Flask(__name__)
+    flask_app.config.update(DEFAULT_CONFIG)
+    flask_app.config.update(config or {})
+    flask_app.json = create_json_provider(flask_app, flask_app.config['JSON_PROVIDER'])
+    # Container service and its store
+    flask_app.extensions['btf_containers'] = ContainerService.from_config(flask_app.config)
+    flask_app.extensions['btf_store'] = flask_app.extensions['btf_containers'].store
+    # Verified JWT payloads, invalidated on expiry and when the key changes
+    flask_app.extensions['btf_token_cache'] = TokenCache(maxsize=flask_app.config['JWT_CACHE_SIZE'])
+    # Parsed asymmetric keys (None with HS256)
+    flask_app.extensions['btf_jwt_keys'] = create_key_set(flask_app.config)
+    # Accounts and the tokens recently signed for them
+    flask_app.extensions['btf_users'] = flask_app.config['USER_STORE'] or MemoryUserStore(
+        flask_app.config['USERS'], iterations=flask_app.config['PASSWORD_HASH_ITERATIONS']
+    )
+    flask_app.extensions['btf_issued_tokens'] = IssuedTokenCache(window=flask_app.config['LOGIN_TOKEN_REUSE'])
+    if flask_app.config['METRICS_ENABLED']:
+        # Before the blueprint, so its hooks run first
+        store = flask_app.extensions['btf_store']
+        init_metrics(flask_app).add_gauge('btf_containers', 'Containers in the store.', lambda: len(store))
+    flask_app.register_blueprint(bp)
+    return flask_app
+
+
+def get_service():
+    """
+    Container service of the current application
+    """
+    return current_app.extensions['btf_containers']
+
+
+def create_key_set(config):
+    """
+    KeySet of config['JWT_KEYS'] and config['JWT_KEYS_DIR'], None for a shared-secret algorithm
+    """
+    if config['JWT_ALGORITHM'] not in ASYMMETRIC_ALGORITHMS:
+        return None
+    keys = list(config['JWT_KEYS'])
+    if config['JWT_KEYS_DIR']:
+        keys += load_key_directory(config['JWT_KEYS_DIR'])
+    return KeySet(config['JWT_ALGORITHM'], keys)
+
+
+def jwt_key_id():
+    """
+    Identifies the keys tokens are signed and verified with, for the token caches
+    """
+    keys = current_app.extensions['btf_jwt_keys']
+    if keys is None:
+        return (current_app.config['SECRET_KEY'], current_app.config['JWT_ALGORITHM'])
+    return (keys.algorithm, keys.version)
+
+
+def get_token_cache():
+    """
+    JWT verification cache of the current application
+    """
+    return current_app.extensions['btf_token_cache']
+
+
+def auth_failure(reason):
+    """
+    Count a rejected login or token in the metrics (when enabled)
+    """
+    metrics = current_app.extensions.get('btf_metrics')
+    if metrics is not None:
+        metrics.auth_failure(reason)
+
+
+def read_batch():
+    """
+    Items of a :batch request, sent as a JSON array or as NDJSON.
+    Raises ValueError with the error message for malformed bodies.
+    """
+    if request.mimetype == NDJSON_MIMETYPE:
+        try:
+            items = [current_app.json.loads(line) for line in request.get_data(as_text=True).splitlines() if line.strip()]
+        except ValueError:
+            raise ValueError('Bad request. Invalid NDJSON body.') from None
+    else:
+        items = request.get_json()
+    if not isinstance(items, list):
+        raise ValueError('Bad request. Expected a list of items.')
+    if len(items) > current_app.config['MAX_BATCH_SIZE']:
+        raise ValueError(f'Bad request. A batch is limited to {current_app.config["MAX_BATCH_SIZE"]} items.')
+    return items
+
+
+def if_match_tags():
+    """
+    Entity tags of the If-Match header ('*' included for a wildcard), None without the header
+    """
+    if_match = request.if_match
+    if if_match.star_tag:
+        return frozenset(('*',))
+    return if_match.as_set() if if_match else None
+
+
+def if_none_match_tags():
+    """
+    Entity tags of the If-None-Match header, weak ones included (GET compares weakly)
+    """
+    if_none_match = request.if_none_match
+    if if_none_match.star_tag:
+        return frozenset(('*',))
+    return if_none_match.as_set(include_weak=True) if if_none_match else None
+
+
+def tagged(response, etag):
+    """
+    Set the (strong) ETag of a response
+    """
+    response.set_etag(etag)
+    return response
+
+
+def not_modified(etag):
+    """
+    Empty 304 answer to a conditional GET whose cached copy is still current
+    """
+    return tagged(Response(status=304), etag)
+
+
+def vary_on(header):
+    """
+    Name header in the Vary of every response of a view (its representation depends on it)
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            response = make_response(f(*args, **kwargs))
+            response.vary.add(header)
+            return response
+        return decorated
+    return decorator
+
+
+def probe_response(body, status=200):
+    """
+    Pre-encoded probe answer that proxies and clients must not cache
+    """
+    return Response(body, status=status, mimetype=JSON_MIMETYPE, headers={'Cache-Control': 'no-store'})
+
+
+def batch_status(results):
+    """
+    200 when every item succeeded, 207 (Multi-Status) otherwise
+    """
+    return 200 if all(result['status'] < 300 for result in results) else 207
+
+
+def listing_stream_format():
+    """
+    Streaming mode requested for a listing: 'ndjson', 'json' or None.
+    Chosen through ?stream=ndjson|json or 'Accept: application/x-ndjson'.
+    """
+    stream = request.args.get('stream')
+    if stream is not None:
+        if stream not in ('ndjson', 'json'):
+            raise ValueError('Bad request. "stream" must be "ndjson" or "json".')
+        return stream
+    if request.accept_mimetypes.best_match([JSON_MIMETYPE, NDJSON_MIMETYPE]) == NDJSON_MIMETYPE:
+        return 'ndjson'
+    return None
+
+
+def compact_dumps():
+    """
+    Encoder of one record as jsonify writes it in compact mode
+    """
+    return partial(current_app.json.dumps, separators=(',', ':'))
 
-app = Flask(__name__)
 
-# Configuration
-app.config['SECRET_KEY'] = 'your_secret_key'
-app.config['JWT_ALGORITHM'] = 'HS256'
+def listing_cache():
+    """
+    Listing cache of the current application, None while disabled or when jsonify pretty-prints
+    """
+    cache = get_service().listing_cache
+    compact = getattr(current_app.json, 'compact', None)
+    if compact is None:
+        compact = not current_app.debug
+    return cache if cache.enabled and compact else None
+
 
-# In-memory database
-db = {}
+def json_array(records):
+    """
+    Response holding records as a JSON array, encoded through the listing cache when it is enabled
+    """
+    cache = listing_cache()
+    if cache is None:
+        return jsonify(records)
+    return Response(cache.encode_array(records, compact_dumps()), mimetype=JSON_MIMETYPE)
 
 
-def get_next_id():
+def stream_containers(records, stream_format):
     """
-    Helper function to generate next ID for simplicity
+    Generator-backed response encoding containers as they are read from the store.
+    The listing cache is bypassed so memory stays flat whatever the store size.
     """
-    return max(db.keys(), default=0) + 1
+    dumps = compact_dumps()
+    if stream_format == 'ndjson':
+        return Response(iter_ndjson(records, dumps), mimetype=NDJSON_MIMETYPE)
+    return Response(iter_json_array(records, dumps), mimetype=JSON_MIMETYPE)
 
 
 def token_required(f):
@@ -31,14 +295,23 @@ def token_required(f):
     def decorated(*args, **kwargs):
         token = request.headers.get('Authorization', None)
         if not token:
+            auth_failure('missing_token')
             return jsonify({'error': 'Authorization header is missing'}), 401
         try:
             token = token.split()[1]  # Expect "Bearer <token>"
-            payload = jwt.decode(token, app.config['SECRET_KEY'], algorithms=[app.config['JWT_ALGORITHM']])
+            key = jwt_key_id()
+            payload = get_token_cache().get(token, key)
+            if payload is None:
+                keys = current_app.extensions['btf_jwt_keys']
+                verification_key = current_app.config['SECRET_KEY'] if keys is None else keys.verification_key(token)
+                payload = jwt.decode(token, verification_key, algorithms=[current_app.config['JWT_ALGORITHM']])
+                get_token_cache().put(token, payload, key)
             request.user = payload  # Attach user info to the request
         except jwt.ExpiredSignatureError:
+            auth_failure('expired_token')
             return jsonify({'error': 'Invalid or expired token'}), 401
         except jwt.InvalidTokenError:
+            auth_failure('invalid_token')
             return jsonify({'error': 'Invalid or expired token'}), 401
         return f(*args, **kwargs)
     return decorated
@@ -53,13 +326,14 @@ def role_required(role):
         def decorated(*args, **kwargs):
             user_role = request.user.get('role')
             if user_role != role:
+                auth_failure('forbidden')
                 return jsonify({'error': 'Forbidden'}), 403
             return f(*args, **kwargs)
         return decorated
     return decorator
 
 
-@app.route('/auth/login', methods=['POST'])
+@bp.route('/auth/login', methods=['POST'])
 def login():
     """
     LOGIN: Authenticate a user and return a JWT token
@@ -68,111 +342,214 @@ def login():
     username = data.get('username')
     password = data.get('password')
 
-    # Mock user credentials check
-    if username == 'testuser' and password == 'testpassword':
-        token = jwt.encode(
-            {
-                'user_id': 1,
-                'username': username,
-                'role': 'user',
-                'exp': datetime.utcnow() + timedelta(minutes=30)
-            },
-            app.config['SECRET_KEY'],
-            algorithm=app.config['JWT_ALGORITHM']
-        )
+    users = current_app.extensions['btf_users']
+    issued = current_app.extensions['btf_issued_tokens']
+    key = jwt_key_id()
+    # A repeated login within LOGIN_TOKEN_REUSE skips the password hash and the signature
+    token = issued.get(users.get(username), password, key) if issued.window > 0 else None
+    if token is not None:
         return jsonify({'token': token}), 200
 
-    if username == 'admin' and password == 'adminpassword':
-        token = jwt.encode(
-            {
-                'user_id': 2,
-                'username': username,
-                'role': 'admin',
-                'exp': datetime.utcnow() + timedelta(minutes=30)
-            },
-            app.config['SECRET_KEY'],
-            algorithm=app.config['JWT_ALGORITHM']
-        )
-        return jsonify({'token': token}), 200
-
-    return jsonify({'error': 'Invalid credentials'}), 401
+    user = users.authenticate(username, password)
+    if user is None:
+        auth_failure('invalid_credentials')
+        return jsonify({'error': 'Invalid credentials'}), 401
+    exp = int(time.time()) + current_app.config['JWT_LIFETIME']
+    payload = {
+        'user_id': user['user_id'],
+        'username': user['username'],
+        'role': user['role'],
+        'exp': exp
+    }
+    keys = current_app.extensions['btf_jwt_keys']
+    if keys is None:
+        token = jwt.encode(payload, current_app.config['SECRET_KEY'], algorithm=current_app.config['JWT_ALGORITHM'])
+    else:
+        token = keys.sign(payload)
+    issued.put(user, password, key, token, exp)
+    return jsonify({'token': token}), 200
 
 
 # Unprotected CRUD endpoints
-@app.route('/orchestrator/containers', methods=['POST'])
+@bp.route('/orchestrator/containers', methods=['POST'])
 def create_container():
     """
     CREATE: Add a new container
     """
-    data = request.get_json()
+    try:
+        container, etag = get_service().create_with_etag(request.get_json())
+    except ContainerError as error:
+        return jsonify({'error': str(error)}), error.status
 
-    if not data or 'Hostname' not in data:
-        return jsonify({'error': 'Bad request. "Hostname" is required.'}), 400
+    return tagged(jsonify(container), etag), 201
 
-    container_id = get_next_id()
-    db[container_id] = {
-        'id': container_id,
-        'Hostname': data['Hostname'],
-        'Entrypoint': data.get('Entrypoint', ''),
-        'Image': data.get('Image', 'ubuntu')
-    }
-
-    return jsonify(db[container_id]), 201
 
-
-@app.route('/orchestrator/containers', methods=['GET'])
+@bp.route('/orchestrator/containers', methods=['GET'])
+@vary_on('Accept')
 def get_containers():
     """
     READ: Get all containers
-    """
-    if len(db) == 0:
-        return jsonify({'error': 'containers are empty'}), 400
-    return jsonify(list(db.values())), 200
 
-
-@app.route('/orchestrator/containers/<int:container_id>', methods=['GET'])
+    Supports ?limit=<n> (alias ?count=<n>), ?offset=<n> and ?cursor=<token>.
+    When more containers follow, the next page is announced through the
+    'Link' (rel="next") and 'X-Next-Cursor' headers.
+    ?Hostname=<value> and ?Image=<value> filter through the store indexes.
+    ?stream=ndjson|json (or 'Accept: application/x-ndjson') streams the body.
+    Every listing carries the collection ETag; 'If-None-Match' with it answers
+    304 without reading or encoding any container. JSON and NDJSON listings
+    share the ETag, so responses carry 'Vary: Accept'.
+    """
+    service = get_service()
+    # Read before the containers: a write in between only makes the ETag older
+    etag = service.collection_etag()
+    if service.is_empty():
+        return jsonify({'error': CONTAINERS_EMPTY}), 400
+    try:
+        limit, offset, after_id = parse_page_args(request.args)
+        stream_format = listing_stream_format()
+    except ValueError as error:
+        return jsonify({'error': str(error)}), 400
+    if etag_matches(etag, if_none_match_tags()):
+        return not_modified(etag)
+    filters = service.filters(request.args)
+    if limit is None and not offset and after_id is None:
+        if stream_format:
+            return tagged(stream_containers(service.stream(filters), stream_format), etag), 200
+        if not filters:
+            cache = listing_cache()
+            if cache is None:
+                return tagged(jsonify(list(service.values())), etag), 200
+            # Served as is until the next write changes the ETag
+            body = cache.listing(etag, service.values, compact_dumps())
+            return tagged(Response(body, mimetype=JSON_MIMETYPE), etag), 200
+
+    containers, has_next = service.page(limit, offset, after_id, filters)
+    response = tagged(stream_containers(containers, stream_format) if stream_format else json_array(containers), etag)
+    if has_next:
+        cursor = encode_cursor(containers[-1]['id'])
+        response.headers['X-Next-Cursor'] = cursor
+        response.headers['Link'] = f'<{next_page_url(request.base_url, request.args, cursor)}>; rel="next"'
+    return response, 200
+
+
+@bp.route('/orchestrator/containers/<int:container_id>', methods=['GET'])
 def get_container(container_id):
     """
-    READ: Get a single container by ID
+    READ: Get a single container by ID ('If-None-Match: <ETag>' answers 304 while unchanged)
     """
-    container = db.get(container_id)
-    if not container:
-        return jsonify({'error': 'container not found'}), 404
-    return jsonify(container), 200
+    try:
+        container, etag = get_service().get_with_etag(container_id, if_none_match_tags())
+    except ContainerError as error:
+        return jsonify({'error': str(error)}), error.status
+    if container is None:
+        return not_modified(etag)
+    return tagged(jsonify(container), etag), 200
 
 
-@app.route('/orchestrator/containers/<int:container_id>', methods=['PUT'])
+@bp.route('/orchestrator/containers/<int:container_id>', methods=['PUT'])
 def update_container(container_id):
     """
-    UPDATE: Update an existing container by ID
+    UPDATE: Update an existing container by ID.
+    With 'If-Match: <ETag>' the update only applies to that version (412 otherwise).
     """
-    data = request.get_json()
-
-    container = db.get(container_id)
-    if not container:
-        return jsonify({'error': 'container not found'}), 404
-
     # Update fields if provided
-    container['Hostname'] = data.get('Hostname', container['Hostname'])
-    container['Entrypoint'] = data.get('Entrypoint', container['Entrypoint'])
-    container['Image'] = data.get('Image', container['Image'])
+    try:
+        container, etag = get_service().update_with_etag(container_id, request.get_json(), if_match_tags())
+    except ContainerError as error:
+        return jsonify({'error': str(error)}), error.status
 
-    return jsonify(container), 200
+    return tagged(jsonify(container), etag), 200
 
 
-@app.route('/orchestrator/containers/<int:container_id>', methods=['DELETE'])
+@bp.route('/orchestrator/containers/<int:container_id>', methods=['DELETE'])
 def delete_container(container_id):
     """
-    DELETE: Delete a container by ID
+    DELETE: Delete a container by ID ('If-Match: <ETag>' makes it conditional)
     """
-    container = db.pop(container_id, None)
-    if not container:
-        return jsonify({'error': 'container not found'}), 404
+    try:
+        get_service().delete(container_id, if_match_tags())
+    except ContainerError as error:
+        return jsonify({'error': str(error)}), error.status
     return jsonify({'message': f'container {container_id} deleted'}), 200
 
 
+# Batch endpoints: one request, one status per item
+@bp.route('/orchestrator/containers:batch', methods=['POST'])
+def create_containers_batch():
+    """
+    CREATE: Add many containers at once.
+
+    Every item is validated first; if any is invalid nothing is created and
+    the valid items are reported with 424 (Failed Dependency).
+    """
+    try:
+        items = read_batch()
+    except ValueError as error:
+        return jsonify({'error': str(error)}), 400
+
+    try:
+        containers, errors = get_service().create_many(items)
+    except ContainerError as error:
+        return jsonify({'error': str(error)}), error.status
+    if not errors:
+        return jsonify({'results': [{'status': 201, 'container': container} for container in containers]}), 201
+
+    results = [
+        {'index': index, 'status': 400, 'error': error} if error else {'index': index, 'status': 424}
+        for index, error in enumerate(errors)
+    ]
+    return jsonify({'error': 'Bad request. Batch rejected, nothing was created.', 'results': results}), 400
+
+
+@bp.route('/orchestrator/containers:batch', methods=['PUT'])
+def update_containers_batch():
+    """
+    UPDATE: Update many containers, each item being {"id": <id>, <fields>...}.
+
+    Unknown IDs are reported per item with 404 while the others are applied.
+    """
+    try:
+        items = read_batch()
+    except ValueError as error:
+        return jsonify({'error': str(error)}), 400
+    if not all(isinstance(item, dict) and type(item.get('id')) is int for item in items):  # pylint: disable=unidiomatic-typecheck
+        return jsonify({'error': 'Bad request. Every item needs an integer "id".'}), 400
+
+    try:
+        containers = get_service().update_many([(item['id'], item) for item in items])
+    except ContainerError as error:
+        return jsonify({'error': str(error)}), error.status
+
+    results = [
+        {'id': item['id'], 'status': 200, 'container': container} if container
+        else {'id': item['id'], 'status': 404, 'error': CONTAINER_NOT_FOUND}
+        for item, container in zip(items, containers)
+    ]
+    return jsonify({'results': results}), batch_status(results)
+
+
+@bp.route('/orchestrator/containers:batch', methods=['DELETE'])
+def delete_containers_batch():
+    """
+    DELETE: Delete many containers, the body being a list of IDs
+    """
+    try:
+        container_ids = read_batch()
+    except ValueError as error:
+        return jsonify({'error': str(error)}), 400
+    if not all(type(container_id) is int for container_id in container_ids):  # pylint: disable=unidiomatic-typecheck
+        return jsonify({'error': 'Bad request. Expected a list of integer IDs.'}), 400
+
+    results = [
+        {'id': container_id, 'status': 200, 'message': f'container {container_id} deleted'} if container
+        else {'id': container_id, 'status': 404, 'error': CONTAINER_NOT_FOUND}
+        for container_id, container in zip(container_ids, get_service().delete_many(container_ids))
+    ]
+    return jsonify({'results': results}), batch_status(results)
+
+
 # Protected endpoint examples
-@app.route('/protected', methods=['GET'])
+@bp.route('/protected', methods=['GET'])
 @token_required
 def protected():
     """
@@ -181,7 +558,7 @@ def protected():
     return jsonify({'message': f'Welcome {request.user["username"]}!'}), 200
 
 
-@app.route('/admin/protected', methods=['GET'])
+@bp.route('/admin/protected', methods=['GET'])
 @token_required
 @role_required('admin')
 def admin_protected():
@@ -191,7 +568,94 @@ def admin_protected():
     return jsonify({'message': f'Admin access granted for {request.user["username"]}!'}), 200
 
 
-@app.errorhandler(405)
+@bp.route('/admin/token-cache', methods=['GET'])
+@token_required
+@role_required('admin')
+def admin_token_cache():
+    """
+    Hit/miss counters of the JWT verification cache
+    """
+    return jsonify(get_token_cache().stats()), 200
+
+
+@bp.route('/.well-known/jwks.json', methods=['GET'])
+def jwks():
+    """
+    Public keys verifying the tokens of /auth/login (404 with a shared-secret algorithm)
+    """
+    keys = current_app.extensions['btf_jwt_keys']
+    if keys is None:
+        return jsonify({'error': f'{current_app.config["JWT_ALGORITHM"]} tokens are signed with a shared secret'}), 404
+    response = Response(keys.jwks(), content_type='application/jwk-set+json')
+    # Verifiers refetch at most every 5 minutes, and on an unknown kid
+    response.headers['Cache-Control'] = 'public, max-age=300'
+    return response
+
+
+@bp.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """
+    Request metrics in the Prometheus text format (404 while METRICS_ENABLED is off)
+    """
+    metrics = current_app.extensions.get('btf_metrics')
+    if metrics is None:
+        return jsonify({'error': 'metrics are disabled'}), 404
+    return Response(metrics.render(), content_type=PROMETHEUS_MIMETYPE)
+
+
+@bp.route('/healthz', methods=['GET'])
+def healthz():
+    """
+    Liveness probe: the process answers requests (no auth, no store access)
+    """
+    return probe_response(HEALTHY_BODY)
+
+
+@bp.route('/readyz', methods=['GET'])
+def readyz():
+    """
+    Readiness probe: 200 while the store can be read, 503 otherwise (no auth)
+    """
+    try:
+        get_service().store.ping()
+    except Exception:  # pylint: disable=broad-exception-caught
+        # Whatever the backend raises, the instance must be taken out of rotation
+        current_app.logger.warning('Readiness check failed: the store is unreachable', exc_info=True)
+        return probe_response(NOT_READY_BODY, 503)
+    return probe_response(READY_BODY)
+
+
+@bp.before_app_request
+def reject_oversized_body():
+    """
+    Refuse a body announced bigger than MAX_CONTENT_LENGTH before any of it is read.
+
+    A chunked body (no Content-Length) is read up to one byte past the limit:
+    werkzeug would silently cut it at the limit and the handler would answer
+    400 for the truncated JSON instead of 413.
+    """
+    limit = request.max_content_length
+    if limit is None:
+        return
+    if request.content_length is not None:
+        if request.content_length > limit:
+            raise RequestEntityTooLarge()
+    elif 'wsgi.input_terminated' in request.environ:
+        body = request.environ['wsgi.input'].read(limit + 1)
+        if len(body) > limit:
+            raise RequestEntityTooLarge()
+        request.environ.update({'wsgi.input': BytesIO(body), 'CONTENT_LENGTH': str(len(body))})
+
+
+@bp.app_errorhandler(413)
+def payload_too_large(_):
+    """
+    Handle bodies over MAX_CONTENT_LENGTH
+    """
+    return jsonify({'error': f'Payload too large. The request body is limited to {request.max_content_length} bytes.'}), 413
+
+
+@bp.app_errorhandler(405)
 def method_not_allowed(_):
     """
     Handle disallowed methods
@@ -199,5 +663,27 @@ def method_not_allowed(_):
     return jsonify({'error': f'Method {request.method} not allowed on {request.path}'}), 405
 
 
+@lru_cache(maxsize=None)
+def default_app():
+    """
+    Default instance used by the command line tools, built on first use
+    """
+    return create_app()
+
+
+def __getattr__(name):
+    """
+    Keep `from tools.api import app, db, token_cache` working without building the app at import time
+    """
+    if name == 'app':
+        return default_app()
+    if name == 'db':
+        return default_app().extensions['btf_store']
+    if name == 'token_cache':
+        return default_app().extensions['btf_token_cache']
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
 if __name__ == '__main__':
-    pass
+    from tools.server import main
+    sys.exit(main(app_name='api'))
@@ -0,0 +1,356 @@
+"""ASGI server mode for the orchestrator API"""
+import argparse
+import asyncio
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from http import HTTPStatus
+from io import BytesIO
+
+from tools.api import create_app
+
+
+class AsgiApp:
+    """
+    ASGI application serving a WSGI app (the routes of tools.api).
+
+    Connections, including idle keep-alive ones, belong to the event loop of
+    the ASGI server. A worker thread is only taken while a request is being
+    handled, so thousands of open connections cost no threads.
+
+    Request bodies are read on the event loop, up to max_body_size bytes
+    (default: the app's MAX_CONTENT_LENGTH). A body announced or found to be
+    bigger is not buffered: the app sees its size only and answers 413.
+    """
+
+    def __init__(self, wsgi_app, max_workers=None, max_body_size=None):
+        self.wsgi_app = wsgi_app
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='btf-asgi')
+        if max_body_size is None:
+            max_body_size = getattr(wsgi_app, 'config', {}).get('MAX_CONTENT_LENGTH')
+        self.max_body_size = max_body_size
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, receive, send)
+        else:
+            raise ValueError(f"Unsupported ASGI scope type {scope['type']!r}")
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _read_body(self, scope, receive):
+        """
+        Request body and the length to report, or (None, None) if the client disconnected
+        """
+        limit = self.max_body_size
+        declared = content_length(scope)
+        if limit is not None and declared is not None and declared > limit:
+            return b'', declared
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return None, None
+            body += message.get('body', b'')
+            if not message.get('more_body') or (limit is not None and len(body) > limit):
+                return bytes(body), len(body)
+
+    async def _http(self, scope, receive, send):
+        body, length = await self._read_body(scope, receive)
+        if body is None:
+            return
+
+        loop = asyncio.get_running_loop()
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info and response:
+                raise exc_info[1].with_traceback(exc_info[2])
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+            return response.setdefault('written', []).append
+
+        environ = build_environ(scope, body, length)
+        result, chunks, first, second = await loop.run_in_executor(self.executor, _start_wsgi, self.wsgi_app, environ, start_response)
+        await send({'type': 'http.response.start', 'status': response['status'], 'headers': response['headers']})
+        written = b''.join(response.get('written', ()))
+        if second is None:
+            # Buffered responses (jsonify) are complete after one thread hop
+            await send({'type': 'http.response.body', 'body': written + first, 'more_body': False})
+            return
+        try:
+            await send({'type': 'http.response.body', 'body': written + first + second, 'more_body': True})
+            while True:
+                chunk = await loop.run_in_executor(self.executor, next, chunks, None)
+                if chunk is None:
+                    break
+                if chunk:
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+        finally:
+            if hasattr(result, 'close'):
+                await loop.run_in_executor(self.executor, result.close)
+
+
+def _start_wsgi(wsgi_app, environ, start_response):
+    """
+    Call the WSGI app and read up to two body chunks.
+
+    Returns (result, iterator, first chunk, second chunk or None). When the
+    body ended within those chunks the result is already closed.
+    """
+    result = wsgi_app(environ, start_response)
+    chunks = iter(result)
+    first = next(chunks, b'')
+    second = next(chunks, None)
+    if second is None and hasattr(result, 'close'):
+        result.close()
+    return result, chunks, first, second
+
+
+def content_length(scope):
+    """
+    Value of the Content-Length header of an ASGI scope, None if missing or invalid
+    """
+    for name, value in scope.get('headers', []):
+        if name.lower() == b'content-length':
+            try:
+                return int(value)
+            except ValueError:
+                return None
+    return None
+
+
+def build_environ(scope, body, length=None):
+    """
+    WSGI environ (PEP 3333) for an ASGI HTTP scope and its complete body.
+    length is the CONTENT_LENGTH to report when it differs from len(body) (body not read).
+    """
+    server_name, server_port = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('127.0.0.1', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server_name,
+        'SERVER_PORT': str(server_port),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'CONTENT_LENGTH': str(len(body) if length is None else length),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_LENGTH':
+            continue
+        key = name if name == 'CONTENT_TYPE' else f'HTTP_{name}'
+        environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+
+def asgi_to_wsgi(asgi_app):
+    """
+    Drive an ASGI app from a WSGI caller, one private event loop per request.
+
+    Lets werkzeug's test client (and so the tests/api suites) exercise the
+    ASGI mode in process. The body is handed over one message at a time, so
+    streamed responses stay streamed.
+    """
+    def wsgi_app(environ, start_response):
+        body = environ['wsgi.input'].read(int(environ.get('CONTENT_LENGTH') or 0))
+        loop = asyncio.new_event_loop()
+        try:
+            exchange = loop.run_until_complete(_Exchange.create(asgi_app, _build_scope(environ), body))
+            start = loop.run_until_complete(exchange.next_message())
+            start_response(
+                f"{start['status']} {_reason(start['status'])}",
+                [(name.decode('latin-1'), value.decode('latin-1')) for name, value in start.get('headers', [])]
+            )
+        except BaseException:
+            loop.close()
+            raise
+        return _BodyIterator(loop, exchange)
+
+    return wsgi_app
+
+
+class _Exchange:
+    """
+    One request/response between asgi_to_wsgi() and the ASGI app
+    """
+
+    def __init__(self, body):
+        self.body = body
+        self.messages = asyncio.Queue(maxsize=1)  # send() waits until the caller took the message
+        self.task = None
+
+    @classmethod
+    async def create(cls, asgi_app, scope, body):
+        """
+        Start the app on the running loop
+        """
+        exchange = cls(body)
+        exchange.task = asyncio.ensure_future(asgi_app(scope, exchange.receive, exchange.messages.put))
+        return exchange
+
+    async def receive(self):
+        """
+        ASGI receive: the request body, then a disconnect once the response is done
+        """
+        if self.body is not None:
+            body, self.body = self.body, None
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+        await asyncio.Future()  # wait until cancelled
+        return {'type': 'http.disconnect'}
+
+    async def next_message(self):
+        """
+        Next message sent by the app; re-raises its exception if it failed instead
+        """
+        getter = asyncio.ensure_future(self.messages.get())
+        await asyncio.wait({getter, self.task}, return_when=asyncio.FIRST_COMPLETED)
+        if getter.done():
+            return getter.result()
+        getter.cancel()
+        self.task.result()
+        raise RuntimeError('ASGI app finished without completing the response')
+
+
+class _BodyIterator:
+    """
+    WSGI body of an _Exchange; close() also stops the app and the loop when
+    the caller gives up early (or never reads the body)
+    """
+
+    def __init__(self, loop, exchange):
+        self.loop = loop
+        self.exchange = exchange
+        self.finished = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        while not self.finished:
+            message = self.loop.run_until_complete(self.exchange.next_message())
+            self.finished = not message.get('more_body')
+            if message.get('body'):
+                return message['body']
+        self.close()
+        raise StopIteration
+
+    def close(self):
+        """
+        Let the app finish (or cancel it) and close the private loop
+        """
+        if self.loop.is_closed():
+            return
+        task = self.exchange.task
+        if self.finished:
+            self.loop.run_until_complete(asyncio.wait({task}, timeout=1))
+        if not task.done():
+            task.cancel()
+        self.loop.run_until_complete(asyncio.gather(task, return_exceptions=True))
+        self.loop.close()
+
+
+def _build_scope(environ):
+    headers = [
+        (key[5:].replace('_', '-').lower().encode('latin-1'), value.encode('latin-1'))
+        for key, value in environ.items() if key.startswith('HTTP_')
+    ]
+    for key, name in (('CONTENT_TYPE', b'content-type'), ('CONTENT_LENGTH', b'content-length')):
+        if environ.get(key):
+            headers.append((name, environ[key].encode('latin-1')))
+    return {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': environ.get('SERVER_PROTOCOL', 'HTTP/1.1').split('/', 1)[-1],
+        'method': environ['REQUEST_METHOD'],
+        'scheme': environ.get('wsgi.url_scheme', 'http'),
+        'path': environ.get('PATH_INFO', '').encode('latin-1').decode('utf-8'),
+        'raw_path': environ.get('PATH_INFO', '').encode('latin-1'),
+        'query_string': environ.get('QUERY_STRING', '').encode('latin-1'),
+        'root_path': environ.get('SCRIPT_NAME', ''),
+        'headers': headers,
+        'server': (environ.get('SERVER_NAME', 'localhost'), int(environ.get('SERVER_PORT') or 80)),
+        'client': (environ.get('REMOTE_ADDR', '127.0.0.1'), int(environ.get('REMOTE_PORT') or 0)),
+    }
+
+
+def _reason(status):
+    try:
+        return HTTPStatus(status).phrase
+    except ValueError:
+        return 'UNKNOWN'
+
+
+def create_asgi_app(config=None, max_workers=None):
+    """
+    ASGI application over a new tools.api app.
+
+    Args:
+        config (dict): Passed to tools.api.create_app().
+        max_workers (int): Threads handling requests concurrently (default: ThreadPoolExecutor's).
+
+    Returns:
+        AsgiApp: The ASGI callable; its Flask app is in .wsgi_app.
+    """
+    return AsgiApp(create_app(config), max_workers=max_workers)
+
+
+@lru_cache(maxsize=None)
+def default_app():
+    """
+    Default instance, built on first use (e.g. by `uvicorn tools.asgi:app`)
+    """
+    return create_asgi_app()
+
+
+def __getattr__(name):
+    if name == 'app':
+        return default_app()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def main(argv=None):
+    """
+    Command line entry point: python3 -m tools.asgi [--host HOST] [--port PORT]
+    """
+    parser = argparse.ArgumentParser(description="Run the orchestrator API as an ASGI app (requires uvicorn)")
+    parser.add_argument("--port", type=int, default=5000, help="Port to listen on (default: 5000)")
+    parser.add_argument("--host", type=str, default="0.0.0.0", help="Host to bind (default: 0.0.0.0)")
+    parser.add_argument("--workers", type=int, default=None, help="Request handling threads (default: ThreadPoolExecutor's)")
+    args = parser.parse_args(argv)
+
+    try:
+        import uvicorn  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        parser.exit(1, "The ASGI mode needs uvicorn: pip install uvicorn\n")
+    # Requests are handled on several threads, so default to the thread-safe store
+    config = {'STORE_BACKEND': os.environ.get('BTF_STORE', 'locked')}
+    uvicorn.run(create_asgi_app(config, max_workers=args.workers), host=args.host, port=args.port, log_level='warning')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,356 @@
+"""Container service shared by the plain Flask API and the RESTX documentation server"""
+import json
+
+from tools.listing_cache import ListingCache
+from tools.locks import KeyedLock
+from tools.storage import CONTAINER_FIELDS, INDEXED_FIELDS, DuplicateError, VersionConflictError, create_store
+
+
+# Error messages, identical on both servers
+HOSTNAME_REQUIRED = 'Bad request. "Hostname" is required.'
+OBJECT_REQUIRED = 'Bad request. The body must be a JSON object.'
+DUPLICATE_HOSTNAME = 'Duplicate container. Hostname must be unique.'
+CONTAINER_NOT_FOUND = 'container not found'
+CONTAINERS_EMPTY = 'containers are empty'
+PRECONDITION_FAILED = 'Precondition failed. The container was modified.'
+FIELD_TOO_LARGE = 'Payload too large. "{field}" is limited to {limit} characters.'
+
+# Values of optional fields left out of a create request
+DEFAULT_FIELDS = {'Entrypoint': '', 'Image': 'ubuntu'}
+
+# Default MAX_FIELD_LENGTHS of both servers (characters, or JSON length for non-string values)
+FIELD_LENGTH_LIMITS = {'Hostname': 512, 'Entrypoint': 4096, 'Image': 512}
+
+
+class ContainerError(ValueError):
+    """
+    Raised for a request the service rejects; status is the HTTP status to answer with
+    """
+    status = 400
+
+
+class ContainerNotFoundError(ContainerError):
+    """
+    Raised when the requested container does not exist
+    """
+    status = 404
+
+    def __init__(self, message=CONTAINER_NOT_FOUND):
+        super().__init__(message)
+
+
+class PreconditionFailedError(ContainerError):
+    """
+    Raised when If-Match does not name the current version of the container
+    """
+    status = 412
+
+    def __init__(self, message=PRECONDITION_FAILED):
+        super().__init__(message)
+
+
+class PayloadTooLargeError(ContainerError):
+    """
+    Raised when a field value is longer than its MAX_FIELD_LENGTHS limit
+    """
+    status = 413
+
+
+def make_etag(epoch, container_id, version):
+    """
+    Entity tag (unquoted) of one version of a container.
+    The store epoch keeps tags from repeating once IDs and versions restart.
+    """
+    return f'{epoch}-{container_id}-{version}'
+
+
+def make_collection_etag(epoch, version):
+    """
+    Entity tag (unquoted) of the container listings at one collection version
+    """
+    return f'containers-{epoch}-{version}'
+
+
+def etag_matches(etag, tags):
+    """
+    True when tags (from If-Match or If-None-Match, '*' matching any) name etag
+    """
+    return tags is not None and ('*' in tags or etag in tags)
+
+
+class ContainerService:  # pylint: disable=too-many-public-methods
+    """
+    Container CRUD over a store, with validation and the uniqueness policy.
+
+    config is read on every call (the app config of the server), so settings
+    such as UNIQUE_HOSTNAMES can be changed at runtime.
+
+    Updates and deletes of one container hold that container's lock and write
+    with the version they checked (compare-and-set in the store), so
+    concurrent writers never interleave and writers to different containers
+    never wait for each other.
+
+    Every write invalidates the matching entries of listing_cache (sized by
+    config['LISTING_CACHE_SIZE'] when the service is created).
+    """
+
+    def __init__(self, store, config=None):
+        self.store = store
+        self.config = config if config is not None else {}
+        self.locks = KeyedLock()
+        self.listing_cache = ListingCache(self.config.get('LISTING_CACHE_SIZE', 100000))
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Service over a new store chosen by config['STORE_BACKEND'] and config['SQLITE_PATH'] or config['DURABLE_PATH']
+        """
+        backend = config.get('STORE_BACKEND', 'dict')
+        if backend == 'durable':
+            store = create_store(
+                backend, path=config.get('DURABLE_PATH'), fsync=config.get('WAL_FSYNC', 'interval'),
+                fsync_interval=config.get('WAL_FSYNC_INTERVAL', 1.0), snapshot_every=config.get('SNAPSHOT_EVERY', 100000),
+            )
+        else:
+            store = create_store(backend, path=config.get('SQLITE_PATH'))
+        return cls(store, config)
+
+    def unique_fields(self):
+        """
+        Fields whose values must be unique across containers
+        """
+        return ('Hostname',) if self.config.get('UNIQUE_HOSTNAMES') else ()
+
+    @staticmethod
+    def validation_error(data):
+        """
+        Error message for an invalid create request, or None when data is valid
+        """
+        if not isinstance(data, dict) or 'Hostname' not in data:
+            return HOSTNAME_REQUIRED
+        return None
+
+    def check_sizes(self, fields):
+        """
+        Raise PayloadTooLargeError if a field is longer than config['MAX_FIELD_LENGTHS'] allows
+        """
+        for field, limit in (self.config.get('MAX_FIELD_LENGTHS') or {}).items():
+            value = fields.get(field)
+            if value is not None and len(value if isinstance(value, str) else json.dumps(value)) > limit:
+                raise PayloadTooLargeError(FIELD_TOO_LARGE.format(field=field, limit=limit))
+
+    @staticmethod
+    def new_fields(data):
+        """
+        Fields of a container to create, with the defaults applied
+        """
+        return {'Hostname': data['Hostname'], **{field: data.get(field, default) for field, default in DEFAULT_FIELDS.items()}}
+
+    @staticmethod
+    def changes(data):
+        """
+        Container fields present in an update request.
+        Raises ContainerError unless data is a JSON object.
+        """
+        if not isinstance(data, dict):
+            raise ContainerError(OBJECT_REQUIRED)
+        return {field: data[field] for field in CONTAINER_FIELDS if field in data}
+
+    def is_empty(self):
+        """
+        True when no container is stored
+        """
+        return len(self.store) == 0
+
+    def create(self, data):
+        """
+        Create a container from request data and return its record
+        """
+        return self.create_with_etag(data)[0]
+
+    def create_with_etag(self, data):
+        """
+        Create a container and return (record, etag)
+        """
+        error = self.validation_error(data)
+        if error:
+            raise ContainerError(error)
+        fields = self.new_fields(data)
+        self.check_sizes(fields)
+        try:
+            container = self.store.create(fields, self.unique_fields())
+        except DuplicateError:
+            raise ContainerError(DUPLICATE_HOSTNAME) from None
+        self.listing_cache.invalidate()
+        return container, make_etag(self.store.epoch(), container['id'], 1)
+
+    def get(self, container_id):
+        """
+        Return the record of an existing container
+        """
+        return self.get_with_etag(container_id)[0]
+
+    def get_with_etag(self, container_id, if_none_match=None):
+        """
+        Return (record, etag) of an existing container, both from the same version.
+        The record is None (and not read) when if_none_match names the current version.
+        """
+        epoch = self.store.epoch()
+        while True:
+            # Readers take no lock: retry if a writer got in between the two version reads
+            version = self.store.version(container_id)
+            if version is not None and etag_matches(make_etag(epoch, container_id, version), if_none_match):
+                return None, make_etag(epoch, container_id, version)
+            container = self.store.get(container_id) if version is not None else None
+            if not container:
+                raise ContainerNotFoundError()
+            if self.store.version(container_id) == version:
+                return container, make_etag(epoch, container_id, version)
+
+    def collection_etag(self):
+        """
+        Entity tag shared by every listing until the next write
+        """
+        return make_collection_etag(self.store.epoch(), self.store.collection_version())
+
+    def _checked_version(self, container_id, if_match):
+        """
+        Current version of a container, raising if it is missing or if_match does not name it
+        """
+        version = self.store.version(container_id)
+        if version is None:
+            raise ContainerNotFoundError()
+        if if_match is not None and not etag_matches(make_etag(self.store.epoch(), container_id, version), if_match):
+            raise PreconditionFailedError()
+        return version
+
+    def update(self, container_id, data, if_match=None):
+        """
+        Apply the container fields of data and return the updated record
+        """
+        return self.update_with_etag(container_id, data, if_match)[0]
+
+    def update_with_etag(self, container_id, data, if_match=None):
+        """
+        Update a container and return (record, etag).
+
+        Args:
+            container_id (int): The container to update.
+            data (dict): Request data; only CONTAINER_FIELDS are applied.
+            if_match (Collection): Entity tags from If-Match ('*' matches any),
+                None to update unconditionally.
+        """
+        changes = self.changes(data)
+        self.check_sizes(changes)
+        with self.locks(container_id):
+            while True:
+                version = self._checked_version(container_id, if_match)
+                try:
+                    container = self.store.update(container_id, changes, self.unique_fields(), expected_version=version)
+                except DuplicateError:
+                    raise ContainerError(DUPLICATE_HOSTNAME) from None
+                except VersionConflictError:
+                    continue  # written by another process sharing the store: check again
+                if not container:
+                    raise ContainerNotFoundError()
+                self.listing_cache.invalidate(container_id)
+                return container, make_etag(self.store.epoch(), container_id, version + 1)
+
+    def delete(self, container_id, if_match=None):
+        """
+        Delete a container and return its record
+        """
+        with self.locks(container_id):
+            while True:
+                version = self._checked_version(container_id, if_match)
+                try:
+                    container = self.store.delete(container_id, expected_version=version)
+                except VersionConflictError:
+                    continue
+                if not container:
+                    raise ContainerNotFoundError()
+                self.listing_cache.invalidate(container_id)
+                return container
+
+    def values(self):
+        """
+        Every container ordered by ID
+        """
+        return self.store.values()
+
+    def stream(self, filters=None):
+        """
+        Containers matching filters, read from the store lazily
+        """
+        return self.store.stream(filters)
+
+    def page(self, limit=None, offset=0, after_id=None, filters=None):
+        """
+        One page of containers and whether another page follows.
+
+        Args:
+            limit (int): Page size, None for everything after offset/after_id.
+            offset (int): Containers to skip.
+            after_id (int): Only containers with a greater ID (cursor pagination).
+            filters (dict): Exact matches on INDEXED_FIELDS.
+
+        Returns:
+            tuple: (list of containers, bool has_next)
+        """
+        # Fetch one extra record to know whether another page follows
+        containers = self.store.page(None if limit is None else limit + 1, offset, after_id, filters)
+        has_next = limit is not None and 0 < limit < len(containers)
+        if limit is not None:
+            del containers[limit:]
+        return containers, has_next
+
+    @staticmethod
+    def filters(args):
+        """
+        Listing filters present in the query arguments
+        """
+        return {field: args[field] for field in INDEXED_FIELDS if field in args}
+
+    def create_many(self, items):
+        """
+        Create every item or none of them.
+
+        Returns:
+            tuple: (created containers, None) or (None, list of per-item error messages or None)
+        """
+        errors = [self.validation_error(item) for item in items]
+        if any(errors):
+            return None, errors
+        fields_list = [self.new_fields(item) for item in items]
+        for fields in fields_list:
+            self.check_sizes(fields)
+        try:
+            containers = self.store.create_many(fields_list, self.unique_fields())
+        except DuplicateError:
+            raise ContainerError(DUPLICATE_HOSTNAME) from None
+        self.listing_cache.invalidate()
+        return containers, None
+
+    def update_many(self, changes_by_id):
+        """
+        Apply [(id, request data)] in one step; None marks unknown IDs in the result
+        """
+        changes_list = [(container_id, self.changes(data)) for container_id, data in changes_by_id]
+        for _, changes in changes_list:
+            self.check_sizes(changes)
+        try:
+            containers = self.store.update_many(changes_list, self.unique_fields())
+        except DuplicateError:
+            raise ContainerError(DUPLICATE_HOSTNAME) from None
+        for container_id, _ in changes_by_id:
+            self.listing_cache.invalidate(container_id)
+        return containers
+
+    def delete_many(self, container_ids):
+        """
+        Delete several containers; None marks unknown IDs in the result
+        """
+        containers = self.store.delete_many(container_ids)
+        for container_id in container_ids:
+            self.listing_cache.invalidate(container_id)
+        return containers
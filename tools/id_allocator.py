@@ -0,0 +1,114 @@
+"""Monotonic container ID allocation and ordering shared by the API servers"""
+import bisect
+import os
+import threading
+
+
+def new_epoch():
+    """
+    Random token naming one run of an ID sequence (8 hex digits, as the SQLite store makes them)
+    """
+    return os.urandom(4).hex()
+
+
+class IdAllocator:
+    """
+    Thread-safe, monotonic ID generator.
+
+    Hands out the next ID after the highest one ever issued in O(1), so IDs
+    are never reused after a DELETE (unlike a max(db.keys()) + 1 scan).
+    """
+
+    def __init__(self, start=0):
+        self._lock = threading.Lock()
+        self._last = start
+
+    def next_id(self):
+        """
+        Return the next free ID
+        """
+        with self._lock:
+            self._last += 1
+            return self._last
+
+    def reserve(self, count):
+        """
+        Allocate count consecutive IDs in one step and return the first one
+        """
+        with self._lock:
+            first = self._last + 1
+            self._last += count
+            return first
+
+    def observe(self, existing_id):
+        """
+        Make sure an externally stored ID is never handed out again
+        """
+        with self._lock:
+            self._last = max(self._last, existing_id)
+
+    def reset(self, start=0):
+        """
+        Restart the sequence (used when the whole database is wiped)
+        """
+        with self._lock:
+            self._last = start
+
+    @property
+    def last_id(self):
+        """
+        Highest ID issued so far
+        """
+        return self._last
+
+
+class SortedIds:
+    """
+    Container IDs in ascending order, for cursor pages that seek instead of scan.
+
+    IDs are allocated in ascending order, so adding one is an append.
+    Removed IDs stay until they outnumber the live ones, then one pass
+    drops them all, so a delete costs O(1) amortised. Not thread-safe:
+    the store's lock guards it.
+    """
+
+    def __init__(self, ids=()):
+        self._ids = sorted(ids)
+        self._removed = 0
+
+    def add(self, container_id):
+        """
+        Insert an ID (an append unless it is older than the newest one)
+        """
+        ids = self._ids
+        if not ids or container_id > ids[-1]:
+            ids.append(container_id)
+            return
+        position = bisect.bisect_left(ids, container_id)
+        if position < len(ids) and ids[position] == container_id:
+            self._removed -= 1  # removed, then stored again (log replay)
+        else:
+            ids.insert(position, container_id)
+
+    def remove(self, live):
+        """
+        Count one more removed ID; live is the mapping of the remaining containers
+        """
+        self._removed += 1
+        if self._removed > len(live):
+            self._ids = [container_id for container_id in self._ids if container_id in live]
+            self._removed = 0
+
+    def after(self, after_id):
+        """
+        Iterate over the IDs greater than after_id (removed ones included), found by bisection
+        """
+        ids = self._ids
+        return (ids[position] for position in range(bisect.bisect_right(ids, after_id), len(ids)))
+
+    def clear(self):
+        """
+        Forget every ID
+        """
+        self._ids = []
+        self._removed = 0
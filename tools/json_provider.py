@@ -0,0 +1,104 @@
+"""Optional orjson-backed JSON provider for the Flask apps"""
+# pylint: disable=no-member
+# (orjson is a compiled module pylint cannot inspect)
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional dependency, the stdlib provider is used without it
+    orjson = None
+
+
+# orjson reads integers beyond 64 bits as floats, so documents with runs of 19+ digits go to
+# the stdlib. Runs are found by mapping digits to '0' and the rest to ' ' (much faster than re).
+DIGIT_MASK = bytes(0x30 if 0x30 <= byte <= 0x39 else 0x20 for byte in range(256))
+LONG_NUMBER = b'0' * 19
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider encoding and decoding with orjson.
+
+    jsonify output is the same JSON as DefaultJSONProvider's (sorted keys,
+    compact or two-space indented, dates as HTTP dates) except that non-ASCII
+    characters are written as UTF-8 instead of \\u escapes; dumps() without
+    separators is compact too. Arguments orjson has no equivalent for, values
+    it cannot encode and documents it would read differently are handed to
+    the stdlib provider, so behaviour never changes.
+    """
+    ensure_ascii = False
+
+    def _options(self, kwargs):
+        """
+        orjson option flags equivalent to json.dumps kwargs, None if there is no equivalent
+        """
+        # Dates go through default() to be written as HTTP dates, like DefaultJSONProvider does
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if kwargs.pop('sort_keys', self.sort_keys):
+            options |= orjson.OPT_SORT_KEYS
+        indent = kwargs.pop('indent', None)
+        separators = kwargs.pop('separators', None)
+        if indent == 2 and separators in (None, (',', ': ')):
+            options |= orjson.OPT_INDENT_2
+        elif indent is not None or separators not in (None, (',', ':')):
+            return None
+        kwargs.pop('default', None)
+        kwargs.pop('ensure_ascii', None)
+        return None if kwargs else options
+
+    def dumps_bytes(self, obj, **kwargs):
+        """
+        Encode obj to UTF-8 JSON bytes
+        """
+        options = self._options(dict(kwargs))
+        if options is not None:
+            try:
+                return orjson.dumps(obj, default=self.default, option=options)
+            except orjson.JSONEncodeError:
+                pass  # e.g. integers beyond 64 bits: let the stdlib encode (or reject) them
+        kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+        return super().dumps(obj, **kwargs).encode()
+
+    def dumps(self, obj, **kwargs):
+        return self.dumps_bytes(obj, **kwargs).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        data = s.encode() if isinstance(s, str) else s
+        if LONG_NUMBER not in data.translate(DIGIT_MASK):
+            try:
+                return orjson.loads(data)
+            except orjson.JSONDecodeError:
+                pass  # the stdlib accepts NaN/Infinity and raises the usual errors
+        return super().loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        dump_args = {}
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            dump_args['indent'] = 2
+        else:
+            dump_args['separators'] = (',', ':')
+        return self._app.response_class(self.dumps_bytes(obj, **dump_args) + b'\n', mimetype=self.mimetype)
+
+
+JSON_PROVIDERS = {
+    'stdlib': DefaultJSONProvider,
+    'orjson': OrjsonProvider,
+}
+
+
+def create_json_provider(app, name='stdlib'):
+    """
+    JSON provider for app by name ('stdlib' or 'orjson').
+
+    'orjson' falls back to the stdlib provider when orjson is not installed.
+    """
+    try:
+        provider_class = JSON_PROVIDERS[name]
+    except KeyError:
+        raise ValueError(f'Unknown JSON provider {name!r}, expected one of {sorted(JSON_PROVIDERS)}') from None
+    if provider_class is OrjsonProvider and orjson is None:
+        provider_class = DefaultJSONProvider
+    return provider_class(app)
@@ -0,0 +1,190 @@
+"""Asymmetric JWT signing keys, identified by key ID and published as a JWKS"""
+import base64
+import hashlib
+import json
+import logging
+import os
+import threading
+
+import jwt
+from jwt.algorithms import get_default_algorithms
+
+try:
+    from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+except ImportError:  # optional dependency, only needed for asymmetric algorithms
+    ec = ed25519 = rsa = None
+
+
+# Algorithms signing with a private key and verifying with a public one (PyJWT names)
+ASYMMETRIC_ALGORITHMS = ('RS256', 'RS384', 'RS512', 'PS256', 'PS384', 'PS512', 'ES256', 'ES384', 'ES512', 'EdDSA')
+
+# JWK members of each key type that identify the key (RFC 7638 thumbprints)
+THUMBPRINT_MEMBERS = {'RSA': ('e', 'kty', 'n'), 'EC': ('crv', 'kty', 'x', 'y'), 'OKP': ('crv', 'kty', 'x')}
+
+log = logging.getLogger('btf.jwt_keys')
+
+
+def generate_private_key(algorithm):
+    """
+    New private key for algorithm
+    """
+    if rsa is None:
+        raise RuntimeError(f'{algorithm} needs the cryptography package (pip install cryptography)')
+    if algorithm.startswith(('RS', 'PS')):
+        return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    if algorithm.startswith('ES'):
+        curve = {'ES256': ec.SECP256R1, 'ES384': ec.SECP384R1, 'ES512': ec.SECP521R1}[algorithm]
+        return ec.generate_private_key(curve())
+    return ed25519.Ed25519PrivateKey.generate()
+
+
+def load_key_directory(directory):
+    """
+    JWT_KEYS entries from the '<kid>.pem' files of directory, in name order.
+
+    Files holding a private key can sign; the others are public keys kept
+    to verify tokens signed elsewhere or before a rotation.
+    """
+    keys = []
+    for name in sorted(os.listdir(directory)):
+        if name.endswith('.pem'):
+            with open(os.path.join(directory, name), encoding='ascii') as pem_file:
+                pem = pem_file.read()
+            kind = 'private_key' if 'PRIVATE KEY' in pem else 'public_key'
+            keys.append({'kid': name[:-len('.pem')], kind: pem})
+    return keys
+
+
+class KeySet:
+    """
+    Signing and verification keys of one asymmetric algorithm, by key ID.
+
+    PEM keys are parsed once, here: signing and verifying then use the
+    cryptography key objects. The newest key with a private key signs and
+    its ID goes in the 'kid' header of every token; older keys stay to
+    verify the tokens they signed until they are retired. Lookups take no
+    lock (writers swap in a new dict) and version changes with every key
+    change, so caches keyed by it never outlive a rotation.
+
+    Args:
+        algorithm (str): One of ASYMMETRIC_ALGORITHMS.
+        keys (Iterable): Dicts with a 'private_key' or a 'public_key' (PEM)
+            and optionally a 'kid' (the RFC 7638 thumbprint by default),
+            oldest first. Without a private key a new one is generated:
+            tokens then only verify in this process.
+    """
+
+    def __init__(self, algorithm, keys=()):
+        if algorithm not in ASYMMETRIC_ALGORITHMS:
+            raise ValueError(f'{algorithm!r} is not an asymmetric JWT algorithm, expected one of {list(ASYMMETRIC_ALGORITHMS)}')
+        if algorithm not in get_default_algorithms():
+            raise RuntimeError(f'{algorithm} needs the cryptography package (pip install cryptography)')
+        self.algorithm = algorithm
+        self._jwt_algorithm = get_default_algorithms()[algorithm]
+        self._lock = threading.Lock()
+        self._keys = {}  # kid -> (private key or None, public key)
+        self._signing_kid = None
+        self._jwks = None
+        self.version = 0
+        for key in keys:
+            self.add(key.get('private_key'), key.get('public_key'), key.get('kid'))
+        if self._signing_kid is None:
+            log.warning('No %s private key configured: signing with a generated key, tokens only verify in this process', algorithm)
+            self.rotate()
+
+    def add(self, private_key=None, public_key=None, kid=None):
+        """
+        Add a key (PEM or key object); a private key becomes the signing key. Returns its kid.
+        """
+        if private_key is not None:
+            private_key = self._jwt_algorithm.prepare_key(private_key)
+            public_key = private_key.public_key()
+        elif public_key is not None:
+            public_key = self._jwt_algorithm.prepare_key(public_key)
+            if hasattr(public_key, 'private_bytes'):
+                raise ValueError('A public_key entry holds a private key')
+        else:
+            raise ValueError('A key needs a private_key or a public_key')
+        kid = kid or self.thumbprint(public_key)
+        with self._lock:
+            keys = dict(self._keys)
+            keys[kid] = (private_key, public_key)
+            self._keys = keys
+            if private_key is not None:
+                self._signing_kid = kid
+            self._jwks = None
+            self.version += 1
+        return kid
+
+    def rotate(self, private_key=None, kid=None):
+        """
+        Sign with a new key (generated when not given) from now on; returns its kid
+        """
+        return self.add(private_key if private_key is not None else generate_private_key(self.algorithm), kid=kid)
+
+    def retire(self, kid):
+        """
+        Drop a key: the tokens it signed stop verifying. The signing key cannot be retired.
+        """
+        with self._lock:
+            if kid == self._signing_kid:
+                raise ValueError(f'{kid!r} is the signing key: rotate before retiring it')
+            keys = dict(self._keys)
+            keys.pop(kid, None)
+            self._keys = keys
+            self._jwks = None
+            self.version += 1
+
+    def thumbprint(self, public_key):
+        """
+        RFC 7638 JWK thumbprint of a public key (base64url of a SHA-256)
+        """
+        jwk = self._jwt_algorithm.to_jwk(public_key, as_dict=True)
+        members = {name: jwk[name] for name in THUMBPRINT_MEMBERS[jwk['kty']]}
+        digest = hashlib.sha256(json.dumps(members, separators=(',', ':'), sort_keys=True).encode()).digest()
+        return base64.urlsafe_b64encode(digest).rstrip(b'=').decode()
+
+    @property
+    def signing_kid(self):
+        """
+        ID of the key signing new tokens
+        """
+        return self._signing_kid
+
+    def kids(self):
+        """
+        IDs of every key, oldest first
+        """
+        return list(self._keys)
+
+    def sign(self, payload):
+        """
+        Encode payload as a JWT signed by the signing key, its kid in the header
+        """
+        kid = self._signing_kid
+        return jwt.encode(payload, self._keys[kid][0], algorithm=self.algorithm, headers={'kid': kid})
+
+    def verification_key(self, token):
+        """
+        Public key named by the 'kid' header of token.
+        Raises jwt.InvalidTokenError when the header is unreadable or names no known key.
+        """
+        kid = jwt.get_unverified_header(token).get('kid')
+        try:
+            return self._keys[kid][1]
+        except (KeyError, TypeError):
+            raise jwt.InvalidTokenError(f'Unknown key ID {kid!r}') from None
+
+    def jwks(self):
+        """
+        Public keys as a JSON Web Key Set, encoded once per key change
+        """
+        jwks = self._jwks
+        if jwks is None:
+            keys = []
+            for kid, (_, public_key) in self._keys.items():
+                jwk = self._jwt_algorithm.to_jwk(public_key, as_dict=True)
+                jwk.update(kid=kid, use='sig', alg=self.algorithm)
+                keys.append(jwk)
+            jwks = self._jwks = json.dumps({'keys': keys}, separators=(',', ':')).encode() + b'\n'
+        return jwks
@@ -0,0 +1,87 @@
+"""Encoded container listings and per-container JSON fragments"""
+
+
+class ListingCache:
+    """
+    Encoded output of the container listings.
+
+    The whole listing is kept as bytes under the collection ETag it was read
+    at, so it is served again until the next write. Each container's encoded
+    JSON is kept next to the field values it was encoded from, so after a
+    write only the containers that changed are encoded again; a fragment
+    whose container changed behind the service's back is simply re-encoded.
+
+    Lookups and stores are single dict operations, which are atomic under
+    the GIL, so no lock is taken on the read path.
+    """
+
+    def __init__(self, max_fragments=100000):
+        self.max_fragments = max_fragments
+        self.hits = 0
+        self.misses = 0
+        self._listing = (None, None)  # (etag, encoded body)
+        self._fragments = {}  # container ID -> (field values, encoded JSON)
+
+    @property
+    def enabled(self):
+        """
+        False when the cache is configured with no room
+        """
+        return self.max_fragments > 0
+
+    def fragment(self, record, dumps):
+        """
+        Encoded JSON of one container record.
+
+        Args:
+            record (dict): The container record.
+            dumps (Callable): Encoder used on a miss; its output is cached as is.
+        """
+        key = tuple(record.values())
+        entry = self._fragments.get(record['id'])
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        encoded = dumps(record)
+        if entry is not None or len(self._fragments) < self.max_fragments:
+            self._fragments[record['id']] = (key, encoded)
+        return encoded
+
+    def encode_array(self, records, dumps):
+        """
+        JSON array of records, as jsonify writes it in compact mode
+        """
+        return '[' + ','.join([self.fragment(record, dumps) for record in records]) + ']\n'
+
+    def listing(self, etag, read, dumps):
+        """
+        Encoded body of the whole listing at etag; read() returns the records and is only called on a miss
+        """
+        cached_etag, body = self._listing
+        if cached_etag == etag:
+            return body
+        body = self.encode_array(read(), dumps).encode()
+        self._listing = (etag, body)
+        return body
+
+    def invalidate(self, container_id=None):
+        """
+        Drop the whole listing and, when given, the fragment of container_id
+        """
+        self._listing = (None, None)
+        if container_id is not None:
+            self._fragments.pop(container_id, None)
+
+    def clear(self):
+        """
+        Drop everything
+        """
+        self._listing = (None, None)
+        self._fragments.clear()
+
+    def stats(self):
+        """
+        Fragment hit/miss counters and current size
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'fragments': len(self._fragments), 'max_fragments': self.max_fragments}
@@ -0,0 +1,468 @@
+"""Load generator measuring RPS, latency and TTFB of the container API"""
+import argparse
+import http.client
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+
+OPERATIONS = ('create', 'get', 'list', 'update', 'delete')
+DEFAULT_MIX = 'create=2,get=4,list=1,update=2,delete=1'
+PERCENTILES = (50, 95, 99)
+
+
+def parse_mix(mix):
+    """
+    Parse a request mix such as 'create=2,get=4,list=1'.
+
+    Args:
+        mix (str): Comma separated operation=weight pairs.
+
+    Returns:
+        dict: Operation name to integer weight.
+    """
+    weights = {}
+    for part in filter(None, (item.strip() for item in mix.split(','))):
+        name, _, weight = part.partition('=')
+        if name not in OPERATIONS:
+            raise ValueError(f'Unknown operation {name!r}, expected one of {OPERATIONS}')
+        weights[name] = int(weight or 1)
+        if weights[name] < 0:
+            raise ValueError(f'Weight of {name!r} must not be negative')
+    if not any(weights.values()):
+        raise ValueError('The request mix needs at least one positive weight')
+    return weights
+
+
+def percentile(samples, pct):
+    """
+    Nearest-rank percentile of already sorted samples (0.0 when empty)
+    """
+    if not samples:
+        return 0.0
+    rank = max(1, -(-len(samples) * pct // 100))  # ceil without floats
+    return samples[min(len(samples), int(rank)) - 1]
+
+
+def summarize(latencies, ttfbs, elapsed):
+    """
+    Throughput and latency/TTFB percentiles (milliseconds) for one set of samples
+    """
+    latencies = sorted(latencies)
+    ttfbs = sorted(ttfbs)
+    summary = {
+        'requests': len(latencies),
+        'rps': round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+    }
+    for pct in PERCENTILES:
+        summary[f'latency_p{pct}_ms'] = round(percentile(latencies, pct) * 1000, 3)
+    for pct in PERCENTILES:
+        summary[f'ttfb_p{pct}_ms'] = round(percentile(ttfbs, pct) * 1000, 3)
+    return summary
+
+
+class _Worker(threading.Thread):
+    """
+    Sends requests over one keep-alive connection until the deadline
+    """
+
+    def __init__(self, target, ops, weights, ids, ids_lock, deadline, seed):
+        super().__init__(daemon=True)
+        self.target = target
+        self.ops = ops
+        self.weights = weights
+        self.ids = ids
+        self.ids_lock = ids_lock
+        self.deadline = deadline
+        self.random = random.Random(seed)
+        self.samples = []  # (operation, status, latency, ttfb)
+        self.errors = 0
+
+    def _pick_id(self, remove=False):
+        with self.ids_lock:
+            if not self.ids:
+                return None
+            index = self.random.randrange(len(self.ids))
+            if remove:
+                self.ids[index], self.ids[-1] = self.ids[-1], self.ids[index]
+                return self.ids.pop()
+            return self.ids[index]
+
+    def _request(self, operation):
+        path = self.target['path']
+        body = None
+        if operation == 'create':
+            method, url = 'POST', path
+            body = {'Hostname': f'loadgen-{self.random.getrandbits(32):08x}', 'Image': 'ubuntu'}
+        elif operation == 'list':
+            method, url = 'GET', f'{path}?{self.target["list_query"]}' if self.target['list_query'] else path
+        else:
+            container_id = self._pick_id(remove=operation == 'delete')
+            if container_id is None:
+                # Nothing to read or change yet, create instead
+                return self._request('create')
+            url = f'{path}/{container_id}'
+            method = {'get': 'GET', 'update': 'PUT', 'delete': 'DELETE'}[operation]
+            if operation == 'update':
+                body = {'Entrypoint': f'/run-{self.random.getrandbits(16)}.sh'}
+        return operation, method, url, body
+
+    def run(self):
+        conn = http.client.HTTPConnection(self.target['host'], self.target['port'], timeout=30)
+        headers = {'Content-Type': 'application/json', 'Connection': 'keep-alive'}
+        while time.perf_counter() < self.deadline:
+            operation, method, url, body = self._request(self.random.choices(self.ops, self.weights)[0])
+            payload = json.dumps(body).encode() if body is not None else None
+            start = time.perf_counter()
+            try:
+                conn.request(method, url, body=payload, headers=headers)
+                response = conn.getresponse()
+                ttfb = time.perf_counter() - start
+                data = response.read()
+                latency = time.perf_counter() - start
+            except (OSError, http.client.HTTPException):
+                self.errors += 1
+                conn.close()
+                continue
+            if operation == 'create' and response.status == 201:
+                with self.ids_lock:
+                    self.ids.append(json.loads(data)['id'])
+            self.samples.append((operation, response.status, latency, ttfb))
+        conn.close()
+
+
+def seed_containers(base_url, count):
+    """
+    Create count containers before the measurement and return their IDs
+    """
+    target = urlsplit(base_url)
+    conn = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=30)
+    ids = []
+    path = f'{target.path.rstrip("/")}/orchestrator/containers:batch'
+    for start in range(0, count, 1000):
+        items = [{'Hostname': f'seed-{i}'} for i in range(start, min(count, start + 1000))]
+        conn.request('POST', path, body=json.dumps(items), headers={'Content-Type': 'application/json'})
+        response = conn.getresponse()
+        results = json.loads(response.read())
+        if response.status != 201:
+            raise RuntimeError(f'Seeding failed with {response.status}: {results}')
+        ids.extend(result['container']['id'] for result in results['results'])
+    conn.close()
+    return ids
+
+
+def run_load(base_url, concurrency=4, duration=10.0, mix=DEFAULT_MIX, seed=0, seed_count=0, list_query='limit=100'):
+    """
+    Drive the container endpoints and collect throughput and latency figures.
+
+    Args:
+        base_url (str): Server root, e.g. http://127.0.0.1:5000.
+        concurrency (int): Number of client threads, one connection each.
+        duration (float): Seconds to generate load for.
+        mix (str): Request mix, see parse_mix().
+        seed (int): Random seed, for reproducible request sequences.
+        seed_count (int): Containers created before the measurement starts.
+        list_query (str): Query string used by 'list' requests.
+
+    Returns:
+        dict: Configuration, overall and per-operation results.
+    """
+    weights = parse_mix(mix)
+    target = urlsplit(base_url)
+    ids = seed_containers(base_url, seed_count) if seed_count else []
+    config = {
+        'host': target.hostname,
+        'port': target.port or 80,
+        'path': f'{target.path.rstrip("/")}/orchestrator/containers',
+        'list_query': list_query,
+    }
+    ids_lock = threading.Lock()
+    start = time.perf_counter()
+    deadline = start + duration
+    workers = [
+        _Worker(config, list(weights), list(weights.values()), ids, ids_lock, deadline, seed + index)
+        for index in range(concurrency)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+
+    samples = [sample for worker in workers for sample in worker.samples]
+    status_codes = {}
+    for _, status, _, _ in samples:
+        status_codes[str(status)] = status_codes.get(str(status), 0) + 1
+    overall = summarize([s[2] for s in samples], [s[3] for s in samples], elapsed)
+    overall['errors'] = sum(worker.errors for worker in workers)
+    overall['status_codes'] = status_codes
+    return {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'commit': _git_commit(),
+            'base_url': base_url,
+            'concurrency': concurrency,
+            'duration_s': round(elapsed, 3),
+            'mix': weights,
+            'seed_count': seed_count,
+            'list_query': list_query,
+        },
+        'overall': overall,
+        'operations': {
+            operation: summarize(
+                [s[2] for s in samples if s[0] == operation],
+                [s[3] for s in samples if s[0] == operation],
+                elapsed,
+            )
+            for operation in weights
+        },
+    }
+
+
+def compare(results, baseline):
+    """
+    Relative change (percent) of the key figures against a baseline run
+    """
+    def delta(new, old):
+        return round((new - old) / old * 100, 2) if old else None
+
+    keys = ('rps', 'latency_p50_ms', 'latency_p95_ms', 'latency_p99_ms', 'ttfb_p95_ms')
+    sections = {'overall': (results['overall'], baseline['overall'])}
+    for operation, current in results['operations'].items():
+        if operation in baseline.get('operations', {}):
+            sections[operation] = (current, baseline['operations'][operation])
+    return {name: {key: delta(new[key], old[key]) for key in keys} for name, (new, old) in sections.items()}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True, timeout=5
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    """
+    Keep-alive capable request handler that does not log every request
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def log_request(self, code='-', size='-'):
+        pass
+
+
+@contextmanager
+def local_server(app, threaded=True):
+    """
+    Serve a WSGI app on a free localhost port for the duration of the block
+    """
+    server = make_server('127.0.0.1', 0, app, threaded=threaded, request_handler=QuietRequestHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://127.0.0.1:{server.server_port}'
+    finally:
+        server.shutdown()
+        thread.join()
+        server.server_close()
+
+
+@contextmanager
+def local_asgi_server(asgi_app):
+    """
+    Serve an ASGI app with uvicorn on a free localhost port for the duration of the block
+    """
+    import uvicorn  # pylint: disable=import-outside-toplevel
+
+    # Idle keep-alive connections are the point of this server mode, so do not time them out
+    server = uvicorn.Server(uvicorn.Config(
+        asgi_app, host='127.0.0.1', port=0, log_level='warning', timeout_keep_alive=3600, backlog=4096
+    ))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    try:
+        while not server.started:
+            if not thread.is_alive():
+                raise RuntimeError('uvicorn failed to start')
+            time.sleep(0.01)
+        yield f'http://127.0.0.1:{server.servers[0].sockets[0].getsockname()[1]}'
+    finally:
+        server.should_exit = True
+        thread.join()
+
+
+@contextmanager
+def local_prefork_server(workers=1, threads=8, app='api'):
+    """
+    Start `python3 -m tools.server` over a temporary SQLite file for the duration of the block
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        process = subprocess.Popen(
+            [
+                sys.executable, '-m', 'tools.server', app, '--host', '127.0.0.1', '--port', '0',
+                '--workers', str(workers), '--threads', str(threads),
+                '--store', 'sqlite', '--sqlite-path', os.path.join(directory, 'containers.db'),
+            ],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+        )
+        try:
+            match = re.search(r'http://[\d.]+:\d+', process.stdout.readline())
+            if match is None:
+                raise RuntimeError('tools.server failed to start')
+            base_url = match.group(0)
+            _wait_until_healthy(base_url)
+            yield base_url
+        finally:
+            process.terminate()
+            process.wait(timeout=60)
+
+
+def _wait_until_healthy(base_url, timeout=30.0):
+    target = urlsplit(base_url)
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            conn = http.client.HTTPConnection(target.hostname, target.port, timeout=5)
+            conn.request('GET', '/healthz')
+            if conn.getresponse().status == 200:
+                conn.close()
+                return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+        time.sleep(0.05)
+
+
+@contextmanager
+def idle_connections(base_url, count):
+    """
+    Hold count idle connections open for the duration of the block.
+
+    They are connected without sending a request, like a keep-alive client
+    between requests (werkzeug's dev server closes every connection after
+    one response, so a completed request would not stay open there).
+    """
+    target = urlsplit(base_url)
+    connections = []
+    try:
+        for _ in range(count):
+            connection = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=30)
+            connection.connect()
+            connections.append(connection)
+        yield connections
+    finally:
+        for connection in connections:
+            connection.close()
+
+
+@contextmanager
+def local_app_server(mode='wsgi', workers=1, threads=8):
+    """
+    Start tools.api locally with the thread-safe store, as 'wsgi' (threaded werkzeug) or 'asgi' (uvicorn),
+    or as 'prefork' (tools.server, workers processes of threads threads over a SQLite file)
+    """
+    # pylint: disable=import-outside-toplevel
+    config = {'STORE_BACKEND': os.environ.get('BTF_STORE', 'locked')}
+    if mode == 'prefork':
+        with local_prefork_server(workers, threads) as base_url:
+            yield base_url
+    elif mode == 'asgi':
+        from tools.asgi import create_asgi_app
+        with local_asgi_server(create_asgi_app(config)) as base_url:
+            yield base_url
+    else:
+        from tools.api import create_app
+        with local_server(create_app(config)) as base_url:
+            yield base_url
+
+
+def _print_report(results, comparison=None):
+    overall = results['overall']
+    print(f"{'operation':<10} {'requests':>9} {'rps':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ttfb p95':>9}")
+    for name, row in [('overall', overall)] + sorted(results['operations'].items()):
+        print(f"{name:<10} {row['requests']:>9} {row['rps']:>10} {row['latency_p50_ms']:>9} "
+              f"{row['latency_p95_ms']:>9} {row['latency_p99_ms']:>9} {row['ttfb_p95_ms']:>9}")
+    print(f"errors: {overall['errors']}  status codes: {overall['status_codes']}")
+    if comparison:
+        print('change vs baseline (%):')
+        for name, row in comparison.items():
+            print(f'  {name:<10} ' + '  '.join(f'{key}={value:+}' for key, value in row.items() if value is not None))
+
+
+def main(argv=None):
+    """
+    Command line entry point: python3 -m tools.loadgen [options]
+    """
+    parser = argparse.ArgumentParser(description="Generate load against the container orchestrator API")
+    parser.add_argument("--url", type=str, default=None,
+                        help="Base URL of a running server (default: start tools.api locally with BTF_STORE=locked)")
+    parser.add_argument("--server", choices=("wsgi", "asgi", "prefork"), default="wsgi",
+                        help="Mode of the local server: threaded WSGI, ASGI via uvicorn or preforked tools.server (default: wsgi)")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes of the prefork server (default: 1)")
+    parser.add_argument("--threads", type=int, default=8, help="Threads per worker of the prefork server (default: 8)")
+    parser.add_argument("--idle-connections", type=int, default=0,
+                        help="Keep-alive connections held open, idle, while measuring (default: 0)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Client threads (default: 4)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load (default: 10)")
+    parser.add_argument("--mix", type=str, default=DEFAULT_MIX, help=f"Request mix (default: {DEFAULT_MIX})")
+    parser.add_argument("--seed-containers", type=int, default=100, help="Containers created before measuring (default: 100)")
+    parser.add_argument("--list-query", type=str, default="limit=100", help="Query string of list requests (default: limit=100)")
+    parser.add_argument("--random-seed", type=int, default=0, help="Random seed (default: 0)")
+    parser.add_argument("--output", type=str, default=None, help="Write the results as JSON to this file")
+    parser.add_argument("--compare", type=str, default=None, help="Baseline results JSON to compare against")
+    parser.add_argument("--max-rps-drop", type=float, default=None,
+                        help="Exit with status 1 if overall RPS dropped by more than this percent vs --compare")
+    args = parser.parse_args(argv)
+
+    options = {
+        'concurrency': args.concurrency,
+        'duration': args.duration,
+        'mix': args.mix,
+        'seed': args.random_seed,
+        'seed_count': args.seed_containers,
+        'list_query': args.list_query,
+    }
+    if args.url:
+        with idle_connections(args.url, args.idle_connections):
+            results = run_load(args.url, **options)
+    else:
+        with local_app_server(args.server, args.workers, args.threads) as base_url, idle_connections(base_url, args.idle_connections):
+            results = run_load(base_url, **options)
+        results['meta']['server'] = args.server
+        if args.server == 'prefork':
+            results['meta']['workers'] = args.workers
+            results['meta']['threads'] = args.threads
+    results['meta']['idle_connections'] = args.idle_connections
+
+    comparison = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as baseline_file:
+            comparison = compare(results, json.load(baseline_file))
+        results['comparison'] = comparison
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(results, output_file, indent=2)
+    _print_report(results, comparison)
+
+    rps_change = comparison['overall']['rps'] if comparison else None
+    if args.max_rps_drop is not None and rps_change is not None and rps_change < -args.max_rps_drop:
+        print(f"::error::Throughput dropped by {-rps_change}% (limit {args.max_rps_drop}%)")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
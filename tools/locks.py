@@ -0,0 +1,40 @@
+"""Per-key locks for container mutations"""
+import threading
+from contextlib import contextmanager
+
+
+class KeyedLock:
+    """
+    One lock per key (container ID), created on demand and dropped when unused.
+
+    Writers to the same container are serialised, writers to different
+    containers never wait for each other: the shared guard is only held to
+    look up the key's lock, never while it is held.
+    """
+
+    def __init__(self):
+        self._guard = threading.Lock()
+        self._locks = {}  # key -> [lock, number of holders and waiters]
+
+    @contextmanager
+    def __call__(self, key):
+        with self._guard:
+            entry = self._locks.get(key)
+            if entry is None:
+                entry = self._locks[key] = [threading.Lock(), 0]
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._guard:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._locks[key]
+
+    def __len__(self):
+        """
+        Keys currently locked or waited for
+        """
+        with self._guard:
+            return len(self._locks)
@@ -0,0 +1,179 @@
+"""Request metrics of the API in the Prometheus text exposition format"""
+import threading
+import time
+from bisect import bisect_left
+
+from flask import request
+
+
+PROMETHEUS_MIMETYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Methods reported by name, any other is counted as 'other' to bound the label values
+KNOWN_METHODS = frozenset(('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'))
+
+# WSGI environ key holding the start time of a request
+START_KEY = 'btf.metrics.start'
+
+
+class Metrics:
+    """
+    Counters, latency histograms and gauges of one app.
+
+    Requests are labelled with the matched URL rule (e.g.
+    /orchestrator/containers/<int:container_id>), never the raw path, so the
+    number of series stays bounded. Recording a request is a bisect and a
+    few dict updates under one lock; rendering does the cumulative sums.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._requests = {}  # (method, route, status) -> count
+        self._latency = {}  # (method, route) -> [count per bucket..., count over the last bucket, sum]
+        self._auth_failures = {}  # reason -> count
+        self._in_flight = 0
+        self._gauges = []  # (name, help, callable)
+
+    def request_started(self):
+        """
+        Count a request in flight
+        """
+        with self._lock:
+            self._in_flight += 1
+
+    def request_finished(self, method, route, status, seconds):
+        """
+        Record a finished request and its latency
+        """
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            key = (method, route, status)
+            self._requests[key] = self._requests.get(key, 0) + 1
+            histogram = self._latency.get((method, route))
+            if histogram is None:
+                histogram = self._latency[(method, route)] = [0] * (len(self.buckets) + 1) + [0.0]
+            histogram[index] += 1
+            histogram[-1] += seconds
+
+    def request_ended(self):
+        """
+        Count a request out of flight, whether or not it produced a response
+        """
+        with self._lock:
+            self._in_flight -= 1
+
+    def auth_failure(self, reason):
+        """
+        Count a rejected login or token
+        """
+        with self._lock:
+            self._auth_failures[reason] = self._auth_failures.get(reason, 0) + 1
+
+    def add_gauge(self, name, help_text, read):
+        """
+        Gauge whose value read() returns at every scrape
+        """
+        self._gauges.append((name, help_text, read))
+
+    def render(self):
+        """
+        Every metric in the Prometheus text format
+        """
+        with self._lock:
+            requests = sorted(self._requests.items())
+            latency = sorted((key, list(histogram)) for key, histogram in self._latency.items())
+            auth_failures = sorted(self._auth_failures.items())
+            in_flight = self._in_flight
+
+        lines = [
+            '# HELP btf_http_requests_total HTTP requests by method, route and status.',
+            '# TYPE btf_http_requests_total counter',
+        ]
+        lines += [
+            f'btf_http_requests_total{_labels(method=method, route=route, status=status)} {count}'
+            for (method, route, status), count in requests
+        ]
+        lines += [
+            '# HELP btf_http_request_duration_seconds Time until the response headers, by method and route.',
+            '# TYPE btf_http_request_duration_seconds histogram',
+        ]
+        for (method, route), histogram in latency:
+            lines += self._histogram_lines(method, route, histogram)
+        lines += [
+            '# HELP btf_http_requests_in_flight HTTP requests being handled.',
+            '# TYPE btf_http_requests_in_flight gauge',
+            f'btf_http_requests_in_flight {in_flight}',
+            '# HELP btf_auth_failures_total Rejected logins and tokens by reason.',
+            '# TYPE btf_auth_failures_total counter',
+        ]
+        lines += [f'btf_auth_failures_total{_labels(reason=reason)} {count}' for reason, count in auth_failures]
+        for name, help_text, read in self._gauges:
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} gauge', f'{name} {read()}']
+        return '\n'.join(lines) + '\n'
+
+    def _histogram_lines(self, method, route, histogram):
+        """
+        Cumulative _bucket lines, _sum and _count of one latency histogram
+        """
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), histogram):
+            cumulative += count
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            lines.append(f'btf_http_request_duration_seconds_bucket{_labels(method=method, route=route, le=le)} {cumulative}')
+        lines.append(f'btf_http_request_duration_seconds_sum{_labels(method=method, route=route)} {histogram[-1]!r}')
+        lines.append(f'btf_http_request_duration_seconds_count{_labels(method=method, route=route)} {cumulative}')
+        return lines
+
+
+def _labels(**labels):
+    """
+    {name="value",...} with the values escaped as the text format requires
+    """
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def init_app(app, metrics=None):
+    """
+    Instrument every request of app with before/after/teardown request hooks.
+
+    Registered on the app itself, ahead of any blueprint hook, so requests
+    rejected by another before-request hook are counted too. after_request
+    also sees the 500 response of an unhandled exception, except when
+    PROPAGATE_EXCEPTIONS (testing/debug) re-raises it; the in-flight gauge
+    is therefore decremented in teardown_request, which runs in every case.
+    Each hook resolves the request proxy once: proxy lookups are most of
+    their cost.
+
+    Returns:
+        Metrics: The app's metrics, also in app.extensions['btf_metrics'].
+    """
+    metrics = metrics or Metrics()
+    app.extensions['btf_metrics'] = metrics
+
+    @app.before_request
+    def start_timer():
+        request.environ[START_KEY] = time.perf_counter()
+        metrics.request_started()
+
+    @app.after_request
+    def record_request(response):
+        req = request._get_current_object()  # pylint: disable=protected-access
+        start = req.environ.get(START_KEY)
+        if start is not None:
+            method = req.method if req.method in KNOWN_METHODS else 'other'
+            route = req.url_rule.rule if req.url_rule is not None else '<unmatched>'
+            metrics.request_finished(method, route, response.status_code, time.perf_counter() - start)
+        return response
+
+    @app.teardown_request
+    def end_request(_exc):
+        if request.environ.pop(START_KEY, None) is not None:
+            metrics.request_ended()
+
+    return metrics
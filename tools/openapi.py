@@ -1,124 +1,170 @@
 """"OpenAPI server for test documentation"""
-import argparse
-from flask import Flask, request
-from flask_restx import Api, Resource, fields
-
-app = Flask(__name__)
-api = Api(
-    app,
-    title="Container Orchestrator API",
-    version="0.01",
-    description="API for managing containers. Use the 'Try it out' button to test the endpoints."
-)
-
-# In-memory DB
-db = {}
-
-def get_next_id():
+import os
+import sys
+from functools import lru_cache
+from flask import Flask, current_app, request
+
+from tools.containers import CONTAINERS_EMPTY, FIELD_LENGTH_LIMITS, ContainerError, ContainerService
+
+DEFAULT_CONFIG = {
+    # Container DB ('dict', 'locked', 'compact', 'durable' or 'sqlite', see tools/storage.py)
+    "STORE_BACKEND": os.environ.get("BTF_STORE", "dict"),
+    "SQLITE_PATH": os.environ.get("BTF_SQLITE_PATH"),
+    "DURABLE_PATH": os.environ.get("BTF_DURABLE_PATH"),
+    # Reject containers whose Hostname is already taken
+    "UNIQUE_HOSTNAMES": False,
+    # Request body and container field size limits (413 beyond), as in tools/api.py
+    "MAX_CONTENT_LENGTH": 8 * 1024 * 1024,
+    "MAX_FIELD_LENGTHS": FIELD_LENGTH_LIMITS,
+}
+
+
+def create_app(config=None):
     """
-    Helper function to generate next ID
+    Build an independent documentation server with its own container store.
+
+    flask_restx is only imported here, so importing this module stays cheap.
+
+    Args:
+        config (dict): Overrides for DEFAULT_CONFIG.
+
+    Returns:
+        Flask: The configured application (the RESTX Api is in app.extensions['restx_api']).
     """
-    return max(db.keys(), default=0) + 1
+    flask_app = Flask(__name__)
+    flask_app.config.update(DEFAULT_CONFIG)
+    flask_app.config.update(config or {})
+    flask_app.extensions["btf_containers"] = ContainerService.from_config(flask_app.config)
+    flask_app.extensions["btf_store"] = flask_app.extensions["btf_containers"].store
+    flask_app.extensions["restx_api"] = init_api(flask_app)
+    return flask_app
 
-# Define Namespace
-container_ns = api.namespace("Containers", description="Container operations")
 
-# Define Models
-container_model = api.model("Container", {
-    "Hostname": fields.String(required=True, description="Hostname of the container"),
-    "Entrypoint": fields.String(description="Entrypoint command for the container"),
-    "Image": fields.String(default="ubuntu", description="Container image"),
-})
+def get_service():
+    """
+    Container service of the current application
+    """
+    return current_app.extensions["btf_containers"]
 
-container_response = api.clone("ContainerResponse", container_model, {
-    "id": fields.Integer(description="Unique ID of the container"),
-})
 
-@container_ns.route("/")
-class ContainerList(Resource):
+def init_api(flask_app):
     """
-    Endpoints
+    Register the Swagger UI, models and container resources on flask_app
     """
-    @container_ns.doc("list_containers")
-    @container_ns.response(200, "Success", [container_response])
-    @container_ns.response(400, "No containers found")
-    def get(self):
-        """List all containers"""
-        if not db:
-            return {"error": "No containers available."}, 400
-        return list(db.values()), 200
-
-    @container_ns.doc("create_container")
-    @container_ns.expect(container_model, validate=True)
-    @container_ns.response(201, "Created", container_response)
-    @container_ns.response(400, "Invalid data")
-    def post(self):
-        """Create a new container"""
-        data = request.json
-        container_id = get_next_id()
-        db[container_id] = {
-            "id": container_id,
-            "Hostname": data["Hostname"],
-            "Entrypoint": data.get("Entrypoint", ""),
-            "Image": data.get("Image", "ubuntu"),
-        }
-        return db[container_id], 201
-
-
-@container_ns.route("/<int:container_id>")
-@container_ns.param("container_id", "The unique ID of the container")
-class Container(Resource):
+    # pylint: disable=import-outside-toplevel,unused-variable
+    from flask_restx import Api, Namespace, Resource, fields
+
+    api = Api(
+        flask_app,
+        title="Container Orchestrator API",
+        version="0.01",
+        description="API for managing containers. Use the 'Try it out' button to test the endpoints."
+    )
+
+    # Define Namespace (mounted on /orchestrator/containers below)
+    container_ns = Namespace("Containers", description="Container operations")
+
+    # Define Models
+    container_model = api.model("Container", {
+        "Hostname": fields.String(required=True, description="Hostname of the container"),
+        "Entrypoint": fields.String(description="Entrypoint command for the container"),
+        "Image": fields.String(default="ubuntu", description="Container image"),
+    })
+
+    container_response = api.clone("ContainerResponse", container_model, {
+        "id": fields.Integer(description="Unique ID of the container"),
+    })
+
+    @container_ns.route("/")
+    class ContainerList(Resource):
+        """
+        Endpoints
+        """
+        @container_ns.doc("list_containers")
+        @container_ns.response(200, "Success", [container_response])
+        @container_ns.response(400, "No containers found")
+        def get(self):
+            """List all containers"""
+            service = get_service()
+            if service.is_empty():
+                return {"error": CONTAINERS_EMPTY}, 400
+            return list(service.values()), 200
+
+        @container_ns.doc("create_container")
+        @container_ns.expect(container_model, validate=True)
+        @container_ns.response(201, "Created", container_response)
+        @container_ns.response(400, "Invalid data or duplicate Hostname")
+        def post(self):
+            """Create a new container"""
+            try:
+                return get_service().create(request.json), 201
+            except ContainerError as error:
+                return {"error": str(error)}, error.status
+
+    @container_ns.route("/<int:container_id>")
+    @container_ns.param("container_id", "The unique ID of the container")
+    class Container(Resource):
+        """
+        Containers
+        """
+        @container_ns.doc("get_container")
+        @container_ns.response(200, "Success", container_response)
+        @container_ns.response(404, "Container not found")
+        def get(self, container_id):
+            """Retrieve a container by ID"""
+            try:
+                return get_service().get(container_id), 200
+            except ContainerError as error:
+                return {"error": str(error)}, error.status
+
+        @container_ns.doc("update_container")
+        @container_ns.expect(container_model, validate=True)
+        @container_ns.response(200, "Updated", container_response)
+        @container_ns.response(404, "Container not found")
+        def put(self, container_id):
+            """Update a container by ID"""
+            try:
+                return get_service().update(container_id, request.json), 200
+            except ContainerError as error:
+                return {"error": str(error)}, error.status
+
+        @container_ns.doc("delete_container")
+        @container_ns.response(200, "Deleted")
+        @container_ns.response(404, "Container not found")
+        def delete(self, container_id):
+            """Delete a container by ID"""
+            try:
+                get_service().delete(container_id)
+            except ContainerError as error:
+                return {"error": str(error)}, error.status
+            return {"message": f"container {container_id} deleted"}, 200
+
+    # Add Namespace to the API
+    api.add_namespace(container_ns, path="/orchestrator/containers")
+    return api
+
+
+@lru_cache(maxsize=None)
+def default_app():
     """
-    Containers
+    Default instance, built on first use
     """
-    @container_ns.doc("get_container")
-    @container_ns.response(200, "Success", container_response)
-    @container_ns.response(404, "Container not found")
-    def get(self, container_id):
-        """Retrieve a container by ID"""
-        container = db.get(container_id)
-        if not container:
-            return {"error": "Container not found"}, 404
-        return container, 200
-
-    @container_ns.doc("update_container")
-    @container_ns.expect(container_model, validate=True)
-    @container_ns.response(200, "Updated", container_response)
-    @container_ns.response(404, "Container not found")
-    def put(self, container_id):
-        """Update a container by ID"""
-        data = request.json
-        container = db.get(container_id)
-        if not container:
-            return {"error": "Container not found"}, 404
-        container["Hostname"] = data.get("Hostname", container["Hostname"])
-        container["Entrypoint"] = data.get("Entrypoint", container["Entrypoint"])
-        container["Image"] = data.get("Image", container["Image"])
-        return container, 200
-
-    @container_ns.doc("delete_container")
-    @container_ns.response(200, "Deleted")
-    @container_ns.response(404, "Container not found")
-    def delete(self, container_id):
-        """Delete a container by ID"""
-        container = db.pop(container_id, None)
-        if not container:
-            return {"error": "Container not found"}, 404
-        return {"message": f"Container {container_id} deleted."}, 200
-
-
-# Add Namespace to the API
-api.add_namespace(container_ns, path="/orchestrator/containers")
+    return create_app()
 
-if __name__ == "__main__":
-    if __name__ == "__main__":
-        # Use argparse to parse command-line arguments
-        parser = argparse.ArgumentParser(description="Run Flask app with a custom port")
-        parser.add_argument("--port", type=int, default=5050, help="Port to run the Flask app on (default: 5050)")
-        parser.add_argument("--host", type=str, default="0.0.0.0", help="Host to bind the Flask app (default: 0.0.0.0)")
 
-        # Parse the arguments
-        args = parser.parse_args()
+def __getattr__(name):
+    """
+    Keep `from tools.openapi import app, api, db` working without building the app at import time
+    """
+    if name == "app":
+        return default_app()
+    if name == "api":
+        return default_app().extensions["restx_api"]
+    if name == "db":
+        return default_app().extensions["btf_store"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-        # Start the Flask app with the specified port and host
-        app.run(debug=True, host=args.host, port=args.port)
+
+if __name__ == "__main__":
+    from tools.server import main
+    sys.exit(main(app_name="openapi"))
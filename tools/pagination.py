@@ -0,0 +1,75 @@
+"""Limit/offset and cursor pagination helpers for container listings"""
+import base64
+import binascii
+import json
+from urllib.parse import urlencode
+
+
+class PaginationError(ValueError):
+    """
+    Raised for malformed pagination query parameters
+    """
+
+
+def encode_cursor(last_id):
+    """
+    Build the opaque cursor pointing right after the container last_id
+    """
+    raw = json.dumps({'after': last_id}, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Return the container ID encoded in a cursor from encode_cursor()
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        after = json.loads(raw)['after']
+    except (binascii.Error, ValueError, TypeError, KeyError) as error:
+        raise PaginationError('Bad request. Invalid "cursor".') from error
+    if not isinstance(after, int) or isinstance(after, bool):
+        raise PaginationError('Bad request. Invalid "cursor".')
+    return after
+
+
+def _non_negative_int(args, name):
+    value = args.get(name)
+    if value is None:
+        return None
+    try:
+        number = int(value)
+    except ValueError:
+        number = -1
+    if number < 0:
+        raise PaginationError(f'Bad request. "{name}" must be a non-negative integer.')
+    return number
+
+
+def parse_page_args(args):
+    """
+    Read pagination parameters from a query string.
+
+    Args:
+        args (Mapping): Request query arguments. 'limit' (or its alias 'count'),
+            'offset' and 'cursor' are recognised.
+
+    Returns:
+        tuple: (limit, offset, after_id); limit and after_id are None when absent.
+    """
+    limit = _non_negative_int(args, 'limit')
+    if limit is None:
+        limit = _non_negative_int(args, 'count')
+    offset = _non_negative_int(args, 'offset') or 0
+    cursor = args.get('cursor')
+    after_id = decode_cursor(cursor) if cursor else None
+    return limit, offset, after_id
+
+
+def next_page_url(base_url, args, cursor):
+    """
+    URL of the next page: the same query with the new cursor and no offset
+    """
+    query = [(key, value) for key, value in args.items(multi=True) if key not in ('cursor', 'offset')]
+    query.append(('cursor', cursor))
+    return f'{base_url}?{urlencode(query)}'
@@ -0,0 +1,86 @@
+"""Compact container records for the in-memory stores"""
+import sys
+
+
+# Fields stored for every container next to its 'id'
+CONTAINER_FIELDS = ('Hostname', 'Entrypoint', 'Image')
+# Fields whose string values are interned: most containers share a handful of images
+INTERNED_FIELDS = ('Image',)
+
+_MISSING = object()
+_SLOT_SET = frozenset(('id',) + CONTAINER_FIELDS)
+
+
+class ContainerRecord:
+    """
+    One container in four slots instead of a dict.
+
+    A dict record costs a hash table per container; the slots are a fixed
+    array on the object. String values of INTERNED_FIELDS are interned, so
+    thousands of containers running "ubuntu" share one string instead of
+    holding a copy each (request bodies are parsed into new strings).
+
+    Records support the read access the stores use ([], get(), keys()) and
+    update(). as_dict() builds the dict the other stores hold, so a
+    container serializes to the same JSON whichever store keeps it. A field
+    that was never set is left out, as a dict would.
+    """
+    __slots__ = ('id',) + CONTAINER_FIELDS
+
+    def __init__(self, container_id, fields):
+        self.id = container_id  # pylint: disable=invalid-name
+        self.update(fields)
+
+    @classmethod
+    def check_fields(cls, fields):
+        """
+        Raise ValueError if fields holds a key the record has no slot for
+        """
+        if not _SLOT_SET.issuperset(fields):
+            field = next(field for field in fields if field not in _SLOT_SET)
+            raise ValueError(f'Unknown container field {field!r}')
+
+    def update(self, fields):
+        """
+        Set fields (a mapping of container fields); raises ValueError, changing nothing, for any other key
+        """
+        self.check_fields(fields)
+        for field, value in fields.items():
+            setattr(self, field, sys.intern(value) if type(value) is str and field in INTERNED_FIELDS else value)  # pylint: disable=unidiomatic-typecheck
+
+    def __getitem__(self, field):
+        try:
+            return getattr(self, field)
+        except AttributeError:
+            raise KeyError(field) from None
+
+    def get(self, field, default=None):
+        """
+        Value of field, default if it was never set
+        """
+        return getattr(self, field, default)
+
+    def keys(self):
+        """
+        Names of the fields set, 'id' first
+        """
+        return [field for field in self.__slots__ if getattr(self, field, _MISSING) is not _MISSING]
+
+    def as_dict(self):
+        """
+        The record as the dict the other stores keep
+        """
+        try:
+            return {'id': self.id, 'Hostname': self.Hostname, 'Entrypoint': self.Entrypoint, 'Image': self.Image}
+        except AttributeError:  # created without every field
+            return {field: getattr(self, field) for field in self.keys()}
+
+    def __eq__(self, other):
+        if isinstance(other, ContainerRecord):
+            other = other.as_dict()
+        return self.as_dict() == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f'ContainerRecord({self.as_dict()!r})'
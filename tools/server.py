@@ -0,0 +1,318 @@
+"""Preforking multi-process server for tools.api and tools.openapi"""
+import argparse
+import importlib
+import logging
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+
+# App name -> (factory, default port)
+APPS = {
+    'api': ('tools.api:create_app', 5000),
+    'openapi': ('tools.openapi:create_app', 5050),
+}
+
+# Exit status of a worker whose app failed to load: respawning it would fail the same way
+WORKER_BOOT_ERROR = 3
+
+log = logging.getLogger('btf.server')
+
+
+def load_app(factory, config=None):
+    """
+    Build an app from a 'module:function' factory path
+    """
+    module_name, function_name = factory.split(':')
+    return getattr(importlib.import_module(module_name), function_name)(config)
+
+
+class RequestHandler(WSGIRequestHandler):
+    """
+    HTTP/1.1 keep-alive handler without per-request logging.
+
+    timeout closes connections idle for that many seconds, so keep-alive
+    clients cannot hold every thread of a worker.
+    """
+    protocol_version = 'HTTP/1.1'
+    timeout = 5
+
+    def log_request(self, code='-', size='-'):
+        pass
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """
+    werkzeug WSGI server handling connections on a fixed pool of threads.
+
+    werkzeug's threaded server starts a thread per connection; the pool
+    bounds a worker's threads, and so the memory and GIL contention of a
+    traffic spike. Connections wait in the pool's queue for a free thread.
+    """
+    multithread = True
+    pool = None
+
+    def __init__(self, host, port, app, threads=8, multiprocess=False, **kwargs):
+        self.multiprocess = multiprocess
+        # werkzeug calls server_close() while setting up a server on an inherited fd, so the pool comes after
+        super().__init__(host, port, app, **kwargs)
+        self.pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='btf-worker')
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._process_request, request, client_address)
+
+    def _process_request(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:  # pylint: disable=broad-exception-caught
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        if self.pool is not None:
+            # Let the requests being handled finish
+            self.pool.shutdown(wait=True)
+
+
+class PreforkServer:
+    """
+    Master process forking workers that all accept on one listening socket.
+
+    The master binds the socket and never imports the app: each worker
+    loads it after the fork, so workers share no threads or database
+    connections, and a reload picks up code changes. Workers share state
+    only through the store, which for more than one worker must be a SQLite
+    file (see tools/storage.py).
+
+    Signals to the master:
+        SIGHUP: graceful reload. New workers start, then the old ones stop
+            accepting, finish their requests and exit.
+        SIGTERM, SIGINT: graceful stop, the same for every worker.
+    A worker that dies is replaced. Workers still running graceful_timeout
+    seconds after being asked to stop are killed.
+    """
+
+    def __init__(self, factory, config=None, host='127.0.0.1', port=5000, workers=1, threads=8, graceful_timeout=30.0, keep_alive=5):
+        self.factory = factory
+        self.config = config
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.threads = threads
+        self.graceful_timeout = graceful_timeout
+        self.keep_alive = keep_alive
+        self.socket = None
+        self.generation = 0
+        self.children = {}  # pid -> generation
+        self.deadlines = {}  # pid -> time after which it is killed
+        self._reload_requested = False
+        self._stop_requested = False
+
+    def bind(self):
+        """
+        Open the listening socket shared by every worker
+        """
+        self.socket = socket.create_server((self.host, self.port), backlog=2048)
+        self.socket.set_inheritable(True)
+        self.port = self.socket.getsockname()[1]
+        return self.port
+
+    def spawn(self):
+        """
+        Fork one worker of the current generation
+        """
+        pid = os.fork()
+        if pid == 0:
+            status = 1
+            try:
+                status = self._work()
+            except BaseException:  # pylint: disable=broad-exception-caught
+                log.exception('Worker %d crashed', os.getpid())
+            finally:
+                os._exit(status)  # never return into the master's stack
+        self.children[pid] = self.generation
+        log.info('Worker %d started (generation %d)', pid, self.generation)
+        return pid
+
+    def _work(self):
+        """
+        Worker body: serve until SIGTERM, then drain and return the exit status
+        """
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C reaches the whole group; the master decides
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        try:
+            app = load_app(self.factory, self.config)
+        except Exception:  # pylint: disable=broad-exception-caught
+            log.exception('Worker %d failed to load %s', os.getpid(), self.factory)
+            return WORKER_BOOT_ERROR
+        handler = type('WorkerRequestHandler', (RequestHandler,), {'timeout': self.keep_alive})
+        server = PooledWSGIServer(
+            self.host, self.port, app, threads=self.threads, multiprocess=self.workers > 1,
+            handler=handler, fd=self.socket.fileno(),
+        )
+        self.socket.close()  # the server holds its own duplicate
+
+        def stop(*_):
+            # shutdown() waits for serve_forever(), which runs on this thread
+            signal.signal(signal.SIGTERM, signal.SIG_IGN)
+            threading.Thread(target=server.shutdown, daemon=True).start()
+
+        signal.signal(signal.SIGTERM, stop)
+        server.serve_forever()  # closes the socket and drains the pool on the way out
+        return 0
+
+    def spawn_missing(self):
+        """
+        Start workers until the current generation has self.workers of them
+        """
+        current = sum(1 for generation in self.children.values() if generation == self.generation)
+        for _ in range(self.workers - current):
+            self.spawn()
+
+    def stop_workers(self, pids):
+        """
+        Ask workers to finish their requests and exit
+        """
+        deadline = time.monotonic() + self.graceful_timeout
+        for pid in pids:
+            if pid not in self.deadlines:
+                self.deadlines[pid] = deadline
+                _signal(pid, signal.SIGTERM)
+
+    def reload(self):
+        """
+        Replace every worker without refusing a connection
+        """
+        old = list(self.children)
+        self.generation += 1
+        log.info('Reloading: starting generation %d', self.generation)
+        self.spawn_missing()
+        self.stop_workers(old)
+
+    def reap(self):
+        """
+        Collect exited workers and kill those past their deadline; False if one could not boot
+        """
+        booted = True
+        while self.children:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if pid == 0:
+                break
+            generation = self.children.pop(pid, None)
+            self.deadlines.pop(pid, None)
+            if os.WIFEXITED(status) and os.WEXITSTATUS(status) == WORKER_BOOT_ERROR:
+                booted = False
+            elif generation == self.generation and not self._stop_requested:
+                log.warning('Worker %d exited unexpectedly (status %d), replacing it', pid, status)
+        now = time.monotonic()
+        for pid, deadline in list(self.deadlines.items()):
+            if now > deadline:
+                log.warning('Worker %d did not stop within %ss, killing it', pid, self.graceful_timeout)
+                _signal(pid, signal.SIGKILL)
+                self.deadlines[pid] = float('inf')
+        return booted
+
+    def serve(self):
+        """
+        Run the master loop until SIGTERM/SIGINT; returns the exit status
+        """
+        if self.socket is None:
+            self.bind()
+        signal.signal(signal.SIGHUP, self._request_reload)
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+        self.spawn_missing()
+        status = 0
+        while not self._stop_requested:
+            if self._reload_requested:
+                self._reload_requested = False
+                self.reload()
+            if not self.reap():
+                log.error('A worker could not load %s, stopping', self.factory)
+                self._stop_requested = True
+                status = 1
+                break
+            self.spawn_missing()
+            time.sleep(0.1)
+        log.info('Stopping %d workers', len(self.children))
+        self.stop_workers(list(self.children))
+        while self.children:
+            self.reap()
+            time.sleep(0.05)
+        self.socket.close()
+        return status
+
+    def _request_reload(self, *_):
+        self._reload_requested = True
+
+    def _request_stop(self, *_):
+        self._stop_requested = True
+
+
+def _signal(pid, signum):
+    try:
+        os.kill(pid, signum)
+    except ProcessLookupError:
+        pass  # already gone, reap() collects it
+
+
+def main(argv=None, app_name=None):
+    """
+    Command line entry point: python3 -m tools.server {api,openapi} [options]
+
+    tools.api and tools.openapi call it with app_name set when run directly.
+    """
+    parser = argparse.ArgumentParser(description="Serve the orchestrator API with preforked worker processes")
+    if app_name is None:
+        parser.add_argument("app", choices=sorted(APPS), help="App to serve")
+    parser.add_argument("--host", type=str, default="0.0.0.0", help="Host to bind (default: 0.0.0.0)")
+    parser.add_argument("--port", type=int, default=None, help="Port to listen on (default: 5000 for api, 5050 for openapi)")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes (default: 1)")
+    parser.add_argument("--threads", type=int, default=8, help="Request handling threads per worker (default: 8)")
+    parser.add_argument("--store", choices=("dict", "locked", "compact", "durable", "sqlite"), default=os.environ.get("BTF_STORE"),
+                        help="Storage backend (default: locked, or sqlite with more than one worker)")
+    parser.add_argument("--sqlite-path", type=str, default=os.environ.get("BTF_SQLITE_PATH"),
+                        help="SQLite database file, shared by every worker (required with more than one worker)")
+    parser.add_argument("--durable-path", type=str, default=os.environ.get("BTF_DURABLE_PATH"),
+                        help="Log and snapshot directory of the durable store (single worker only)")
+    parser.add_argument("--graceful-timeout", type=float, default=30.0,
+                        help="Seconds a stopping worker gets to finish its requests (default: 30)")
+    parser.add_argument("--keep-alive", type=float, default=5.0, help="Seconds an idle connection is kept open (default: 5)")
+    args = parser.parse_args(argv)
+    app_name = app_name or args.app
+
+    if args.workers < 1 or args.threads < 1:
+        parser.error("--workers and --threads must be at least 1")
+    if not hasattr(os, 'fork'):
+        parser.error("The preforking server needs os.fork() (Linux or macOS)")
+    store = args.store or ('sqlite' if args.workers > 1 else 'locked')
+    if args.workers > 1 and (store != 'sqlite' or not args.sqlite_path):
+        parser.error("Worker processes only share containers through a SQLite file: use --store sqlite --sqlite-path PATH")
+    if store == 'durable' and not args.durable_path:
+        parser.error("The durable store needs --durable-path")
+    # Requests are handled on several threads, so dict is only honoured if asked for explicitly
+    config = {'STORE_BACKEND': store, 'SQLITE_PATH': args.sqlite_path, 'DURABLE_PATH': args.durable_path}
+
+    logging.basicConfig(level=logging.INFO, format='[%(asctime)s] [%(process)d] %(message)s')
+    factory, default_port = APPS[app_name]
+    server = PreforkServer(
+        factory, config, host=args.host, port=default_port if args.port is None else args.port,
+        workers=args.workers, threads=args.threads, graceful_timeout=args.graceful_timeout, keep_alive=args.keep_alive,
+    )
+    port = server.bind()
+    print(f"Serving {app_name} on http://{args.host}:{port} with {args.workers} worker(s) x {args.threads} thread(s)", flush=True)
+    return server.serve()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
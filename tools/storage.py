@@ -0,0 +1,1015 @@
+"""Pluggable storage backends for the container database"""
+# pylint: disable=too-many-lines
+# (five backends and the SQL of one of them)
+import bisect
+import gc
+import itertools
+import json
+import os
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager, nullcontext
+
+from tools.id_allocator import IdAllocator, SortedIds, new_epoch
+from tools.records import CONTAINER_FIELDS, ContainerRecord
+from tools.wal import WriteAheadLog, lock_directory, read_log, read_snapshot, wal_segments, write_snapshot
+
+
+# Fields with a secondary (hash) index, usable as listing filters
+INDEXED_FIELDS = ('Hostname', 'Image')
+
+
+class DuplicateError(ValueError):
+    """
+    Raised when a write would break a uniqueness constraint
+    """
+    def __init__(self, field):
+        super().__init__(f'Duplicate value for unique field {field!r}')
+        self.field = field
+
+
+class VersionConflictError(ValueError):
+    """
+    Raised when a conditional write finds another version than expected
+    """
+    def __init__(self, container_id, expected, current):
+        super().__init__(f'Container {container_id} is at version {current}, not {expected}')
+        self.expected = expected
+        self.current = current
+
+
+class BaseStore:
+    """
+    Interface every container storage backend implements.
+
+    Records are plain dicts with the keys 'id', 'Hostname', 'Entrypoint'
+    and 'Image', so handlers can pass them straight to jsonify. Every
+    container also has a version, kept outside the record: 1 when created,
+    incremented by every update. The collection version changes with every
+    write to any container, so it identifies the content of every listing.
+    """
+    name = None
+
+    @staticmethod
+    def _new_record(container_id, fields):
+        record = {'id': container_id}
+        record.update(fields)
+        return record
+
+    def create(self, fields, unique_fields=()):
+        """
+        Store a new container and return its record (with the allocated 'id').
+        Raises DuplicateError if a value of unique_fields is already taken.
+        """
+        raise NotImplementedError
+
+    def get(self, container_id):
+        """
+        Return the record for container_id or None
+        """
+        raise NotImplementedError
+
+    def version(self, container_id):
+        """
+        Return the current version of container_id or None
+        """
+        raise NotImplementedError
+
+    def collection_version(self):
+        """
+        Return a number that changes with every create, update and delete
+        """
+        raise NotImplementedError
+
+    def epoch(self):
+        """
+        Return a token that changes whenever IDs and versions restart: a new
+        in-memory store or a clear(). Entity tags include it so they never repeat.
+        """
+        raise NotImplementedError
+
+    def update(self, container_id, changes, unique_fields=(), expected_version=None):
+        """
+        Apply changes to an existing container; return the record or None.
+        Raises DuplicateError if a value of unique_fields is already taken and
+        VersionConflictError if expected_version is given and not current.
+        """
+        raise NotImplementedError
+
+    def delete(self, container_id, expected_version=None):
+        """
+        Remove a container; return the removed record or None.
+        Raises VersionConflictError if expected_version is given and not current.
+        """
+        raise NotImplementedError
+
+    def create_many(self, fields_list, unique_fields=()):
+        """
+        Store several containers, allocating their IDs in one step.
+        Nothing is stored if any item raises DuplicateError.
+        """
+        raise NotImplementedError
+
+    def update_many(self, changes_by_id, unique_fields=()):
+        """
+        Apply [(container_id, changes), ...]; return the record or None per item.
+        Nothing is changed if any item raises DuplicateError.
+        """
+        raise NotImplementedError
+
+    def delete_many(self, container_ids):
+        """
+        Remove several containers; return the removed record or None per ID
+        """
+        raise NotImplementedError
+
+    def values(self):
+        """
+        Iterate over all records ordered by 'id'
+        """
+        raise NotImplementedError
+
+    def page(self, limit=None, offset=0, after_id=None, filters=None):
+        """
+        Return a list of records ordered by 'id'.
+
+        Args:
+            limit (int): Maximum number of records, None for all.
+            offset (int): Number of records to skip.
+            after_id (int): Only records with a greater 'id' (cursor mode).
+            filters (dict): Exact-match values for fields in INDEXED_FIELDS.
+        """
+        records = self.values()
+        if filters:
+            records = (record for record in records if all(record.get(f) == v for f, v in filters.items()))
+        return _slice(records, limit, offset, after_id)
+
+    def stream(self, filters=None, chunk_size=1000):
+        """
+        Lazily yield records ordered by 'id', fetching chunk_size at a time
+        """
+        after_id = None
+        while True:
+            chunk = self.page(chunk_size, 0, after_id, filters)
+            yield from chunk
+            if len(chunk) < chunk_size:
+                return
+            after_id = chunk[-1]['id']
+
+    def clear(self):
+        """
+        Drop every container and restart the ID sequence
+        """
+        raise NotImplementedError
+
+    def ping(self):
+        """
+        Raise if the store cannot be read; constant time whatever its size
+        """
+        self.collection_version()
+
+    def __len__(self):
+        raise NotImplementedError
+
+
+class DictStore(BaseStore):
+    """
+    The original module-level dict: fastest, but not safe for threaded servers.
+
+    INDEXED_FIELDS are mirrored in hash indexes (value -> set of IDs) so
+    filtered listings and uniqueness checks never scan every container.
+    IDs are also kept sorted, so cursor pages bisect instead of walking.
+    """
+    name = 'dict'
+
+    # Copies records out of the store (the thread-safe stores never hand out their own)
+    _copy = dict
+
+    def __init__(self):
+        self._data = {}
+        self._versions = {}
+        self._collection_version = 0
+        self._ids = IdAllocator()
+        self._indexes = {field: {} for field in INDEXED_FIELDS}
+        self._order = SortedIds()
+        self._epoch = new_epoch()
+
+    def _after(self, after_id):
+        if after_id is None:
+            return self._data.values()
+        # Seek to the cursor; IDs deleted since the last compaction are skipped
+        records = map(self._data.get, self._order.after(after_id))
+        return (record for record in records if record is not None)
+
+    def _index_add(self, record):
+        for field, index in self._indexes.items():
+            index.setdefault(_index_key(record.get(field)), set()).add(record['id'])
+
+    def _index_remove(self, record):
+        for field, index in self._indexes.items():
+            key = _index_key(record.get(field))
+            ids = index.get(key)
+            if ids is not None:
+                ids.discard(record['id'])
+                if not ids:
+                    del index[key]
+
+    def _check_unique(self, fields, unique_fields, container_id=None):
+        for field in unique_fields:
+            if field in fields and self.lookup(field, fields[field]) - {container_id}:
+                raise DuplicateError(field)
+
+    def _check_version(self, container_id, expected_version):
+        if expected_version is not None and self._versions[container_id] != expected_version:
+            raise VersionConflictError(container_id, expected_version, self._versions[container_id])
+
+    def lookup(self, field, value):
+        """
+        IDs of the containers whose indexed field equals value
+        """
+        return self._indexes[field].get(_index_key(value), frozenset())
+
+    def _filtered(self, filters, after_id=None):
+        # Intersect starting from the most selective index
+        id_sets = sorted((self.lookup(field, value) for field, value in filters.items()), key=len)
+        ids = sorted(set(id_sets[0]).intersection(*id_sets[1:]))
+        return map(self._data.__getitem__, ids if after_id is None else ids[bisect.bisect_right(ids, after_id):])
+
+    def create(self, fields, unique_fields=()):
+        self._check_unique(fields, unique_fields)
+        container_id = self._ids.next_id()
+        record = self._new_record(container_id, fields)
+        self._data[container_id] = record
+        self._versions[container_id] = 1
+        self._collection_version += 1
+        self._index_add(record)
+        self._order.add(container_id)
+        return record
+
+    def get(self, container_id):
+        return self._data.get(container_id)
+
+    def version(self, container_id):
+        return self._versions.get(container_id)
+
+    def collection_version(self):
+        return self._collection_version
+
+    def epoch(self):
+        return self._epoch
+
+    def update(self, container_id, changes, unique_fields=(), expected_version=None):
+        record = self._data.get(container_id)
+        if record is None:
+            return None
+        self._check_version(container_id, expected_version)
+        self._check_unique(changes, unique_fields, container_id)
+        self._index_remove(record)
+        record.update(changes)
+        self._index_add(record)
+        self._versions[container_id] += 1
+        self._collection_version += 1
+        return record
+
+    def delete(self, container_id, expected_version=None):
+        if container_id not in self._data:
+            return None
+        self._check_version(container_id, expected_version)
+        record = self._data.pop(container_id)
+        del self._versions[container_id]
+        self._collection_version += 1
+        self._index_remove(record)
+        self._order.remove(self._data)
+        return record
+
+    def create_many(self, fields_list, unique_fields=()):
+        for field in unique_fields:
+            seen = set()
+            for fields in fields_list:
+                if field in fields:
+                    key = _index_key(fields[field])
+                    if key in seen or self.lookup(field, fields[field]):
+                        raise DuplicateError(field)
+                    seen.add(key)
+        first_id = self._ids.reserve(len(fields_list))
+        records = []
+        for container_id, fields in enumerate(fields_list, first_id):
+            record = self._new_record(container_id, fields)
+            self._data[container_id] = record
+            self._versions[container_id] = 1
+            self._index_add(record)
+            self._order.add(container_id)
+            records.append(record)
+        self._collection_version += 1
+        return records
+
+    def update_many(self, changes_by_id, unique_fields=()):
+        previous_records = []
+        results = []
+        try:
+            for container_id, changes in changes_by_id:
+                record = self._data.get(container_id)
+                if record is not None:
+                    previous_records.append((self._copy(record), self._versions[container_id]))
+                results.append(self.update(container_id, changes, unique_fields))
+        except DuplicateError:
+            # Roll back the items already applied
+            for previous, version in reversed(previous_records):
+                record = self._data[previous['id']]
+                self._index_remove(record)
+                record.update(previous)
+                self._index_add(record)
+                self._versions[previous['id']] = version
+            # The collection version is left as it is: it only has to change, never to go back
+            raise
+        return results
+
+    def delete_many(self, container_ids):
+        return [self.delete(container_id) for container_id in container_ids]
+
+    def values(self):
+        # IDs are monotonic and dicts keep insertion order, so no sort is needed
+        return self._data.values()
+
+    def page(self, limit=None, offset=0, after_id=None, filters=None):
+        records = self._filtered(filters, after_id) if filters else self._after(after_id)
+        return _slice(records, limit, offset)
+
+    def stream(self, filters=None, chunk_size=1000):
+        # Walk the live dict, nothing is copied
+        return iter(self._filtered(filters) if filters else self._data.values())
+
+    def clear(self):
+        self._data.clear()
+        self._versions.clear()
+        self._collection_version += 1
+        self._ids.reset()
+        for index in self._indexes.values():
+            index.clear()
+        self._order.clear()
+        self._epoch = new_epoch()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class ThreadSafeStore(DictStore):
+    """
+    In-memory store guarded by a lock, for threaded WSGI servers
+    """
+    name = 'locked'
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.RLock()
+
+    def lookup(self, field, value):
+        with self._lock:
+            return frozenset(super().lookup(field, value))
+
+    def create(self, fields, unique_fields=()):
+        with self._lock:
+            return self._copy(super().create(fields, unique_fields))
+
+    def get(self, container_id):
+        with self._lock:
+            record = super().get(container_id)
+            return self._copy(record) if record is not None else None
+
+    def version(self, container_id):
+        with self._lock:
+            return super().version(container_id)
+
+    def collection_version(self):
+        with self._lock:
+            return super().collection_version()
+
+    def update(self, container_id, changes, unique_fields=(), expected_version=None):
+        with self._lock:
+            record = super().update(container_id, changes, unique_fields, expected_version)
+            return self._copy(record) if record is not None else None
+
+    def delete(self, container_id, expected_version=None):
+        with self._lock:
+            return super().delete(container_id, expected_version)
+
+    def create_many(self, fields_list, unique_fields=()):
+        with self._lock:
+            return list(map(self._copy, super().create_many(fields_list, unique_fields)))
+
+    def update_many(self, changes_by_id, unique_fields=()):
+        # update() already returns copies
+        with self._lock:
+            return super().update_many(changes_by_id, unique_fields)
+
+    def delete_many(self, container_ids):
+        with self._lock:
+            return super().delete_many(container_ids)
+
+    def values(self):
+        # Snapshot so callers can iterate while other threads mutate the store
+        with self._lock:
+            return list(map(self._copy, self._data.values()))
+
+    def page(self, limit=None, offset=0, after_id=None, filters=None):
+        # Only copy the requested slice
+        with self._lock:
+            return list(map(self._copy, super().page(limit, offset, after_id, filters)))
+
+    def stream(self, filters=None, chunk_size=1000):
+        # Snapshot the IDs only, then copy records chunk by chunk under the lock
+        with self._lock:
+            ids = [record['id'] for record in self._filtered(filters)] if filters else list(self._data)
+        for start in range(0, len(ids), chunk_size):
+            with self._lock:
+                chunk = [self._copy(self._data[i]) for i in ids[start:start + chunk_size] if i in self._data]
+            yield from chunk
+
+    def clear(self):
+        with self._lock:
+            super().clear()
+
+
+class CompactStore(ThreadSafeStore):
+    """
+    Thread-safe in-memory store keeping each container as a ContainerRecord.
+
+    The slots record and the interned images (tools/records.py) take less
+    than half the memory of a dict per container. Reads copy records out as
+    dicts, as the 'locked' store does, so handlers and JSON output cannot
+    tell the two apart. Only CONTAINER_FIELDS can be stored.
+    """
+    name = 'compact'
+
+    _copy = staticmethod(ContainerRecord.as_dict)
+    _new_record = ContainerRecord
+
+    def update(self, container_id, changes, unique_fields=(), expected_version=None):
+        # Before the indexes are touched
+        ContainerRecord.check_fields(changes)
+        return super().update(container_id, changes, unique_fields, expected_version)
+
+    def delete(self, container_id, expected_version=None):
+        record = super().delete(container_id, expected_version)
+        return record.as_dict() if record is not None else None
+
+
+class DurableStore(ThreadSafeStore):
+    """
+    Thread-safe in-memory store made durable by a write-ahead log and snapshots.
+
+    Reads are served from memory as fast as the 'locked' store. Every write
+    is appended to the log (tools/wal.py) under the store lock, as the whole
+    record it produced, so replaying an entry twice does no harm. After
+    snapshot_every entries the records are copied under the lock, the log
+    moves to a new segment, and a background thread writes the copy as a
+    snapshot that replaces the older segments. Opening the directory loads
+    the memory-mapped snapshot, then replays the newer segments.
+
+    One process at a time owns the directory (a lock file enforces it).
+    """
+    name = 'durable'
+
+    def __init__(self, path, fsync='interval', fsync_interval=1.0, snapshot_every=100000):
+        if path is None:
+            raise ValueError("The 'durable' store needs a directory (DURABLE_PATH)")
+        super().__init__()
+        self.path = os.path.abspath(path)
+        self.snapshot_every = snapshot_every
+        os.makedirs(self.path, exist_ok=True)
+        self._lock_file = lock_directory(self.path)
+        self._snapshot_lock = threading.Lock()
+        self._snapshot_thread = None
+        self._batch_depth = 0
+        # Recovery allocates millions of objects and frees none: cyclic GC passes would only slow it down
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            segment, self._entries = self._recover()
+        finally:
+            if gc_enabled:
+                gc.enable()
+        self._wal = WriteAheadLog(self.path, segment, fsync, fsync_interval)
+        if self._epoch is None:  # a new directory (or one written before epochs)
+            self._epoch = new_epoch()
+            self._log(['epoch', self._epoch])
+        self._snapshot_if_due()
+
+    def _recover(self):
+        """
+        Load the snapshot and replay the log; return (next segment, entries replayed)
+        """
+        header, rows = read_snapshot(self.path)
+        first_segment = 1
+        self._epoch = (header or {}).get('epoch')
+        if header is not None:
+            self._data = {record['id']: record for _, record in rows}
+            self._versions = {record['id']: version for version, record in rows}
+            self._order = SortedIds(self._data)
+            self._build_indexes()
+            self._ids.reset(header['last_id'])
+            self._collection_version = header['collection_version']
+            first_segment = header['wal_segment']
+        replayed = 0
+        next_segment = first_segment
+        for segment, segment_file in wal_segments(self.path):
+            if segment < first_segment:
+                os.remove(segment_file)  # already in the snapshot, left behind by a crash
+                continue
+            entries, valid_length = read_log(segment_file)
+            if valid_length < os.path.getsize(segment_file):
+                os.truncate(segment_file, valid_length)
+            for entry in entries:
+                self._apply(entry)
+            replayed += len(entries)
+            next_segment = segment + 1
+        return next_segment, replayed
+
+    def _build_indexes(self):
+        """
+        Index every record in one pass per field (_index_add per record is several times slower)
+        """
+        for field, index in self._indexes.items():
+            index.clear()
+            for container_id, record in self._data.items():
+                value = record.get(field)
+                try:
+                    ids = index.get(value)
+                except TypeError:  # unhashable JSON value
+                    value = _index_key(value)
+                    ids = index.get(value)
+                if ids is None:
+                    index[value] = {container_id}
+                else:
+                    ids.add(container_id)
+
+    def _put(self, version, record):
+        previous = self._data.get(record['id'])
+        if previous is not None:
+            self._index_remove(previous)
+        else:
+            self._order.add(record['id'])
+        self._data[record['id']] = record
+        self._versions[record['id']] = version
+        self._index_add(record)
+        self._ids.observe(record['id'])
+
+    def _apply(self, entry):
+        """
+        Redo one log entry
+        """
+        operation = entry[0]
+        if operation == 'put':
+            self._put(entry[1], entry[2])
+        elif operation == 'puts':
+            for record in entry[1]:
+                self._put(1, record)
+        elif operation == 'del':
+            record = self._data.pop(entry[1], None)
+            if record is not None:
+                del self._versions[entry[1]]
+                self._index_remove(record)
+                self._order.remove(self._data)
+        elif operation in ('clear', 'epoch'):
+            if operation == 'clear':
+                DictStore.clear(self)
+            self._epoch = entry[1] if len(entry) > 1 else None  # clears logged before epochs have none
+            return
+        elif operation == 'bump':
+            self._collection_version += entry[1]
+            return
+        else:
+            raise ValueError(f'Unknown log entry {operation!r} in {self.path}')
+        self._collection_version += 1
+
+    def _log(self, entry):
+        self._wal.append(entry)
+        self._entries += 1
+        self._snapshot_if_due()
+
+    def _snapshot_if_due(self):
+        if self.snapshot_every and self._entries >= self.snapshot_every:
+            if self._snapshot_thread is None or not self._snapshot_thread.is_alive():
+                self._snapshot_thread = threading.Thread(target=self.snapshot, name='btf-snapshot', daemon=True)
+                self._snapshot_thread.start()
+
+    def snapshot(self):
+        """
+        Write a compacted snapshot now and drop the log segments it replaces
+        """
+        with self._snapshot_lock:
+            with self._lock:
+                rows = [(self._versions[container_id], dict(record)) for container_id, record in self._data.items()]
+                state = {'last_id': self._ids.last_id, 'collection_version': self._collection_version, 'epoch': self._epoch}
+                segment = self._wal.rotate()
+                self._entries = 0
+            # Encoding and writing happen outside the lock: writes go on meanwhile, into the new segment
+            write_snapshot(self.path, rows, segment, state)
+            for old_segment, segment_file in wal_segments(self.path):
+                if old_segment < segment:
+                    os.remove(segment_file)
+
+    def sync(self):
+        """
+        fsync the log now, whatever the fsync mode
+        """
+        self._wal.sync()
+
+    def close(self):
+        """
+        Finish a running snapshot, fsync the log and release the directory
+        """
+        if self._snapshot_thread is not None:
+            self._snapshot_thread.join()
+        self._wal.close()
+        self._lock_file.close()
+
+    def create(self, fields, unique_fields=()):
+        with self._lock:
+            record = super().create(fields, unique_fields)
+            self._log(['put', 1, record])
+            return record
+
+    def update(self, container_id, changes, unique_fields=(), expected_version=None):
+        with self._lock:
+            record = super().update(container_id, changes, unique_fields, expected_version)
+            # Batched updates are logged once the whole batch has applied
+            if record is not None and not self._batch_depth:
+                self._log(['put', self._versions[container_id], record])
+            return record
+
+    def delete(self, container_id, expected_version=None):
+        with self._lock:
+            record = super().delete(container_id, expected_version)
+            if record is not None:
+                self._log(['del', container_id])
+            return record
+
+    def create_many(self, fields_list, unique_fields=()):
+        with self._lock:
+            records = super().create_many(fields_list, unique_fields)
+            self._log(['puts', records])
+            return records
+
+    def update_many(self, changes_by_id, unique_fields=()):
+        with self._lock:
+            collection_version = self._collection_version
+            self._batch_depth += 1
+            try:
+                results = super().update_many(changes_by_id, unique_fields)
+            except DuplicateError:
+                # Rolled back, but the collection version moved: replay must move it as far
+                self._log(['bump', self._collection_version - collection_version])
+                raise
+            finally:
+                self._batch_depth -= 1
+            for record in results:
+                if record is not None:
+                    self._log(['put', self._versions[record['id']], record])
+            return results
+
+    def clear(self):
+        with self._lock:
+            super().clear()
+            self._log(['clear', self._epoch])
+
+
+class SQLiteStore(BaseStore):
+    """
+    SQLite-backed store in WAL mode, shareable between worker processes.
+
+    With a file path every thread (and every forked process) gets its own
+    connection and writers are serialised by SQLite itself. Without a path
+    the database lives in memory behind a single, lock-guarded connection.
+    All SQL is issued through the constant, parameterised statements below so
+    the driver's per-connection statement cache keeps them prepared. The
+    collection version is a counter row bumped by triggers, so it also counts
+    the writes of other processes; so does the epoch row replaced by clear().
+    """
+    name = 'sqlite'
+
+    # Untyped columns keep strings and numbers as they were sent (no TEXT affinity), other JSON values as BLOBs
+    SQL_SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS containers ('
+        ' id INTEGER PRIMARY KEY AUTOINCREMENT,'
+        ' Hostname,'
+        ' Entrypoint,'
+        ' Image,'
+        ' version INTEGER NOT NULL DEFAULT 1);'
+        'CREATE INDEX IF NOT EXISTS containers_hostname ON containers (Hostname);'
+        'CREATE INDEX IF NOT EXISTS containers_image ON containers (Image);'
+        'CREATE TABLE IF NOT EXISTS collection (id INTEGER PRIMARY KEY CHECK (id = 0), version INTEGER NOT NULL);'
+        'INSERT OR IGNORE INTO collection (id, version) VALUES (0, 0);'
+        'CREATE TABLE IF NOT EXISTS epoch (id INTEGER PRIMARY KEY CHECK (id = 0), token TEXT NOT NULL);'
+        'INSERT OR IGNORE INTO epoch (id, token) VALUES (0, lower(hex(randomblob(4))));'
+        'CREATE TRIGGER IF NOT EXISTS containers_inserted AFTER INSERT ON containers'
+        ' BEGIN UPDATE collection SET version = version + 1; END;'
+        'CREATE TRIGGER IF NOT EXISTS containers_updated AFTER UPDATE ON containers'
+        ' BEGIN UPDATE collection SET version = version + 1; END;'
+        'CREATE TRIGGER IF NOT EXISTS containers_deleted AFTER DELETE ON containers'
+        ' BEGIN UPDATE collection SET version = version + 1; END;'
+    )
+    SQL_INSERT = 'INSERT INTO containers (Hostname, Entrypoint, Image) VALUES (?, ?, ?)'
+    SQL_INSERT_WITH_ID = 'INSERT INTO containers (id, Hostname, Entrypoint, Image) VALUES (?, ?, ?, ?)'
+    SQL_LAST_ID = "SELECT seq FROM sqlite_sequence WHERE name = 'containers'"
+    SQL_SELECT = 'SELECT id, Hostname, Entrypoint, Image FROM containers WHERE id = ?'
+    SQL_SELECT_VERSION = 'SELECT version FROM containers WHERE id = ?'
+    SQL_SELECT_COLLECTION_VERSION = 'SELECT version FROM collection'
+    SQL_SELECT_EPOCH = 'SELECT token FROM epoch'
+    SQL_NEW_EPOCH = 'UPDATE epoch SET token = lower(hex(randomblob(4)))'
+    SQL_UPDATE = 'UPDATE containers SET Hostname = ?, Entrypoint = ?, Image = ?, version = version + 1 WHERE id = ?'
+    SQL_DELETE = 'DELETE FROM containers WHERE id = ?'
+    SQL_SELECT_ALL = 'SELECT id, Hostname, Entrypoint, Image FROM containers ORDER BY id'
+    SQL_SELECT_PAGE = 'SELECT id, Hostname, Entrypoint, Image FROM containers WHERE id > ?{} ORDER BY id LIMIT ? OFFSET ?'
+    SQL_FIND_OTHER = 'SELECT id FROM containers WHERE {} IS ? AND id != ? LIMIT 1'
+    SQL_COUNT = 'SELECT COUNT(*) AS total FROM containers'
+    SQL_CLEAR = 'DELETE FROM containers'
+    SQL_RESET_SEQUENCE = "DELETE FROM sqlite_sequence WHERE name = 'containers'"
+    SQL_COLUMNS = 'PRAGMA table_info(containers)'
+    SQL_ADD_VERSION = 'ALTER TABLE containers ADD COLUMN version INTEGER NOT NULL DEFAULT 1'
+
+    # Largest value an INTEGER PRIMARY KEY can hold
+    MAX_ID = 2 ** 63 - 1
+
+    def __init__(self, path=None, timeout=30.0, cached_statements=128):
+        self.path = None if path in (None, ':memory:') else os.path.abspath(path)
+        self._timeout = timeout
+        self._cached_statements = cached_statements
+        self._local = threading.local()
+        if self.path is None:
+            self._memory_conn = self._connect(':memory:')
+            self._memory_lock = threading.RLock()
+        else:
+            self._memory_conn = None
+            self._memory_lock = None
+        with self._session() as conn:
+            conn.executescript(self.SQL_SCHEMA)
+            # Files created before containers had versions
+            if 'version' not in {column['name'] for column in conn.execute(self.SQL_COLUMNS)}:
+                conn.execute(self.SQL_ADD_VERSION)
+
+    def _connect(self, target):
+        conn = sqlite3.connect(
+            target,
+            timeout=self._timeout,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=self._cached_statements,
+        )
+        conn.row_factory = _row_to_record
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    @contextmanager
+    def _session(self):
+        """
+        Yield the connection for the current thread and process
+        """
+        lock, conn = self._memory_lock, self._memory_conn
+        if lock is None:
+            local = self._local
+            if getattr(local, 'pid', None) != os.getpid():
+                # Connections must never be shared with a forked parent
+                local.conn = self._connect(self.path)
+                local.pid = os.getpid()
+            lock, conn = nullcontext(), local.conn
+        with lock:
+            yield conn
+
+    @contextmanager
+    def _transaction(self):
+        """
+        Run a read-modify-write sequence under SQLite's write lock
+        """
+        with self._session() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield conn
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            conn.execute('COMMIT')
+
+    def _check_unique(self, conn, fields, unique_fields, container_id=0):
+        for field in unique_fields:
+            if field in fields:
+                sql = self.SQL_FIND_OTHER.format(_column(field))
+                if conn.execute(sql, (_to_column(fields[field]), container_id)).fetchone() is not None:
+                    raise DuplicateError(field)
+
+    def lookup(self, field, value):
+        """
+        IDs of the containers whose indexed field equals value
+        """
+        sql = f'SELECT id FROM containers WHERE {_column(field)} IS ?'
+        with self._session() as conn:
+            return frozenset(row['id'] for row in conn.execute(sql, (_to_column(value),)))
+
+    def create(self, fields, unique_fields=()):
+        values = _columns(fields)
+        if unique_fields:
+            with self._transaction() as conn:
+                self._check_unique(conn, fields, unique_fields)
+                container_id = conn.execute(self.SQL_INSERT, values).lastrowid
+        else:
+            with self._session() as conn:
+                container_id = conn.execute(self.SQL_INSERT, values).lastrowid
+        return self._new_record(container_id, fields)
+
+    def get(self, container_id):
+        if container_id > self.MAX_ID:
+            return None
+        with self._session() as conn:
+            return conn.execute(self.SQL_SELECT, (container_id,)).fetchone()
+
+    def _check_version(self, conn, container_id, expected_version):
+        if expected_version is not None:
+            current = conn.execute(self.SQL_SELECT_VERSION, (container_id,)).fetchone()['version']
+            if current != expected_version:
+                raise VersionConflictError(container_id, expected_version, current)
+
+    def _update(self, conn, container_id, changes, unique_fields, expected_version=None):
+        if container_id > self.MAX_ID:
+            return None
+        record = conn.execute(self.SQL_SELECT, (container_id,)).fetchone()
+        if record is not None:
+            self._check_version(conn, container_id, expected_version)
+            self._check_unique(conn, changes, unique_fields, container_id)
+            record.update(changes)
+            conn.execute(self.SQL_UPDATE, (*_columns(record), container_id))
+        return record
+
+    def _delete(self, conn, container_id, expected_version=None):
+        if container_id > self.MAX_ID:
+            return None
+        record = conn.execute(self.SQL_SELECT, (container_id,)).fetchone()
+        if record is not None:
+            self._check_version(conn, container_id, expected_version)
+            conn.execute(self.SQL_DELETE, (container_id,))
+        return record
+
+    def version(self, container_id):
+        if container_id > self.MAX_ID:
+            return None
+        with self._session() as conn:
+            row = conn.execute(self.SQL_SELECT_VERSION, (container_id,)).fetchone()
+        return row['version'] if row is not None else None
+
+    def collection_version(self):
+        with self._session() as conn:
+            return conn.execute(self.SQL_SELECT_COLLECTION_VERSION).fetchone()['version']
+
+    def epoch(self):
+        with self._session() as conn:
+            return conn.execute(self.SQL_SELECT_EPOCH).fetchone()['token']
+
+    def update(self, container_id, changes, unique_fields=(), expected_version=None):
+        if container_id > self.MAX_ID:
+            return None
+        with self._transaction() as conn:
+            return self._update(conn, container_id, changes, unique_fields, expected_version)
+
+    def delete(self, container_id, expected_version=None):
+        if container_id > self.MAX_ID:
+            return None
+        with self._transaction() as conn:
+            return self._delete(conn, container_id, expected_version)
+
+    def create_many(self, fields_list, unique_fields=()):
+        with self._transaction() as conn:
+            for field in unique_fields:
+                seen = set()
+                for fields in fields_list:
+                    if field in fields:
+                        key = _index_key(fields[field])
+                        if key in seen:
+                            raise DuplicateError(field)
+                        seen.add(key)
+                        self._check_unique(conn, fields, (field,))
+            row = conn.execute(self.SQL_LAST_ID).fetchone()
+            first_id = (row['seq'] if row is not None else 0) + 1
+            conn.executemany(self.SQL_INSERT_WITH_ID, [
+                (container_id, *_columns(fields))
+                for container_id, fields in enumerate(fields_list, first_id)
+            ])
+        return [self._new_record(container_id, fields) for container_id, fields in enumerate(fields_list, first_id)]
+
+    def update_many(self, changes_by_id, unique_fields=()):
+        with self._transaction() as conn:
+            return [self._update(conn, container_id, changes, unique_fields) for container_id, changes in changes_by_id]
+
+    def delete_many(self, container_ids):
+        with self._transaction() as conn:
+            return [self._delete(conn, container_id) for container_id in container_ids]
+
+    def values(self):
+        with self._session() as conn:
+            return conn.execute(self.SQL_SELECT_ALL).fetchall()
+
+    def page(self, limit=None, offset=0, after_id=None, filters=None):
+        # Keyset pagination on the primary key, a negative LIMIT means no limit
+        filters = sorted((filters or {}).items())
+        sql = self.SQL_SELECT_PAGE.format(''.join(f' AND {_column(field)} = ?' for field, _ in filters))
+        params = (
+            min(after_id if after_id is not None else 0, self.MAX_ID),
+            *(_to_column(value) for _, value in filters),
+            -1 if limit is None else min(limit, self.MAX_ID),
+            min(offset, self.MAX_ID),
+        )
+        with self._session() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def clear(self):
+        with self._transaction() as conn:
+            conn.execute(self.SQL_CLEAR)
+            conn.execute(self.SQL_RESET_SEQUENCE)
+            conn.execute(self.SQL_NEW_EPOCH)
+
+    def __len__(self):
+        with self._session() as conn:
+            return conn.execute(self.SQL_COUNT).fetchone()['total']
+
+
+def _slice(records, limit, offset, after_id=None):
+    """
+    Apply cursor, offset and limit to records ordered by 'id' (clamped to islice's sys.maxsize bound)
+    """
+    if after_id is not None:
+        records = (record for record in records if record['id'] > after_id)
+    offset = min(offset, sys.maxsize)
+    stop = None if limit is None else min(offset + limit, sys.maxsize)
+    return list(itertools.islice(records, offset, stop))
+
+
+def _index_key(value):
+    """
+    Hashable index key for a stored field value (JSON allows lists and objects)
+    """
+    try:
+        hash(value)
+    except TypeError:
+        return json.dumps(value, sort_keys=True)
+    return value
+
+
+def _column(field):
+    """
+    Whitelist a field name before it is formatted into SQL
+    """
+    if field not in CONTAINER_FIELDS:
+        raise ValueError(f'Unknown container field {field!r}')
+    return field
+
+
+def _to_column(value):
+    """
+    SQLite value of a field: strings and numbers that fit as they are, any other JSON value (bool, list, object) as a JSON BLOB
+    """
+    if value is None or type(value) is str or type(value) in (int, float) and -2 ** 63 <= value <= SQLiteStore.MAX_ID:  # pylint: disable=unidiomatic-typecheck
+        return value
+    return json.dumps(value).encode()  # NaN fails the range check too: SQLite would store it as NULL
+
+
+def _columns(fields):
+    return tuple(_to_column(fields[field]) for field in CONTAINER_FIELDS)
+
+
+def _row_to_record(cursor, row):
+    """
+    sqlite3 row factory producing the same dicts the in-memory stores hold (BLOB columns are JSON values)
+    """
+    return {column[0]: json.loads(value) if type(value) is bytes else value for column, value in zip(cursor.description, row)}  # pylint: disable=unidiomatic-typecheck
+
+
+STORE_BACKENDS = {
+    DictStore.name: DictStore,
+    ThreadSafeStore.name: ThreadSafeStore,
+    CompactStore.name: CompactStore,
+    DurableStore.name: DurableStore,
+    SQLiteStore.name: SQLiteStore,
+}
+
+
+def create_store(backend='dict', path=None, **options):
+    """
+    Build a storage backend by name ('dict', 'locked', 'compact', 'durable' or 'sqlite').
+
+    Args:
+        backend (str): Name of the backend.
+        path (str): Database file for 'sqlite' (in memory when omitted), directory for 'durable'.
+        options: fsync, fsync_interval and snapshot_every for 'durable'.
+
+    Returns:
+        BaseStore: The storage backend instance.
+    """
+    try:
+        store_class = STORE_BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f'Unknown storage backend {backend!r}, expected one of {sorted(STORE_BACKENDS)}') from None
+    if store_class is DurableStore:
+        return store_class(path, **options)
+    if store_class is SQLiteStore:
+        return store_class(path=path)
+    return store_class()
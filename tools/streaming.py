@@ -0,0 +1,40 @@
+"""Generators that encode container listings incrementally"""
+import itertools
+
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+JSON_MIMETYPE = 'application/json'
+
+
+def _batches(records, batch_size):
+    records = iter(records)
+    while True:
+        batch = list(itertools.islice(records, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def iter_ndjson(records, dumps, batch_size=256):
+    """
+    Yield one JSON document per line, batch_size records per chunk.
+
+    Args:
+        records (Iterable): Container records, consumed lazily.
+        dumps (Callable): Function encoding a single record to str.
+        batch_size (int): Records encoded into each yielded chunk.
+    """
+    for batch in _batches(records, batch_size):
+        yield ''.join(dumps(record) + '\n' for record in batch)
+
+
+def iter_json_array(records, dumps, batch_size=256):
+    """
+    Yield a JSON array chunk by chunk; the joined output equals dumps(list(records)) + newline
+    """
+    yield '['
+    separator = ''
+    for batch in _batches(records, batch_size):
+        yield separator + ','.join(dumps(record) for record in batch)
+        separator = ','
+    yield ']\n'
@@ -0,0 +1,148 @@
+"""Bounded caches of verified and of recently issued JWTs"""
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class TokenCache:
+    """
+    LRU cache of token -> verified payload.
+
+    An entry lives until the token's 'exp' claim (or ttl seconds for tokens
+    without one) and the whole cache is dropped when the verification key
+    changes, so a hit never accepts a token jwt.decode() would reject.
+    """
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._key = None
+        self._lock = threading.Lock()
+
+    def get(self, token, key):
+        """
+        Return a copy of the cached payload for token, or None on a miss.
+
+        Args:
+            token (str): The encoded JWT.
+            key (Hashable): Identifies the verification key and algorithms;
+                a different key than the cached entries were verified with
+                invalidates the whole cache.
+        """
+        with self._lock:
+            if key != self._key:
+                self._entries.clear()
+                self._key = key
+            entry = self._entries.get(token)
+            if entry is not None:
+                payload, expires_at = entry
+                if time.time() < expires_at:
+                    self._entries.move_to_end(token)
+                    self.hits += 1
+                    return dict(payload)
+                del self._entries[token]
+            self.misses += 1
+            return None
+
+    def put(self, token, payload, key):
+        """
+        Remember a payload that was just verified with key
+        """
+        if self.maxsize <= 0:
+            return
+        exp = payload.get('exp')
+        expires_at = exp if isinstance(exp, (int, float)) else time.time() + self.ttl
+        with self._lock:
+            if key != self._key:
+                self._entries.clear()
+                self._key = key
+            self._entries[token] = (dict(payload), expires_at)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Drop every entry, e.g. after rotating the signing key
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Hit/miss counters and current size
+        """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries), 'maxsize': self.maxsize}
+
+
+class IssuedTokenCache:
+    """
+    Tokens signed by /auth/login, handed out again for window seconds.
+
+    A login repeating the password of a user's previous login, within the
+    window, gets the same token back without a password hash or a JWT
+    signature. The password itself is not kept: only its HMAC under a
+    random per-process key. An entry is only reused for the same user
+    record (a changed password or role makes a new token) and the same
+    signing key, and never within window seconds of the token's expiry.
+    """
+
+    def __init__(self, window=0, maxsize=1024):
+        self.window = window
+        self.maxsize = maxsize
+        self.hits = 0
+        self._secret = os.urandom(32)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _digest(self, password):
+        return hmac.new(self._secret, password.encode(), hashlib.sha256).digest()
+
+    def get(self, user, password, key):
+        """
+        Token to hand out again, or None.
+
+        Args:
+            user (dict): The stored user named in the login, None if unknown.
+            password (str): The password sent with the login.
+            key (Hashable): Identifies the signing key and algorithm.
+        """
+        if self.window <= 0 or user is None or not isinstance(password, str):
+            return None
+        with self._lock:
+            entry = self._entries.get(user['username'])
+        if entry is None:
+            return None
+        entry_user, digest, entry_key, token, reuse_until = entry
+        if time.time() < reuse_until and entry_key == key and entry_user == user and hmac.compare_digest(digest, self._digest(password)):
+            self.hits += 1
+            return token
+        return None
+
+    def put(self, user, password, key, token, exp):
+        """
+        Remember a token just signed for user, expiring at exp (epoch seconds)
+        """
+        if self.window <= 0 or self.maxsize <= 0:
+            return
+        # Never hand out a token close to its expiry
+        reuse_until = min(time.time() + self.window, exp - self.window)
+        with self._lock:
+            self._entries[user['username']] = (dict(user), self._digest(password), key, token, reuse_until)
+            self._entries.move_to_end(user['username'])
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Sign a new token at every user's next login
+        """
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,176 @@
+"""Accounts allowed to log in, with salted PBKDF2 password hashes"""
+import argparse
+import base64
+import getpass
+import hashlib
+import hmac
+import os
+import threading
+
+
+PASSWORD_HASH_ALGORITHM = 'pbkdf2_sha256'
+# OWASP's recommendation for PBKDF2-HMAC-SHA256 (2023)
+DEFAULT_ITERATIONS = 600000
+SALT_BYTES = 16
+
+# The mock accounts of the test suite. Their passwords are public, so their hashes
+# use 1000 iterations: a stronger hash would protect nothing and slow every test login.
+MOCK_USERS = (
+    {
+        'user_id': 1, 'username': 'testuser', 'role': 'user',
+        'password_hash': 'pbkdf2_sha256$1000$X7NkYgUCn8fsdsamLBskgg==$V8+0zztqlZTkFM2JC10XZP8EjyyK+YHY/rwDzUKZ5Os=',
+    },
+    {
+        'user_id': 2, 'username': 'admin', 'role': 'admin',
+        'password_hash': 'pbkdf2_sha256$1000$7GZpnH8kuYvg5XtDg4Yd+w==$cf1A6DiSPavbQUAVdvyns00H/PlN9oVL/FBnhggreaY=',
+    },
+)
+
+
+def _derive(password, salt, iterations):
+    return hashlib.pbkdf2_hmac('sha256', password.encode(), salt, iterations)
+
+
+def hash_password(password, iterations=DEFAULT_ITERATIONS, salt=None):
+    """
+    Encode a password as 'pbkdf2_sha256$<iterations>$<salt>$<hash>' (salt and hash in base64)
+    """
+    salt = os.urandom(SALT_BYTES) if salt is None else salt
+    derived = _derive(password, salt, iterations)
+    return '$'.join([PASSWORD_HASH_ALGORITHM, str(iterations), base64.b64encode(salt).decode(), base64.b64encode(derived).decode()])
+
+
+def hash_iterations(encoded):
+    """
+    Iteration count of an encoded hash, None if it is malformed
+    """
+    try:
+        return int(encoded.split('$')[1])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+def verify_password(password, encoded):
+    """
+    True when password matches an encoded hash.
+
+    The cost is the iteration count stored in the hash, so hashes made
+    with an older PASSWORD_HASH_ITERATIONS keep working. Digests are
+    compared in constant time.
+    """
+    if not isinstance(password, str):
+        return False
+    try:
+        algorithm, iterations, salt, expected = encoded.split('$')
+        salt, expected, iterations = base64.b64decode(salt), base64.b64decode(expected), int(iterations)
+    except (AttributeError, ValueError):
+        return False
+    if algorithm != PASSWORD_HASH_ALGORITHM:
+        return False
+    return hmac.compare_digest(_derive(password, salt, iterations), expected)
+
+
+class UserStore:
+    """
+    Interface of the account backends behind /auth/login.
+
+    Users are dicts with 'user_id', 'username', 'role' and 'password_hash'.
+    A backend only has to implement get(); set USER_STORE in the app config
+    to an instance to replace the accounts of USERS.
+    """
+    # Cost of the dummy hash checked for unknown usernames: that of the stored hashes
+    dummy_iterations = DEFAULT_ITERATIONS
+    _dummy = None
+
+    def get(self, username):
+        """
+        Return the user named username or None
+        """
+        raise NotImplementedError
+
+    def authenticate(self, username, password):
+        """
+        Return the user if password is theirs, else None.
+
+        An unknown username is checked against a dummy hash as costly as a
+        real one, so response times do not tell which usernames exist.
+        """
+        user = self.get(username)
+        if user is None:
+            verify_password(password, self._dummy_hash())
+            return None
+        return user if verify_password(password, user['password_hash']) else None
+
+    def _dummy_hash(self):
+        dummy = self._dummy
+        if dummy is None or hash_iterations(dummy) != self.dummy_iterations:
+            dummy = self._dummy = hash_password(os.urandom(SALT_BYTES).hex(), self.dummy_iterations)
+        return dummy
+
+
+class MemoryUserStore(UserStore):
+    """
+    Accounts in a dict, looked up without a lock.
+
+    Writers build a new dict and swap it in (copy-on-write), so a login
+    never waits for another one or for an account change.
+
+    Args:
+        users (Iterable): User dicts; a plain 'password' instead of
+            'password_hash' is hashed with iterations.
+        iterations (int): PBKDF2 iterations of the passwords hashed here.
+    """
+
+    def __init__(self, users=(), iterations=DEFAULT_ITERATIONS):
+        self.iterations = iterations
+        self._lock = threading.Lock()
+        self._users = {}
+        for user in users:
+            self.add(**user)
+
+    def get(self, username):
+        return self._users.get(username) if isinstance(username, str) else None
+
+    def add(self, username, role='user', user_id=None, password=None, password_hash=None):
+        """
+        Add or replace an account; returns the stored user
+        """
+        if password_hash is None:
+            if password is None:
+                raise ValueError(f'User {username!r} needs a password or a password_hash')
+            password_hash = hash_password(password, self.iterations)
+        with self._lock:
+            users = dict(self._users)
+            if user_id is None:
+                user_id = users[username]['user_id'] if username in users else max((u['user_id'] for u in users.values()), default=0) + 1
+            users[username] = {'user_id': user_id, 'username': username, 'role': role, 'password_hash': password_hash}
+            self._users = users
+            self.dummy_iterations = hash_iterations(password_hash) or self.iterations
+            return users[username]
+
+    def remove(self, username):
+        """
+        Delete an account; returns the removed user or None
+        """
+        with self._lock:
+            users = dict(self._users)
+            user = users.pop(username, None)
+            self._users = users
+            return user
+
+    def __len__(self):
+        return len(self._users)
+
+
+def main(argv=None):
+    """
+    Print the password_hash of a password read from the terminal
+    """
+    parser = argparse.ArgumentParser(description="Hash a password for the USERS setting of tools/api.py")
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS, help=f"PBKDF2 iterations (default: {DEFAULT_ITERATIONS})")
+    args = parser.parse_args(argv)
+    print(hash_password(getpass.getpass('Password: '), args.iterations))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,253 @@
+"""Write-ahead log and snapshots behind the durable in-memory container store"""
+# pylint: disable=no-member
+# (orjson is a compiled module pylint cannot inspect)
+import json
+import mmap
+import os
+import re
+import threading
+import time
+
+from tools.json_provider import DIGIT_MASK, LONG_NUMBER
+
+try:
+    import orjson
+except ImportError:  # optional dependency, snapshots are read with the stdlib without it
+    orjson = None
+
+try:
+    import fcntl
+except ImportError:  # not on Windows: the directory is then not locked
+    fcntl = None
+
+
+SNAPSHOT_FILE = 'snapshot.json'
+LOCK_FILE = 'lock'
+SEGMENT_PATTERN = re.compile(r'^wal-(\d+)\.log$')
+SNAPSHOT_FORMAT = 1
+
+# When appended entries reach the disk:
+#   'always'   fsync before every write returns (nothing acknowledged is ever lost)
+#   'interval' fsync at most every fsync_interval seconds, from a background thread
+#   'never'    leave it to the OS (entries survive a crash of the process, not of the machine)
+FSYNC_MODES = ('always', 'interval', 'never')
+
+
+class StoreLockedError(RuntimeError):
+    """
+    Raised when another process keeps the store directory locked
+    """
+
+
+def segment_path(directory, segment):
+    """
+    Path of WAL segment number segment
+    """
+    return os.path.join(directory, f'wal-{segment:08d}.log')
+
+
+def wal_segments(directory):
+    """
+    [(segment number, path), ...] of the WAL segments in directory, oldest first
+    """
+    segments = []
+    for name in os.listdir(directory):
+        match = SEGMENT_PATTERN.match(name)
+        if match:
+            segments.append((int(match.group(1)), os.path.join(directory, name)))
+    return sorted(segments)
+
+
+def fsync_directory(directory):
+    """
+    Make created, renamed and removed files of directory durable
+    """
+    if not hasattr(os, 'O_DIRECTORY'):
+        return
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def lock_directory(directory, timeout=30.0):
+    """
+    Take the exclusive lock of a store directory and return the open lock file.
+
+    Waits up to timeout seconds, so a worker replacing another one (see
+    tools/server.py) starts once the old one has exited.
+    """
+    lock_file = open(os.path.join(directory, LOCK_FILE), 'a+b')  # pylint: disable=consider-using-with
+    if fcntl is None:
+        return lock_file
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return lock_file
+        except BlockingIOError:
+            if time.monotonic() > deadline:
+                lock_file.close()
+                raise StoreLockedError(f'{directory} is locked by another process') from None
+            time.sleep(0.05)
+
+
+def encode_entry(entry):
+    """
+    One WAL line
+    """
+    return json.dumps(entry, separators=(',', ':')).encode() + b'\n'
+
+
+def _loads(data):
+    """
+    Decode JSON bytes with orjson when it reads them exactly as the stdlib would
+    """
+    if orjson is not None and LONG_NUMBER not in data.translate(DIGIT_MASK):
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass  # e.g. NaN, which the stdlib accepts
+    return json.loads(data)
+
+
+def read_log(path):
+    """
+    Entries of a WAL segment and the length of its valid part.
+
+    A last line without its newline is a write torn by a crash: it was
+    never acknowledged, so it is left out (the caller truncates it away).
+    """
+    with open(path, 'rb') as log_file:
+        data = log_file.read()
+    end = data.rfind(b'\n') + 1
+    return [_loads(line) for line in data[:end].splitlines()], end
+
+
+def write_snapshot(directory, rows, wal_segment, state):
+    """
+    Atomically replace the snapshot with rows ([(version, record), ...] ordered by 'id').
+    state ('last_id', 'collection_version' and 'epoch' of the store) goes in the header.
+
+    The file is a header line followed by one JSON array. The header tells
+    read_snapshot() whether orjson may parse the array (no 64+ bit integers).
+    """
+    body = json.dumps(rows, separators=(',', ':')).encode()
+    header = {
+        'format': SNAPSHOT_FORMAT,
+        'wal_segment': wal_segment,
+        **state,
+        'count': len(rows),
+        'long_numbers': LONG_NUMBER in body.translate(DIGIT_MASK),
+    }
+    path = os.path.join(directory, SNAPSHOT_FILE)
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as snapshot_file:
+        snapshot_file.write(json.dumps(header).encode() + b'\n')
+        snapshot_file.write(body)
+        snapshot_file.flush()
+        os.fsync(snapshot_file.fileno())
+    os.replace(temporary, path)
+    fsync_directory(directory)
+
+
+def read_snapshot(directory):
+    """
+    (header, rows) of the snapshot, (None, []) if there is none.
+
+    The file is memory-mapped and, with orjson, parsed in place: the array
+    is never copied into a bytes object first.
+    """
+    path = os.path.join(directory, SNAPSHOT_FILE)
+    try:
+        snapshot_file = open(path, 'rb')  # pylint: disable=consider-using-with
+    except FileNotFoundError:
+        return None, []
+    with snapshot_file, mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        header = json.loads(mapped.readline())
+        if header.get('format') != SNAPSHOT_FORMAT:
+            raise ValueError(f'Unsupported snapshot format {header.get("format")!r} in {path}')
+        if orjson is not None and not header['long_numbers']:
+            with memoryview(mapped) as view:
+                rows = orjson.loads(view[mapped.tell():])
+        else:
+            rows = json.loads(mapped[mapped.tell():])
+    return header, rows
+
+
+class WriteAheadLog:
+    """
+    Append-only log of store writes, one JSON line per entry, in numbered segments.
+
+    Entries are written straight to the OS (an unbuffered file), so they
+    survive a crash of the process; fsync decides when they also survive a
+    crash of the machine (see FSYNC_MODES). rotate() starts a new segment so
+    a snapshot can replace every older one.
+    """
+
+    def __init__(self, directory, segment, fsync='interval', fsync_interval=1.0):
+        if fsync not in FSYNC_MODES:
+            raise ValueError(f'Unknown fsync mode {fsync!r}, expected one of {list(FSYNC_MODES)}')
+        self.directory = directory
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._closed = threading.Event()
+        self._open(segment)
+        self._syncer = None
+        if fsync == 'interval':
+            self._syncer = threading.Thread(target=self._sync_loop, name='btf-wal-fsync', daemon=True)
+            self._syncer.start()
+
+    def _open(self, segment):
+        self.segment = segment
+        self._file = open(segment_path(self.directory, segment), 'ab', buffering=0)  # pylint: disable=consider-using-with
+        fsync_directory(self.directory)
+
+    def append(self, entry):
+        """
+        Write one entry (callers serialise appends)
+        """
+        self._file.write(encode_entry(entry))
+        if self.fsync == 'always':
+            os.fsync(self._file.fileno())
+        else:
+            self._dirty = True
+
+    def sync(self):
+        """
+        fsync the entries written since the last fsync
+        """
+        with self._lock:
+            if self._dirty and not self._file.closed:
+                self._dirty = False
+                os.fsync(self._file.fileno())
+
+    def _sync_loop(self):
+        while not self._closed.wait(self.fsync_interval):
+            self.sync()
+
+    def rotate(self):
+        """
+        Close the current segment (fsynced) and continue in the next one; returns its number
+        """
+        with self._lock:
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._dirty = False
+            self._open(self.segment + 1)
+            return self.segment
+
+    def close(self):
+        """
+        fsync and close the log
+        """
+        self._closed.set()
+        if self._syncer is not None:
+            self._syncer.join()
+        with self._lock:
+            if not self._file.closed:
+                os.fsync(self._file.fileno())
+                self._file.close()